@@ -2,6 +2,9 @@ import json
 import boto3
 import uuid
 from datetime import datetime
+from roomeya_common.roster import register_students
+from roomeya_common.scoring_rules import normalize_rules
+from roomeya_common.snapshot import build_snapshot, save_snapshot
 
 dynamodb = boto3.resource('dynamodb')
 form_table = dynamodb.Table('Roomeya-Forms')
@@ -20,39 +23,43 @@ def lambda_handler(event, context):
         # body
         body = json.loads(event.get("body", "{}"))
 
-        form_id = str(uuid.uuid4())
-
-        student_objs = body.get("participants", [])
-        participants = []
-
-        for stu in student_objs:
-            sid = stu.get("studentId")
-            if not sid:
-                continue
-
-            # 1) Students table 조회
-            response = student_table.get_item(Key={"studentId": sid})
-            student_item = response.get("Item")
-
-            # 2) 없다면 새로 생성
-            if not student_item:
-                student_item = {
-                    "studentId": sid,
-                    "name": stu.get("name", ""),
-                    "gender": stu.get("gender", ""),
-                    "email": stu.get("email", ""),
-                    "createdAt": datetime.utcnow().isoformat(),
+        # 매칭 점수 기준 (선택). 없으면 matchingProcessor 기본 기준 사용
+        scoring_rules = body.get("scoringRules")
+        if scoring_rules is not None:
+            try:
+                scoring_rules = normalize_rules(scoring_rules)
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {
+                        'Access-Control-Allow-Origin': '*',
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({"error": f"scoringRules 오류: {e}"}, ensure_ascii=False)
                 }
 
-            # 학생에게 form 정보 및 완료 여부 추가
-            student_item["completed"] = False
-            student_item["formId"] = form_id
-
-            # DB에 저장 (신규 / 기존 모두 업데이트)
-            student_table.put_item(Item=student_item)
+        form_id = str(uuid.uuid4())
 
-            # form.participants 에 넣기
-            participants.append(student_item)
+        student_objs = body.get("participants", [])
+        created_at = datetime.utcnow().isoformat()
+
+        # 학번이 없는 항목은 제외 (같은 학번은 register_students 가 처음 것만 사용)
+        students = [
+            {
+                "studentId": stu.get("studentId"),
+                "name": stu.get("name", ""),
+                "gender": stu.get("gender", ""),
+                "email": stu.get("email", ""),
+                "createdAt": created_at,
+            }
+            for stu in student_objs if stu.get("studentId")
+        ]
+
+        # Students table: 기존 학생은 BatchGetItem 으로 한 번에 읽어 폼 배정 속성만 동시에 UpdateItem,
+        # 없는 학생은 위 정보로 batch_writer 저장 (학생마다 get_item + put_item 하던 것을 대체)
+        participants = register_students(
+            student_table, students, {"completed": False, "formId": form_id}
+        )
 
         # 폼 정보 생성
         form_data = {
@@ -69,8 +76,21 @@ def lambda_handler(event, context):
             "completedCount": 0
         }
 
+        if scoring_rules is not None:
+            form_data["scoringRules"] = scoring_rules
+
         form_table.put_item(Item=form_data)
 
+        # 매칭용 응답 스냅샷(S3) 초기화: 참가자 명부만 넣어 두고 SubmitForm 이 응답을 추가
+        try:
+            snapshot = build_snapshot(
+                form_id, [(p["studentId"], p.get("gender", ""), p.get("name", "")) for p in participants], []
+            )
+            save_snapshot(snapshot, if_none_match=True)
+        except Exception as e:
+            # 스냅샷이 없으면 매칭 시 DynamoDB 에서 만들어지므로 폼 생성은 계속 진행
+            print(f"Snapshot Warning: {str(e)}")
+
         return {
             'statusCode': 200,
             'headers': {
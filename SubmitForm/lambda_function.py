@@ -2,6 +2,7 @@ import json
 import boto3
 import uuid
 from datetime import datetime
+from roomeya_common.snapshot import append_response, delete_snapshot
 
 dynamodb = boto3.resource('dynamodb')
 forms_table = dynamodb.Table('Roomeya-Forms')
@@ -64,11 +65,30 @@ def lambda_handler(event, context):
         # -------------------------------------------
         # (3) Roomeya-Students: completed = True 업데이트
         # -------------------------------------------
-        students_table.update_item(
+        # ALL_NEW 로 받은 학생 정보(성별, 소속 폼)를 스냅샷 갱신에 그대로 사용
+        student = students_table.update_item(
             Key={'studentId': studentId},
             UpdateExpression="SET completed = :done",
-            ExpressionAttributeValues={':done': True}
-        )
+            ExpressionAttributeValues={':done': True},
+            ReturnValues="ALL_NEW"
+        ).get('Attributes', {})
+
+        # -------------------------------------------
+        # (4) 매칭용 응답 스냅샷(S3)에 이번 응답 추가
+        # -------------------------------------------
+        # 폼에 등록된 학생만 매칭 대상이므로 다른 폼 소속이면 제출 수만 반영
+        try:
+            append_response(
+                form_id, response_id, studentId, student.get('gender', ''), answers,
+                on_roster=student.get('formId') == form_id
+            )
+        except Exception as e:
+            # 응답이 빠진 스냅샷이 남지 않도록 삭제 -> 매칭 시 DynamoDB 에서 다시 생성
+            print(f"Snapshot Warning: {str(e)}")
+            try:
+                delete_snapshot(form_id)
+            except Exception as e:
+                print(f"Snapshot Delete Error: {str(e)}")
 
         return {
             'statusCode': 200,
@@ -0,0 +1,172 @@
+"""excelProcessor lambda_handler 벤치마크 (moto 로 S3 / DynamoDB 를 로컬에서 대체)
+
+가상 명부(synthetic.py)를 xlsx / csv / csv.gz / parquet 으로 만들어 S3 에 올리고
+S3 이벤트로 lambda_handler 를 실행해 총 시간, 처리량(행/초), 최대 메모리(tracemalloc)를 출력합니다.
+행을 읽는 대로 저장하므로 학생 목록이나 시트 객체는 메모리에 쌓이지 않습니다.
+(xlsx 의 공유 문자열 표는 openpyxl 이 통째로 읽으므로 고유 이름 / 이메일 수만큼은 늘어남)
+
+메모리는 moto 가 같은 프로세스에서 처리하는 DynamoDB 쓰기도 포함하므로 크기 간 비교용으로만 봅니다.
+
+    pip install "moto[dynamodb,s3]" openpyxl
+    python benchmarks/bench_ingest.py --sizes 1000 10000 50000
+    python benchmarks/bench_ingest.py --sizes 50000 --formats xlsx csv parquet   # parquet 은 pyarrow 필요
+"""
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, "..", "excelProcessor"))
+sys.path.insert(0, os.path.join(HERE, "..", "layers", "roomeya-common", "python"))
+
+# moto 는 자격 증명 / 리전만 있으면 되므로 실제 계정에 접근하지 않도록 가짜 값을 넣어 둠
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3  # noqa: E402
+import openpyxl  # noqa: E402
+
+from synthetic import ROSTER_HEADER, load_distributions, make_roster_rows  # noqa: E402
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto 5 미만 / 미설치
+    mock_aws = None
+
+BUCKET = "roomeya-upload"
+# excelProcessor 가 파일별 처리 요약을 남기는 버킷 (INGEST_SUMMARY_BUCKET 기본값)
+SUMMARY_BUCKET = "roomeya-export"
+
+
+def create_resources():
+    boto3.resource("dynamodb").create_table(
+        TableName="Roomeya-Students",
+        KeySchema=[{"AttributeName": "studentId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "studentId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    for bucket in (BUCKET, SUMMARY_BUCKET):
+        boto3.client("s3").create_bucket(
+            Bucket=bucket,
+            CreateBucketConfiguration={"LocationConstraint": os.environ["AWS_DEFAULT_REGION"]},
+        )
+
+
+def write_roster(path, fmt, rows):
+    if fmt == "xlsx":
+        # write_only 워크북으로 만들어 생성 쪽 메모리도 일정하게 유지
+        wb = openpyxl.Workbook(write_only=True)
+        sheet = wb.create_sheet()
+        sheet.append(ROSTER_HEADER)
+        for row in rows:
+            sheet.append(row)
+        wb.save(path)
+    elif fmt in ("csv", "csv.gz"):
+        opener = gzip.open if fmt == "csv.gz" else open
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(ROSTER_HEADER)
+            writer.writerows(rows)
+    elif fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        columns = list(zip(*rows))
+        pq.write_table(pa.table({name: list(col) for name, col in zip(ROSTER_HEADER, columns)}), path)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+def upload_roster(key, fmt, n, seed_value, distributions):
+    with tempfile.NamedTemporaryFile(suffix="." + fmt) as f:
+        write_roster(f.name, fmt, list(make_roster_rows(n, seed_value, distributions)))
+        size = os.path.getsize(f.name)
+        boto3.client("s3").upload_file(f.name, BUCKET, key)
+    return size
+
+
+def s3_event(key):
+    return {"Records": [{"s3": {"bucket": {"name": BUCKET}, "object": {"key": key}}}]}
+
+
+def run_handler(lambda_function, event, trace_memory, verbose=False):
+    # 핸들러 로그는 --verbose 일 때만 출력
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    if trace_memory:
+        tracemalloc.start()
+    with output:
+        start = time.perf_counter()
+        response = lambda_function.lambda_handler(event, None)
+        elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if response["statusCode"] != 200:
+        raise RuntimeError(f"lambda_handler failed: {response}")
+    return elapsed, peak, json.loads(response["body"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--formats", nargs="+", default=["xlsx", "csv"], help="xlsx / csv / csv.gz / parquet")
+    parser.add_argument("--distributions", default=None, help="항목별 값 분포 JSON 파일")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 측정 실행 생략")
+    parser.add_argument("--verbose", action="store_true", help="lambda_handler 로그 출력")
+    parser.add_argument("--json", default=None, help="결과를 JSON 으로 저장")
+    args = parser.parse_args()
+
+    if mock_aws is None:
+        sys.exit("moto 5 이상이 필요합니다: pip install \"moto[dynamodb,s3]\"")
+
+    distributions = load_distributions(args.distributions)
+    records = []
+
+    print(f"{'n':>7} {'format':>8} {'fileKB':>8} {'total':>8} {'rows/s':>9} {'peakMB':>8} {'saved':>7}")
+
+    with mock_aws():
+        create_resources()
+        # 모듈 수준 boto3 클라이언트가 moto 로 연결되도록 mock 안에서 import
+        import lambda_function
+
+        for n, fmt in [(n, fmt) for n in args.sizes for fmt in args.formats]:
+            key = f"rosters/bench-{n}.{fmt}"
+            size = upload_roster(key, fmt, n, args.seed, distributions)
+
+            elapsed, _, body = run_handler(lambda_function, s3_event(key), False, args.verbose)
+            peak = None
+            if not args.no_memory:
+                _, peak, _ = run_handler(lambda_function, s3_event(key), True, args.verbose)
+
+            record = {
+                "n": n,
+                "format": fmt,
+                "fileKB": round(size / 1024, 1),
+                "total": round(elapsed, 3),
+                "throughput": round(n / elapsed, 1) if elapsed else None,
+                "peakMB": round(peak / 2 ** 20, 1) if peak is not None else None,
+                "saved": body["totalStudents"],
+            }
+            records.append(record)
+
+            peak_text = f"{record['peakMB']:>8.1f}" if peak is not None else f"{'-':>8}"
+            print(f"{n:>7} {fmt:>8} {record['fileKB']:>8.1f} {elapsed:>8.3f} {record['throughput']:>9.1f} "
+                  f"{peak_text} {record['saved']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
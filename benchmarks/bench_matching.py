@@ -0,0 +1,211 @@
+"""matchingProcessor lambda_handler 벤치마크 (moto 로 DynamoDB / S3 를 로컬에서 대체)
+
+가상 응답자(synthetic.py)를 테이블에 넣고 lambda_handler 를 실행해
+단계별 시간(load / score / match / persist / purge), 처리량(응답자/초),
+최대 메모리(tracemalloc), 총 매칭 점수를 출력합니다.
+같은 폼으로 두 번 실행해 첫 실행(cold: DynamoDB 스캔 + 스냅샷 생성)과
+두 번째 실행(warm: 스냅샷 로드)을 함께 봅니다.
+
+메모리는 moto 가 같은 프로세스에 들고 있는 데이터도 포함하므로 실행 간 비교용으로만 봅니다.
+
+    pip install "moto[dynamodb,s3]" numpy
+    python benchmarks/bench_matching.py --sizes 100 1000 10000 50000
+    python benchmarks/bench_matching.py --sizes 1000 --json bench.json
+    python benchmarks/bench_matching.py --sizes 1000 --baseline bench.json   # 느려지거나 점수가 바뀌면 exit 1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, "..", "matchingProcessor"))
+sys.path.insert(0, os.path.join(HERE, "..", "layers", "roomeya-common", "python"))
+
+# moto 는 자격 증명 / 리전만 있으면 되므로 실제 계정에 접근하지 않도록 가짜 값을 넣어 둠
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3  # noqa: E402
+
+from synthetic import load_distributions, make_form_items  # noqa: E402
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto 5 미만 / 미설치
+    mock_aws = None
+
+# 테이블 -> (파티션 키, formId GSI)
+TABLES = {
+    "Roomeya-Forms": ("formId", None),
+    "Roomeya-Students": ("studentId", "formId-index"),
+    "Roomeya-FormResponses": ("responseId", "formId-index"),
+    "Roomeya-Results": ("roomId", "formId-index"),
+}
+BUCKET = "roomeya-export"
+PHASES = ("load", "score", "match", "persist", "purge")
+
+
+def create_resources():
+    dynamodb = boto3.resource("dynamodb")
+    for name, (pk, index) in TABLES.items():
+        params = {
+            "TableName": name,
+            "KeySchema": [{"AttributeName": pk, "KeyType": "HASH"}],
+            "AttributeDefinitions": [{"AttributeName": pk, "AttributeType": "S"}],
+            "BillingMode": "PAY_PER_REQUEST",
+        }
+        if index:
+            params["AttributeDefinitions"].append({"AttributeName": "formId", "AttributeType": "S"})
+            params["GlobalSecondaryIndexes"] = [{
+                "IndexName": index,
+                "KeySchema": [{"AttributeName": "formId", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }]
+        dynamodb.create_table(**params)
+
+    boto3.client("s3").create_bucket(
+        Bucket=BUCKET,
+        CreateBucketConfiguration={"LocationConstraint": os.environ["AWS_DEFAULT_REGION"]},
+    )
+
+
+def seed(form_id, n, seed_value, distributions, response_rate):
+    dynamodb = boto3.resource("dynamodb")
+    students, responses = make_form_items(form_id, n, seed_value, distributions, response_rate)
+    for name, items in (("Roomeya-Students", students), ("Roomeya-FormResponses", responses)):
+        with dynamodb.Table(name).batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    # SubmitForm 이 올리는 completedCount 와 같게 맞춰 두어야 두 번째 실행이 스냅샷을 사용
+    dynamodb.Table("Roomeya-Forms").put_item(Item={
+        "formId": form_id,
+        "title": f"bench {n}",
+        "totalParticipants": len(students),
+        "completedCount": len(responses),
+    })
+    return len(responses)
+
+
+def total_score(form_id):
+    from roomeya_common.dynamo import iter_by_form
+    table = boto3.resource("dynamodb").Table("Roomeya-Results")
+    return sum(int(r["score"]) for r in iter_by_form(table, form_id, ProjectionExpression="score"))
+
+
+def run_handler(lambda_function, event, trace_memory, verbose=False):
+    # 핸들러 로그는 --verbose 일 때만 출력
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    if trace_memory:
+        tracemalloc.start()
+    with output:
+        start = time.perf_counter()
+        response = lambda_function.lambda_handler(event, None)
+        elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if response["statusCode"] != 200:
+        raise RuntimeError(f"lambda_handler failed: {response}")
+    return elapsed, peak, json.loads(response["body"])
+
+
+def compare(records, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["n"], r["run"], r["engine"]): r for r in json.load(f)}
+
+    failures = []
+    for r in records:
+        base = baseline.get((r["n"], r["run"], r["engine"]))
+        if not base:
+            continue
+        if r["score"] != base["score"]:
+            failures.append(f"n={r['n']} {r['run']}: score {base['score']} -> {r['score']}")
+        if r["total"] > base["total"] * (1 + tolerance):
+            failures.append(f"n={r['n']} {r['run']}: total {base['total']:.3f}s -> {r['total']:.3f}s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--engine", default=None, help="MATCH_ENGINE 대신 사용할 엔진 (stream / numpy / profile / loop)")
+    parser.add_argument("--distributions", default=None, help="항목별 값 분포 JSON 파일")
+    parser.add_argument("--response-rate", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 측정 실행 생략")
+    parser.add_argument("--verbose", action="store_true", help="lambda_handler 로그 출력")
+    parser.add_argument("--json", default=None, help="결과를 JSON 으로 저장")
+    parser.add_argument("--baseline", default=None, help="이전 --json 결과와 비교")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용하는 총 시간 증가 비율")
+    args = parser.parse_args()
+
+    if mock_aws is None:
+        sys.exit("moto 5 이상이 필요합니다: pip install \"moto[dynamodb,s3]\"")
+
+    distributions = load_distributions(args.distributions)
+    records = []
+
+    header = f"{'n':>7} {'resp':>7} {'run':>5} " + " ".join(f"{p:>8}" for p in PHASES)
+    print(header + f" {'total':>8} {'resp/s':>9} {'peakMB':>8} {'score':>9}")
+
+    with mock_aws():
+        create_resources()
+        # 모듈 수준 boto3 클라이언트가 moto 로 연결되도록 mock 안에서 import
+        import lambda_function
+
+        for n in args.sizes:
+            form_id = f"bench-{n}"
+            respondents = seed(form_id, n, args.seed, distributions, args.response_rate)
+            event = {"formId": form_id}
+            if args.engine:
+                event["engine"] = args.engine
+
+            for run in ("cold", "warm"):
+                elapsed, _, body = run_handler(lambda_function, event, False, args.verbose)
+                peak = None
+                if not args.no_memory and run == "warm":
+                    _, peak, _ = run_handler(lambda_function, event, True, args.verbose)
+
+                record = {
+                    "n": n,
+                    "respondents": respondents,
+                    "run": run,
+                    "engine": args.engine or lambda_function.DEFAULT_ENGINE,
+                    "timings": body["timings"],
+                    "total": round(elapsed, 3),
+                    "throughput": round(respondents / elapsed, 1) if elapsed else None,
+                    "peakMB": round(peak / 2 ** 20, 1) if peak is not None else None,
+                    "score": total_score(form_id),
+                    "rooms": body["totalRooms"],
+                }
+                records.append(record)
+
+                phases = " ".join(f"{body['timings'].get(p, 0):>8.3f}" for p in PHASES)
+                peak_text = f"{record['peakMB']:>8.1f}" if peak is not None else f"{'-':>8}"
+                print(f"{n:>7} {respondents:>7} {run:>5} {phases} {elapsed:>8.3f} "
+                      f"{record['throughput']:>9.1f} {peak_text} {record['score']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        failures = compare(records, args.baseline, args.tolerance)
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            sys.exit(1)
+        print("✅ No regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
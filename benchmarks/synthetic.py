@@ -0,0 +1,93 @@
+"""벤치마크용 가상 응답자 생성기
+
+항목별 값 분포(가중치)를 바꿔 가며 학생 명부 / 설문 응답을 만듭니다.
+분포는 JSON 파일로 덮어쓸 수 있습니다.
+
+    {"smoking": {"yes": 0.3, "no": 0.7}, "mbti": {"ENFP": 1, "": 1}}
+"""
+import json
+import random
+
+MBTI_TYPES = [
+    a + b + c + d
+    for a in "EI" for b in "NS" for c in "TF" for d in "JP"
+]
+
+# 항목 -> {값: 가중치}. 가중치는 합이 1 이 아니어도 됨
+DEFAULT_DISTRIBUTIONS = {
+    "gender": {"남자": 0.5, "여자": 0.5},
+    "smoking": {"no": 0.85, "yes": 0.15},
+    "wakeup": {"before7": 0.25, "7to9": 0.55, "after9": 0.2},
+    "bedtime": {"before10": 0.1, "10to12": 0.4, "12to2": 0.35, "after2": 0.15},
+    "mbti": dict({t: 0.9 / len(MBTI_TYPES) for t in MBTI_TYPES}, **{"": 0.1}),
+}
+ANSWER_FIELDS = ("smoking", "wakeup", "bedtime", "mbti")
+
+
+def load_distributions(path=None):
+    distributions = {k: dict(v) for k, v in DEFAULT_DISTRIBUTIONS.items()}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            distributions.update(json.load(f))
+    return distributions
+
+
+def _sampler(rnd, weights):
+    values, cum = list(weights), []
+    total = 0.0
+    for v in values:
+        total += weights[v]
+        cum.append(total)
+    return lambda: rnd.choices(values, cum_weights=cum)[0]
+
+
+def make_respondents(n, seed=0, distributions=None):
+    """matchingProcessor 응답자 객체 형태 ({studentId, gender, smoking, wakeup, bedtime, mbti}) 목록"""
+    rnd = random.Random(seed)
+    distributions = distributions or DEFAULT_DISTRIBUTIONS
+    samplers = {field: _sampler(rnd, distributions[field]) for field in ("gender",) + ANSWER_FIELDS}
+    return [
+        dict({"studentId": f"2024{i:06d}"}, **{field: sample() for field, sample in samplers.items()})
+        for i in range(n)
+    ]
+
+
+def make_form_items(form_id, n, seed=0, distributions=None, response_rate=0.9):
+    """(Students 항목 목록, FormResponses 항목 목록) 을 DynamoDB 에 넣을 형태로 만듭니다."""
+    rnd = random.Random(seed + 1)
+    students, responses = [], []
+    for i, r in enumerate(make_respondents(n, seed, distributions)):
+        sid = r["studentId"]
+        students.append({
+            "studentId": sid,
+            "name": f"학생{i}",
+            "gender": r["gender"],
+            "email": f"{sid}@example.com",
+            "formId": form_id,
+            "completed": False,
+        })
+        if rnd.random() >= response_rate:
+            continue
+        students[-1]["completed"] = True
+        responses.append({
+            "responseId": f"{form_id}-r{i:06d}",
+            "formId": form_id,
+            "studentId": sid,
+            "name": f"학생{i}",
+            "answers": {field: r[field] for field in ANSWER_FIELDS},
+            "submittedAt": "2024-01-01T00:00:00",
+        })
+    return students, responses
+
+
+ROSTER_HEADER = ("studentId", "name", "email", "gender")
+
+
+def make_roster_rows(n, seed=0, distributions=None):
+    """excelProcessor 명부 파일의 행 (studentId, name, email, gender) 을 하나씩 반환합니다."""
+    rnd = random.Random(seed)
+    distributions = distributions or DEFAULT_DISTRIBUTIONS
+    sample_gender = _sampler(rnd, distributions["gender"])
+    for i in range(n):
+        sid = f"2024{i:06d}"
+        yield (sid, f"학생{i}", f"{sid}@example.com", sample_gender())
@@ -0,0 +1,113 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import boto3
+from botocore.exceptions import ClientError
+
+from roomeya_common.dynamo import batch_get_items
+from dispatch import backoff
+
+dynamodb = boto3.resource("dynamodb")
+sqs = boto3.client("sqs")
+
+# sendMode "queue": 수신자별 작업을 넣을 SQS 큐 (worker_handler 가 이벤트 소스로 처리)
+EMAIL_QUEUE_URL = os.environ.get("EMAIL_QUEUE_URL", "")
+SQS_BATCH_SIZE = 10
+
+# 학생별 발송 상태 (PK deliveryId = "{formId}#{generation}#{studentId}")
+DELIVERIES_TABLE = os.environ.get("DELIVERIES_TABLE", "Roomeya-EmailDeliveries")
+# "sending" 상태가 이보다 오래되면 작업이 중간에 죽은 것으로 보고 다시 가져감
+EMAIL_CLAIM_TIMEOUT_SEC = int(os.environ.get("EMAIL_CLAIM_TIMEOUT_SEC", "900"))
+
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+# -----------------------------
+#  발송 상태
+# -----------------------------
+def delivery_id(form_id, generation, student_id):
+    return f"{form_id}#{generation or '-'}#{student_id}"
+
+def sent_delivery_ids(ids):
+    """이미 발송한 deliveryId 집합 (재실행 시 큐에 다시 넣지 않기 위함)."""
+    table = dynamodb.Table(DELIVERIES_TABLE)
+    items = batch_get_items(table, "deliveryId", ids, ("status",))
+    return {key for key, item in items.items() if item.get("status") == STATUS_SENT}
+
+def claim_delivery(job):
+    """발송 권한을 조건부 쓰기로 가져옵니다. 이미 보냈거나 다른 작업이 보내는 중이면 False."""
+    table = dynamodb.Table(DELIVERIES_TABLE)
+    now = datetime.utcnow()
+    try:
+        table.put_item(
+            Item={
+                "deliveryId": job["deliveryId"],
+                "formId": job["formId"],
+                "generation": job["generation"] or "-",
+                "studentId": job["studentId"],
+                "email": job["email"],
+                "status": STATUS_SENDING,
+                "claimedAt": now.isoformat(),
+            },
+            ConditionExpression=(
+                "attribute_not_exists(deliveryId) OR #s = :failed OR (#s = :sending AND claimedAt < :stale)"
+            ),
+            ExpressionAttributeNames={"#s": "status"},
+            ExpressionAttributeValues={
+                ":failed": STATUS_FAILED,
+                ":sending": STATUS_SENDING,
+                ":stale": (now - timedelta(seconds=EMAIL_CLAIM_TIMEOUT_SEC)).isoformat(),
+            },
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return False
+        raise
+    return True
+
+def finish_delivery(job, status, detail=None):
+    table = dynamodb.Table(DELIVERIES_TABLE)
+    update = "SET #s = :s, finishedAt = :t, attempts = if_not_exists(attempts, :zero) + :one"
+    values = {":s": status, ":t": datetime.utcnow().isoformat(), ":zero": 0, ":one": 1}
+    if detail:
+        update += ", detail = :d"
+        values[":d"] = detail
+    table.update_item(
+        Key={"deliveryId": job["deliveryId"]},
+        UpdateExpression=update,
+        ExpressionAttributeNames={"#s": "status"},
+        ExpressionAttributeValues=values,
+    )
+
+
+# -----------------------------
+#  SQS
+# -----------------------------
+def enqueue_batch(jobs, retries=3):
+    """작업을 send_message_batch 로 넣고 실패한 작업 수를 반환합니다. (SQS 쪽 일시 오류는 다시 시도)"""
+    pending = {str(i): job for i, job in enumerate(jobs)}
+    failed = 0
+    for attempt in range(retries + 1):
+        response = sqs.send_message_batch(
+            QueueUrl=EMAIL_QUEUE_URL,
+            Entries=[
+                {"Id": entry_id, "MessageBody": json.dumps(job, ensure_ascii=False, default=str)}
+                for entry_id, job in pending.items()
+            ],
+        )
+        failures = response.get("Failed", [])
+        retry = {f["Id"]: pending[f["Id"]] for f in failures if not f.get("SenderFault") and attempt < retries}
+        for failure in failures:
+            if failure["Id"] not in retry:
+                job = pending.get(failure["Id"], {})
+                print(f"❌ Error queueing email for {job.get('studentId')}: "
+                      f"{failure.get('Code')} {failure.get('Message', '')}")
+        failed += len(failures) - len(retry)
+        if not retry:
+            return failed
+        pending = retry
+        time.sleep(backoff(attempt))
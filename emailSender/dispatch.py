@@ -0,0 +1,104 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+# 동시에 SES 를 호출하는 스레드 수
+EMAIL_WORKERS = int(os.environ.get("EMAIL_WORKERS", "8"))
+# 초당 발송 수 상한. 0 이면 계정의 get_send_quota()["MaxSendRate"] 를 사용
+SES_MAX_SEND_RATE = float(os.environ.get("SES_MAX_SEND_RATE", "0"))
+
+# 스로틀링 재시도 (지수 백오프 + 지터)
+SEND_RETRIES = 6
+BACKOFF_BASE_SEC = 0.2
+BACKOFF_MAX_SEC = 10
+
+THROTTLE_CODES = ("Throttling", "ThrottlingException", "TooManyRequestsException")
+# send_bulk_templated_email 의 수신자별 Status 중 다시 보내면 되는 것
+RETRYABLE_STATUSES = ("AccountThrottled", "TransientFailure")
+
+
+# -----------------------------
+#  토큰 버킷 (초당 발송 수 제한)
+# -----------------------------
+class TokenBucket:
+    """초당 rate 개씩 토큰이 차는 버킷. 스레드 간에 공유합니다."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        # 한 번에 버킷보다 많이 필요하면 (bulk 50명 등) 꽉 찰 때까지 기다린 뒤 부족분은 빚으로 남김
+        need = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= need:
+                    self._tokens -= tokens
+                    return
+                wait = (need - self._tokens) / self.rate
+            time.sleep(wait)
+
+def max_send_rate(ses):
+    if SES_MAX_SEND_RATE > 0:
+        return SES_MAX_SEND_RATE
+    try:
+        return float(ses.get_send_quota()["MaxSendRate"]) or 1.0
+    except Exception as e:
+        print(f"⚠️ Send Quota Warning: {str(e)}")
+        return 1.0
+
+
+# -----------------------------
+#  재시도
+# -----------------------------
+def backoff(attempt):
+    return random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+
+def is_throttle(error):
+    # 일일 발송 한도 초과도 Throttling 이지만 기다려도 풀리지 않으므로 재시도하지 않음
+    err = error.response.get("Error", {})
+    return err.get("Code") in THROTTLE_CODES and "daily" not in err.get("Message", "").lower()
+
+def send_with_retry(bucket, cost, send):
+    """토큰 cost 개를 받고 send() 를 호출합니다. 스로틀링이면 백오프 후 다시 시도합니다."""
+    for attempt in range(SEND_RETRIES + 1):
+        bucket.acquire(cost)
+        try:
+            return send()
+        except ClientError as e:
+            if not is_throttle(e) or attempt == SEND_RETRIES:
+                raise
+        time.sleep(backoff(attempt))
+
+
+# -----------------------------
+#  병렬 발송
+# -----------------------------
+def dispatch(tasks, workers=None):
+    """(수신자 수, 작업) 목록을 스레드 풀로 실행하고 (sent, failed) 를 반환합니다.
+
+    작업은 (sent, failed) 를 반환하며, 예외가 나면 그 작업의 수신자는 모두 실패로 셉니다.
+    """
+    def run(task):
+        size, send = task
+        try:
+            return send()
+        except Exception as e:
+            print(f"❌ Error sending email ({size} recipients): {str(e)}")
+            return 0, size
+
+    if not tasks:
+        return 0, 0
+    with ThreadPoolExecutor(max_workers=min(workers or EMAIL_WORKERS, len(tasks))) as pool:
+        results = list(pool.map(run, tasks))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
@@ -1,6 +1,15 @@
 import json
+import os
+import time
 import boto3
-from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from roomeya_common.dynamo import batch_get_items, iter_by_form
+from roomeya_common.results import current_generation, iter_results
+from dispatch import RETRYABLE_STATUSES, SEND_RETRIES, TokenBucket, backoff, dispatch, max_send_rate, send_with_retry
+from delivery import (
+    EMAIL_QUEUE_URL, SQS_BATCH_SIZE, STATUS_FAILED, STATUS_SENT, claim_delivery, delivery_id,
+    enqueue_batch, finish_delivery, sent_delivery_ids
+)
 
 dynamodb = boto3.resource("dynamodb")
 ses = boto3.client("ses")
@@ -8,8 +17,22 @@ ses = boto3.client("ses")
 RESULTS_TABLE = "Roomeya-Results"
 STUDENTS_TABLE = "Roomeya-Students"
 RESPONSES_TABLE = "Roomeya-FormResponses"
+FORMS_TABLE = "Roomeya-Forms"
 
 SENDER_EMAIL = "sjisno1@dongguk.edu"  # SES 인증 이메일
+# 메일 내용에 쓰는 학생 속성
+STUDENT_FIELDS = ("studentId", "name", "email")
+EMAIL_SUBJECT = "🛏 기숙사 매칭 결과 안내"
+
+# single: 학생마다 send_email / bulk: SES 템플릿 + send_bulk_templated_email (호출당 최대 50명)
+# queue: 수신자별 작업을 SQS 에 넣고 worker_handler 가 발송 (학생별 발송 상태로 중복 발송 방지)
+EMAIL_SEND_MODE = os.environ.get("EMAIL_SEND_MODE", "single")
+SES_BULK_SIZE = 50
+TEMPLATE_MATCHED = os.environ.get("SES_TEMPLATE_MATCHED", "RoomeyaMatchingMatched")
+TEMPLATE_UNMATCHED = os.environ.get("SES_TEMPLATE_UNMATCHED", "RoomeyaMatchingUnmatched")
+
+# 웜 컨테이너에서는 템플릿을 다시 등록하지 않음
+_templates_ready = False
 
 
 def lambda_handler(event, context):
@@ -24,15 +47,26 @@ def lambda_handler(event, context):
                 "body": json.dumps({"error": "formId is required"})
             }
 
+        send_mode = body.get("sendMode", EMAIL_SEND_MODE)
+        if send_mode not in ("single", "bulk", "queue"):
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "sendMode must be single, bulk or queue"})
+            }
+        if send_mode == "queue" and not EMAIL_QUEUE_URL:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "EMAIL_QUEUE_URL is not configured"})
+            }
+
         students_table = dynamodb.Table(STUDENTS_TABLE)
         results_table = dynamodb.Table(RESULTS_TABLE)
         responses_table = dynamodb.Table(RESPONSES_TABLE)
+        forms_table = dynamodb.Table(FORMS_TABLE)
 
-        # 1) 매칭 결과 가져오기
-        result_scan = results_table.scan(
-            FilterExpression=Attr("formId").eq(form_id)
-        )
-        match_rooms = result_scan.get("Items", [])
+        # 1) 매칭 결과 가져오기 (폼이 가리키는 현재 세대만)
+        generation = current_generation(forms_table, form_id)
+        match_rooms = iter_results(results_table, form_id, generation)
 
         # roomId → member list 매핑
         room_map = {}
@@ -42,19 +76,26 @@ def lambda_handler(event, context):
                 room_map[sid] = room
 
         # 2) 전체 응답자 조회
-        res = responses_table.scan(
-            FilterExpression=Attr("formId").eq(form_id)
-        )
-        form_responses = res.get("Items", [])
-
-        # 3) 모든 학생에게 이메일 발송
+        form_responses = list(iter_by_form(
+            responses_table, form_id,
+            ProjectionExpression="studentId"
+        ))
+
+        # 응답자 + 룸메이트 정보를 한 번에 조회 (학생마다 get_item 2번 대신)
+        student_ids = [item.get("studentId") for item in form_responses] + list(room_map)
+        students = batch_get_items(students_table, "studentId", student_ids, STUDENT_FIELDS)
+
+        # 3) 모든 학생의 메일 내용 준비 (템플릿 이름 + 템플릿 데이터)
+        messages = []
+        skipped = 0
         for item in form_responses:
             try:
                 student_id = item["studentId"]
 
                 # 학생 정보 조회
-                stu = students_table.get_item(Key={"studentId": student_id}).get("Item")
+                stu = students.get(student_id)
                 if not stu:
+                    skipped += 1
                     continue
 
                 email = stu.get("email")
@@ -68,39 +109,62 @@ def lambda_handler(event, context):
                     partner = [sid for sid in members if sid != student_id]
                     partner_id = partner[0] if partner else None
 
-                    partner_info = None
-                    if partner_id:
-                        partner_info = students_table.get_item(
-                            Key={"studentId": partner_id}
-                        ).get("Item")
+                    partner_info = students.get(partner_id) if partner_id else None
 
-                    html_body = build_html_email_matched(
+                    message = (TEMPLATE_MATCHED, matched_template_data(
                         name=name,
                         room_id=student_room.get("roomId"),
                         score=student_room.get("score", 0),
                         partner_info=partner_info
-                    )
+                    ))
                 else:
                     # 매칭되지 않은 사람
-                    html_body = build_html_email_unmatched(name)
+                    message = (TEMPLATE_UNMATCHED, {"name": name})
 
-                # 이메일 발송
                 if is_dummy_email(email):
                     print(f"⚠️ Skip dummy email: {email}")
+                    skipped += 1
                 else:
-                    send_html_email(
-                        to=email,
-                        subject="🛏 기숙사 매칭 결과 안내",
-                        html_body=html_body
-                    )
+                    messages.append((student_id, email, *message))
 
             except Exception as e:
-                print(f"❌ Error sending email for student {item}: {str(e)}")
+                skipped += 1
+                print(f"❌ Error preparing email for student {item}: {str(e)}")
                 # 계속 진행 (중단되지 않도록)
 
+        # 4-a) 큐에 넣기 (실제 발송은 worker_handler)
+        if send_mode == "queue":
+            queued, failed, already_sent = enqueue_messages(form_id, generation, messages)
+            print(f"📨 Queued {queued}, failed {failed}, already sent {already_sent}, skipped {skipped}")
+            return {
+                "statusCode": 200,
+                "body": json.dumps({
+                    "message": "Email jobs queued",
+                    "queued": queued,
+                    "failed": failed,
+                    "alreadySent": already_sent,
+                    "skipped": skipped
+                })
+            }
+
+        # 4-b) 이메일 발송 (스레드 풀 + 계정 초당 발송 한도의 토큰 버킷)
+        bucket = TokenBucket(max_send_rate(ses))
+        if send_mode == "bulk":
+            ensure_templates()
+            tasks = bulk_tasks(bucket, messages)
+        else:
+            tasks = single_tasks(bucket, messages)
+        sent, failed = dispatch(tasks)
+
+        print(f"📧 Sent {sent}, failed {failed}, skipped {skipped} ({send_mode}, {bucket.rate}/s)")
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "Email process completed"})
+            "body": json.dumps({
+                "message": "Email process completed",
+                "sent": sent,
+                "failed": failed,
+                "skipped": skipped
+            })
         }
 
     except Exception as e:
@@ -112,11 +176,205 @@ def lambda_handler(event, context):
         }
 
 
-def build_html_email_matched(name, room_id, score, partner_info):
-    partner_html = ""
-
+# -----------------------------
+#  발송
+# -----------------------------
+def single_tasks(bucket, messages):
+    def task(email, template, data):
+        def send():
+            send_with_retry(bucket, 1, lambda: send_html_email(
+                to=email, subject=EMAIL_SUBJECT, html_body=render_email(template, data)
+            ))
+            return 1, 0
+        return 1, send
+
+    return [task(email, template, data) for _, email, template, data in messages]
+
+def bulk_tasks(bucket, messages):
+    """템플릿별로 모아 50명씩 send_bulk_templated_email 로 보내는 작업 목록을 만듭니다."""
+    by_template = {}
+    for _, email, template, data in messages:
+        by_template.setdefault(template, []).append((email, data))
+
+    tasks = []
+    for template, recipients in by_template.items():
+        for start in range(0, len(recipients), SES_BULK_SIZE):
+            chunk = recipients[start:start + SES_BULK_SIZE]
+            tasks.append((len(chunk), lambda template=template, chunk=chunk: send_bulk_chunk(bucket, template, chunk)))
+    return tasks
+
+def send_bulk_chunk(bucket, template, chunk):
+    # 수신자별 Status 가 스로틀링 / 일시 오류면 그 수신자만 백오프 후 다시 보냄
+    pending = chunk
+    failed = 0
+    for attempt in range(SEND_RETRIES + 1):
+        response = send_with_retry(bucket, len(pending), lambda: ses.send_bulk_templated_email(
+            Source=SENDER_EMAIL,
+            Template=template,
+            DefaultTemplateData="{}",
+            Destinations=[
+                {
+                    "Destination": {"ToAddresses": [email]},
+                    "ReplacementTemplateData": json.dumps(data, ensure_ascii=False, default=str)
+                }
+                for email, data in pending
+            ]
+        ))
+
+        retry = []
+        for (email, data), status in zip(pending, response.get("Status", [])):
+            code = status.get("Status", "Success")
+            if code == "Success":
+                continue
+            if code in RETRYABLE_STATUSES and attempt < SEND_RETRIES:
+                retry.append((email, data))
+            else:
+                failed += 1
+                print(f"❌ Error sending email to {email}: {code} {status.get('Error', '')}")
+
+        if not retry:
+            break
+        pending = retry
+        time.sleep(backoff(attempt))
+
+    return len(chunk) - failed, failed
+
+
+# -----------------------------
+#  큐 (sendMode "queue")
+# -----------------------------
+def enqueue_messages(form_id, generation, messages):
+    """학생별 작업을 SQS 에 넣고 (queued, failed, alreadySent) 를 반환합니다."""
+    # 같은 학생의 중복 제출은 한 번만, 이미 보낸 학생은 제외 (재실행해도 남은 학생만 큐에 들어감)
+    jobs = {}
+    for student_id, email, template, data in messages:
+        key = delivery_id(form_id, generation, student_id)
+        jobs.setdefault(key, {
+            "deliveryId": key,
+            "formId": form_id,
+            "generation": generation,
+            "studentId": student_id,
+            "email": email,
+            "template": template,
+            "data": data,
+        })
+    already_sent = sent_delivery_ids(list(jobs))
+    pending = [job for key, job in jobs.items() if key not in already_sent]
+
+    def task(batch):
+        def send():
+            failed = enqueue_batch(batch)
+            return len(batch) - failed, failed
+        return len(batch), send
+
+    queued, failed = dispatch([
+        task(pending[start:start + SQS_BATCH_SIZE]) for start in range(0, len(pending), SQS_BATCH_SIZE)
+    ])
+    return queued, failed, len(already_sent)
+
+def worker_handler(event, context):
+    """SQS 이벤트 소스 핸들러. 실패한 메시지만 batchItemFailures 로 돌려 다시 받습니다."""
+    bucket = TokenBucket(max_send_rate(ses))
+    failures = []
+    counts = {"sent": 0, "duplicate": 0, "failed": 0}
+
+    for record in event.get("Records", []):
+        try:
+            job = json.loads(record["body"])
+            # 이미 보냈거나 다른 작업자가 보내는 중이면 건너뜀 (중복 발송 방지)
+            if not claim_delivery(job):
+                counts["duplicate"] += 1
+                continue
+        except Exception as e:
+            print(f"❌ Error reading email job {record.get('messageId')}: {str(e)}")
+            failures.append({"itemIdentifier": record["messageId"]})
+            continue
+
+        try:
+            send_with_retry(bucket, 1, lambda: send_html_email(
+                to=job["email"], subject=EMAIL_SUBJECT, html_body=render_email(job["template"], job["data"])
+            ))
+        except Exception as e:
+            print(f"❌ Error sending email to {job['email']}: {str(e)}")
+            counts["failed"] += 1
+            failures.append({"itemIdentifier": record["messageId"]})
+            try:
+                finish_delivery(job, STATUS_FAILED, str(e))
+            except Exception as e2:
+                print(f"⚠️ Delivery Status Warning: {str(e2)}")
+            continue
+
+        counts["sent"] += 1
+        try:
+            finish_delivery(job, STATUS_SENT)
+        except Exception as e:
+            # 보낸 뒤 상태 기록만 실패: 재시도하면 중복 발송되므로 메시지는 성공 처리
+            print(f"⚠️ Delivery Status Warning: {str(e)}")
+
+    print(f"📧 Worker sent {counts['sent']}, duplicate {counts['duplicate']}, failed {counts['failed']}")
+    return {"batchItemFailures": failures}
+
+
+# -----------------------------
+#  SES 템플릿 (아래 HTML 레이아웃을 그대로 등록)
+# -----------------------------
+def matched_template_data(name, room_id, score, partner_info):
+    data = {"name": name, "roomId": room_id, "score": score}
     if partner_info:
-        partner_html = f"""
+        data["hasPartner"] = True
+        data["partnerName"] = partner_info.get("name")
+        data["partnerStudentId"] = partner_info.get("studentId")
+        data["partnerEmail"] = partner_info.get("email")
+    return data
+
+def render_email(template, data):
+    # single 모드: 템플릿과 같은 레이아웃을 직접 렌더링
+    if template == TEMPLATE_MATCHED:
+        return build_html_email_matched(
+            name=data["name"],
+            room_id=data["roomId"],
+            score=data["score"],
+            partner_info={
+                "name": data["partnerName"],
+                "studentId": data["partnerStudentId"],
+                "email": data["partnerEmail"],
+            } if data.get("hasPartner") else None
+        )
+    return build_html_email_unmatched(data["name"])
+
+def template_contents():
+    # SES 템플릿은 Handlebars 문법 ({{name}}, {{#if hasPartner}}) 으로 수신자별 데이터를 채움
+    partner_html = "{{#if hasPartner}}" + build_partner_html({
+        "name": "{{partnerName}}",
+        "studentId": "{{partnerStudentId}}",
+        "email": "{{partnerEmail}}",
+    }) + "{{/if}}"
+    return {
+        TEMPLATE_MATCHED: build_html_email_matched(
+            name="{{name}}", room_id="{{roomId}}", score="{{score}}",
+            partner_info=None, partner_html=partner_html
+        ),
+        TEMPLATE_UNMATCHED: build_html_email_unmatched("{{name}}"),
+    }
+
+def ensure_templates():
+    global _templates_ready
+    if _templates_ready:
+        return
+
+    for template_name, html in template_contents().items():
+        template = {"TemplateName": template_name, "SubjectPart": EMAIL_SUBJECT, "HtmlPart": html}
+        try:
+            ses.update_template(Template=template)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "TemplateDoesNotExist":
+                raise
+            ses.create_template(Template=template)
+    _templates_ready = True
+
+
+def build_partner_html(partner_info):
+    return f"""
         <p><strong>파트너 정보</strong></p>
         <ul>
             <li>이름: {partner_info.get("name")}</li>
@@ -125,6 +383,11 @@ def build_html_email_matched(name, room_id, score, partner_info):
         </ul>
         """
 
+
+def build_html_email_matched(name, room_id, score, partner_info, partner_html=None):
+    if partner_html is None:
+        partner_html = build_partner_html(partner_info) if partner_info else ""
+
     return f"""
     <html>
     <head>
@@ -0,0 +1,11 @@
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "layers", "roomeya-common", "python"))
+
+# 모듈 수준 boto3 클라이언트 생성에 필요한 리전 / 자격 증명 (실제 계정에는 접근하지 않음)
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
@@ -0,0 +1,103 @@
+"""emailSender bulk 발송: 50명 단위 나누기 / 수신자별 Status 재시도 / 스로틀링 재시도 한도 (SES 스텁)"""
+import pytest
+from botocore.exceptions import ClientError
+
+import dispatch
+import lambda_function
+from dispatch import SEND_RETRIES, TokenBucket
+
+
+class StubSES:
+    """send_bulk_templated_email 호출을 기록하고, 호출마다 수신자별 Status 를 statuses(email, call) 로 정함."""
+
+    def __init__(self, statuses=None, error=None):
+        self.calls = []
+        self.statuses = statuses or (lambda email, call: "Success")
+        self.error = error
+
+    def send_bulk_templated_email(self, **kwargs):
+        emails = [d["Destination"]["ToAddresses"][0] for d in kwargs["Destinations"]]
+        self.calls.append((kwargs["Template"], emails))
+        if self.error:
+            raise self.error
+        call = len(self.calls)
+        return {"Status": [{"Status": self.statuses(email, call)} for email in emails]}
+
+
+def throttling(message="Maximum sending rate exceeded."):
+    return ClientError({"Error": {"Code": "Throttling", "Message": message}}, "SendBulkTemplatedEmail")
+
+
+def messages(count, template):
+    return [(f"s{i}", f"s{i}@example.com", template, {"name": f"학생{i}"}) for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(lambda_function.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(dispatch.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def bucket():
+    return TokenBucket(10000)
+
+
+def test_bulk_tasks_split_each_template_into_50(monkeypatch, bucket):
+    ses = StubSES()
+    monkeypatch.setattr(lambda_function, "ses", ses)
+    batch = messages(120, "Matched") + messages(7, "Unmatched")
+
+    tasks = lambda_function.bulk_tasks(bucket, batch)
+
+    assert [size for size, _ in tasks] == [50, 50, 20, 7]
+    assert dispatch.dispatch(tasks, workers=1) == (127, 0)
+    assert [(template, len(emails)) for template, emails in ses.calls] == [
+        ("Matched", 50), ("Matched", 50), ("Matched", 20), ("Unmatched", 7)
+    ]
+    sent = [email for _, emails in ses.calls for email in emails]
+    assert sorted(sent) == sorted(email for _, email, _, _ in batch)
+
+
+def test_retryable_statuses_are_resent_to_those_recipients_only(monkeypatch, bucket):
+    first = {"s1@example.com": "AccountThrottled", "s2@example.com": "TransientFailure",
+             "s3@example.com": "MessageRejected"}
+    ses = StubSES(statuses=lambda email, call: first.get(email, "Success") if call == 1 else "Success")
+    monkeypatch.setattr(lambda_function, "ses", ses)
+    chunk = [(email, data) for _, email, _, data in messages(5, "Matched")]
+
+    sent, failed = lambda_function.send_bulk_chunk(bucket, "Matched", chunk)
+
+    # 거부(MessageRejected)는 다시 보내도 소용없으므로 실패로 셈
+    assert (sent, failed) == (4, 1)
+    assert len(ses.calls) == 2
+    assert ses.calls[1][1] == ["s1@example.com", "s2@example.com"]
+
+
+def test_retryable_status_gives_up_after_retry_limit(monkeypatch, bucket):
+    ses = StubSES(statuses=lambda email, call: "AccountThrottled" if email == "s0@example.com" else "Success")
+    monkeypatch.setattr(lambda_function, "ses", ses)
+    chunk = [(email, data) for _, email, _, data in messages(3, "Matched")]
+
+    assert lambda_function.send_bulk_chunk(bucket, "Matched", chunk) == (2, 1)
+    assert len(ses.calls) == SEND_RETRIES + 1
+
+
+def test_throttling_gives_up_after_backoff_limit(monkeypatch, bucket):
+    ses = StubSES(error=throttling())
+    monkeypatch.setattr(lambda_function, "ses", ses)
+
+    tasks = lambda_function.bulk_tasks(bucket, messages(60, "Matched"))
+
+    assert dispatch.dispatch(tasks, workers=1) == (0, 60)
+    assert len(ses.calls) == 2 * (SEND_RETRIES + 1)
+
+
+def test_daily_quota_is_not_retried(monkeypatch, bucket):
+    ses = StubSES(error=throttling("Daily message quota exceeded."))
+    monkeypatch.setattr(lambda_function, "ses", ses)
+    chunk = [(email, data) for _, email, _, data in messages(3, "Matched")]
+
+    with pytest.raises(ClientError):
+        lambda_function.send_bulk_chunk(bucket, "Matched", chunk)
+    assert len(ses.calls) == 1
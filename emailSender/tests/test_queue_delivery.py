@@ -0,0 +1,138 @@
+"""emailSender sendMode "queue": 같은 메시지가 다시 와도 한 번만 발송 / 발송 실패는 다시 받을 수 있음
+(SQS 는 메모리 큐, SES 는 스텁, 발송 상태 테이블은 moto)
+"""
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+
+import delivery  # noqa: E402
+import dispatch  # noqa: E402
+import lambda_function  # noqa: E402
+from delivery import DELIVERIES_TABLE, STATUS_FAILED, STATUS_SENDING, STATUS_SENT  # noqa: E402
+
+
+class LocalQueue:
+    """send_message_batch 로 받은 메시지를 쌓아 두고 SQS 이벤트 레코드로 꺼내 주는 큐 대역."""
+
+    def __init__(self):
+        self.messages = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        for entry in Entries:
+            self.messages.append({"messageId": f"m{len(self.messages)}", "body": entry["MessageBody"]})
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+    def event(self, messages=None):
+        return {"Records": list(self.messages if messages is None else messages)}
+
+
+class StubSES:
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = set(fail)
+
+    def get_send_quota(self):
+        return {"MaxSendRate": 1000.0}
+
+    def send_email(self, Source, Destination, Message):
+        to = Destination["ToAddresses"][0]
+        if to in self.fail:
+            self.fail.discard(to)
+            raise ClientError({"Error": {"Code": "MessageRejected", "Message": "rejected"}}, "SendEmail")
+        self.sent.append(to)
+        return {"MessageId": f"id-{len(self.sent)}"}
+
+
+@pytest.fixture(autouse=True)
+def aws(monkeypatch):
+    monkeypatch.setattr(dispatch.time, "sleep", lambda seconds: None)
+    with moto.mock_aws():
+        boto3.resource("dynamodb").create_table(
+            TableName=DELIVERIES_TABLE,
+            KeySchema=[{"AttributeName": "deliveryId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "deliveryId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        monkeypatch.setattr(delivery, "dynamodb", boto3.resource("dynamodb"))
+        yield
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    local = LocalQueue()
+    monkeypatch.setattr(delivery, "sqs", local)
+    return local
+
+
+def use_ses(monkeypatch, ses):
+    monkeypatch.setattr(lambda_function, "ses", ses)
+    return ses
+
+
+def status_of(form_id, student_id):
+    table = boto3.resource("dynamodb").Table(DELIVERIES_TABLE)
+    key = delivery.delivery_id(form_id, "gen-1", student_id)
+    return table.get_item(Key={"deliveryId": key}).get("Item", {}).get("status")
+
+
+def messages(count):
+    return [(f"s{i}", f"s{i}@example.com", "Unmatched", {"name": f"학생{i}"}) for i in range(count)]
+
+
+def test_redelivered_message_is_sent_once(monkeypatch, queue):
+    ses = use_ses(monkeypatch, StubSES())
+    assert lambda_function.enqueue_messages("form-1", "gen-1", messages(3)) == (3, 0, 0)
+
+    first = lambda_function.worker_handler(queue.event(), None)
+    # SQS 는 최소 한 번 전달이므로 같은 메시지가 다시 올 수 있음
+    again = lambda_function.worker_handler(queue.event(queue.messages[:1] * 2), None)
+
+    assert first == {"batchItemFailures": []}
+    assert again == {"batchItemFailures": []}
+    assert sorted(ses.sent) == ["s0@example.com", "s1@example.com", "s2@example.com"]
+    assert status_of("form-1", "s0") == STATUS_SENT
+
+
+def test_rerun_does_not_queue_students_already_sent(monkeypatch, queue):
+    use_ses(monkeypatch, StubSES())
+    lambda_function.enqueue_messages("form-1", "gen-1", messages(3))
+    lambda_function.worker_handler(queue.event(), None)
+
+    queued = len(queue.messages)
+    assert lambda_function.enqueue_messages("form-1", "gen-1", messages(4)) == (1, 0, 3)
+    assert [json.loads(m["body"])["studentId"] for m in queue.messages[queued:]] == ["s3"]
+
+
+def test_failed_send_is_retried_on_redelivery(monkeypatch, queue):
+    ses = use_ses(monkeypatch, StubSES(fail={"s1@example.com"}))
+    lambda_function.enqueue_messages("form-1", "gen-1", messages(2))
+
+    result = lambda_function.worker_handler(queue.event(), None)
+
+    # 실패한 메시지만 돌려 보내고 발송 상태는 failed -> 다시 가져갈 수 있음
+    assert result == {"batchItemFailures": [{"itemIdentifier": queue.messages[1]["messageId"]}]}
+    assert status_of("form-1", "s1") == STATUS_FAILED
+
+    retry = lambda_function.worker_handler(queue.event(queue.messages[1:]), None)
+
+    assert retry == {"batchItemFailures": []}
+    assert ses.sent == ["s0@example.com", "s1@example.com"]
+    assert status_of("form-1", "s1") == STATUS_SENT
+
+
+def test_claim_in_progress_blocks_a_second_worker(monkeypatch, queue):
+    ses = use_ses(monkeypatch, StubSES())
+    lambda_function.enqueue_messages("form-1", "gen-1", messages(1))
+    job = json.loads(queue.messages[0]["body"])
+
+    # 다른 작업자가 가져가 보내는 중 (아직 sent 아님)
+    assert delivery.claim_delivery(job) is True
+    assert status_of("form-1", "s0") == STATUS_SENDING
+
+    assert lambda_function.worker_handler(queue.event(), None) == {"batchItemFailures": []}
+    assert ses.sent == []
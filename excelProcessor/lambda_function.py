@@ -1,72 +1,404 @@
+import codecs
+import csv
+import gzip
 import json
+import os
+import tempfile
+import threading
 import boto3
 import openpyxl
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from urllib.parse import unquote_plus
+from roomeya_common.roster import upsert_students
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # parquet 명부는 pyarrow 레이어가 있을 때만
+    pq = None
 
 s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table("Roomeya-Students")
+lambda_client = boto3.client("lambda")
 
-def lambda_handler(event, context):
-    try:
-        # S3 이벤트 정보 가져오기
-        record = event["Records"][0]
-        bucket = record["s3"]["bucket"]["name"]
-        key = unquote_plus(record["s3"]["object"]["key"])
+STUDENTS_TABLE = "Roomeya-Students"
+_local = threading.local()
 
-        print(f"Processing file: s3://{bucket}/{key}")
+# S3 본문을 이 크기까지는 메모리에, 넘으면 임시 파일에 받음 (xlsx 는 zip 이라 openpyxl 이 seek 해야 함)
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+# 한 번에 batch_writer 로 넘기는 행 수 (이 단위로 진행 상황 출력)
+INGEST_CHUNK = 1000
+PARQUET_BATCH_ROWS = 10000
+# CSV 인코딩 (학사 시스템이 CP949 로 내보내면 cp949 로 설정)
+CSV_ENCODING = os.environ.get("CSV_ENCODING", "utf-8-sig")
 
-        # S3 → /tmp 다운로드  
-        download_path = f"/tmp/{key.split('/')[-1]}"
-        s3.download_file(bucket, key, download_path)
+# 확장자 -> 형식 (긴 것부터 비교)
+ROSTER_EXTENSIONS = (
+    (".csv.gz", "csv.gz"),
+    (".xlsx", "xlsx"),
+    (".csv", "csv"),
+    (".gz", "csv.gz"),
+    (".parquet", "parquet"),
+)
 
-        # Excel 파일 읽기
-        wb = openpyxl.load_workbook(download_path)
-        sheet = wb.active
+# 한 이벤트에 들어온 여러 파일을 동시에 처리하는 스레드 수
+RECORD_WORKERS = int(os.environ.get("RECORD_WORKERS", "4"))
+# 이보다 큰 CSV 는 줄 단위 구간으로 나눠 이 함수를 비동기로 다시 호출해 구간별로 저장 (0 이면 나누지 않음)
+# 줄바꿈으로 구간을 나누므로 따옴표 안에 줄바꿈이 있는 CSV 는 0 으로 설정
+RANGE_SPLIT_BYTES = int(os.environ.get("RANGE_SPLIT_BYTES", str(256 * 1024 * 1024)))
+# 구간 하나의 대략적인 크기 (실제 경계는 줄바꿈에 맞춤)
+RANGE_PART_BYTES = int(os.environ.get("RANGE_PART_BYTES", str(64 * 1024 * 1024)))
+# 헤더(첫 줄)를 찾을 때 읽는 앞부분 크기
+HEADER_PEEK_BYTES = 64 * 1024
+
+# 파일별 처리 요약 (업로드 버킷에 쓰면 S3 이벤트가 다시 발생할 수 있으므로 별도 버킷)
+INGEST_SUMMARY_BUCKET = os.environ.get("INGEST_SUMMARY_BUCKET", "roomeya-export")
+INGEST_SUMMARY_PREFIX = "ingest-jobs"
+# 요약에 남기는 행 수 (전체 / 새 학생 / 내용이 바뀐 학생 / 그대로라 쓰지 않은 학생)
+INGEST_COUNTS = ("totalStudents", "inserted", "updated", "unchanged")
+
+
+# -----------------------------
+#  읽기 (스트리밍)
+# -----------------------------
+def open_s3_body(bucket, key):
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    for chunk in body.iter_chunks(DOWNLOAD_CHUNK_BYTES):
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+def detect_format(bucket, key):
+    lower = key.lower()
+    for ext, fmt in ROSTER_EXTENSIONS:
+        if lower.endswith(ext):
+            return fmt
+
+    # 확장자가 없으면 앞 4바이트로 판단
+    head = s3.get_object(Bucket=bucket, Key=key, Range="bytes=0-3")["Body"].read()
+    if head.startswith(b"PK"):
+        return "xlsx"
+    if head.startswith(b"\x1f\x8b"):
+        return "csv.gz"
+    if head.startswith(b"PAR1"):
+        return "parquet"
+    return "csv"
+
+@contextmanager
+def open_roster_rows(bucket, key, fmt):
+    """형식에 맞는 파서로 명부 행(dict)을 하나씩 반환하는 iterator 를 엽니다."""
+    if fmt in ("csv", "csv.gz"):
+        # CSV 는 seek 이 필요 없으므로 S3 본문을 그대로 읽으면서 파싱
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+        stream = gzip.GzipFile(fileobj=body, mode="rb") if fmt == "csv.gz" else body
+        try:
+            yield iter_csv_rows(codecs.getreader(CSV_ENCODING)(stream))
+        finally:
+            body.close()
+    elif fmt == "parquet":
+        if pq is None:
+            raise ValueError("parquet roster requires pyarrow")
+        with open_s3_body(bucket, key) as fileobj:
+            yield iter_parquet_rows(fileobj)
+    else:
+        with open_s3_body(bucket, key) as fileobj:
+            yield iter_excel_rows(fileobj)
+
+def iter_csv_rows(text, headers=None):
+    # headers 를 주면 (구간 처리) 첫 행부터 데이터
+    reader = csv.reader(text)
+    for row in reader:
+        if headers is None:
+            # 첫 행 = 컬럼명
+            headers = [str(h).strip() for h in row]
+            print("Headers:", headers)
+            continue
+        # 빈 칸은 엑셀과 같이 None
+        yield dict(zip(headers, (value if value != "" else None for value in row)))
+
+def read_csv_headers(bucket, key):
+    """(컬럼명, 첫 데이터 행의 시작 위치) 를 반환합니다. 앞부분에 줄바꿈이 없으면 None."""
+    head = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{HEADER_PEEK_BYTES - 1}")["Body"].read()
+    newline = head.find(b"\n")
+    if newline < 0:
+        return None
+    line = head[:newline + 1].decode(CSV_ENCODING)
+    return [str(h).strip() for h in next(csv.reader([line]))], newline + 1
 
-        headers = []
-        students = []  # 저장할 학생 목록
+def iter_range_lines(bucket, key, start, end):
+    """start 이상 end 미만에서 시작하는 줄을 bytes 로 반환합니다. (마지막 줄은 end 를 넘어서까지 읽음)"""
+    # 앞 구간의 마지막 줄이 이 구간까지 이어질 수 있으므로 1바이트 앞부터 읽고 첫 줄바꿈까지는 버림
+    body = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={start - 1}-")["Body"]
+    try:
+        position = start - 1
+        skip = True
+        pending = b""
+        for chunk in body.iter_chunks(DOWNLOAD_CHUNK_BYTES):
+            pending += chunk
+            begin = 0
+            while True:
+                newline = pending.find(b"\n", begin)
+                if newline < 0:
+                    break
+                line = pending[begin:newline + 1]
+                begin = newline + 1
+                if not skip:
+                    yield line
+                skip = False
+                position += len(line)
+                if position >= end:
+                    return
+            pending = pending[begin:]
+        # 파일 끝에 줄바꿈이 없는 마지막 줄
+        if pending and not skip:
+            yield pending
+    finally:
+        body.close()
+
+def iter_parquet_rows(fileobj):
+    parquet = pq.ParquetFile(fileobj)
+    print("Headers:", parquet.schema_arrow.names)
+    for batch in parquet.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        yield from batch.to_pylist()
+
+def iter_excel_rows(fileobj):
+    """첫 행을 컬럼명으로 보고 이후 행을 dict 로 하나씩 반환합니다.
 
-        for i, row in enumerate(sheet.iter_rows(values_only=True)):
-            if i == 0:
+    read_only 모드는 시트 전체 객체를 만들지 않고 XML 을 읽는 대로 행을 넘겨 줍니다.
+    """
+    wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        sheet = wb.active
+        headers = None
+        for row in sheet.iter_rows(values_only=True):
+            if headers is None:
                 # 첫 행 = 컬럼명
                 headers = [str(h).strip() for h in row]
                 print("Headers:", headers)
-            else:
-                # 그 이후 = 학생 데이터 행
-                row_data = dict(zip(headers, row))
+                continue
+            yield dict(zip(headers, row))
+    finally:
+        wb.close()
+
+
+# -----------------------------
+#  저장
+# -----------------------------
+def iter_students(rows, key, created_at):
+    for row_data in rows:
+        # 빈 행은 스킵
+        if not row_data.get("studentId"):
+            continue
+
+        yield {
+            "studentId": str(row_data.get("studentId")),
+            "name": row_data.get("name"),
+            "email": row_data.get("email"),
+            "gender": row_data.get("gender"),
+            "createdAt": created_at,
+            "sourceFile": key
+        }
+
+def write_students(items):
+    counts = dict.fromkeys(INGEST_COUNTS, 0)
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= INGEST_CHUNK:
+            add_counts(counts, flush_students(chunk))
+            chunk = []
+    if chunk:
+        add_counts(counts, flush_students(chunk))
+    return counts
+
+def add_counts(counts, more):
+    for name in INGEST_COUNTS:
+        counts[name] += more.get(name, 0)
+
+def students_table():
+    # boto3 resource 는 스레드 간에 공유하면 안 되므로 파일 처리 스레드마다 하나씩
+    if not hasattr(_local, "table"):
+        _local.table = boto3.session.Session().resource("dynamodb").Table(STUDENTS_TABLE)
+    return _local.table
 
-                # 빈 행은 스킵
-                if not row_data.get("studentId"):
-                    continue
+def flush_students(chunk):
+    # 저장된 내용 해시와 비교해 새 학생 / 바뀐 학생만 속성 단위로 씀 (createdAt / formId / completed 유지)
+    # 같은 파일 안의 중복 학번은 마지막 행이 남음 (기존 put_item 순서와 동일)
+    counts = upsert_students(students_table(), chunk)
+    print(f"Saved {len(chunk)} students (inserted {counts['inserted']}, "
+          f"updated {counts['updated']}, unchanged {counts['unchanged']})")
+    return dict(counts, totalStudents=len(chunk))
 
-                students.append(row_data)
 
-        print("Parsed students:", students)
+# -----------------------------
+#  처리 요약 (ingest-jobs/{bucket}/{key}/{ETag}/)
+# -----------------------------
+def summary_prefix(job):
+    return f"{INGEST_SUMMARY_PREFIX}/{job['bucket']}/{job['key']}/{job['run']}"
 
-        # DynamoDB 저장
-        for stu in students:
-            item = {
-                "studentId": str(stu.get("studentId")),
-                "name": stu.get("name"),
-                "email": stu.get("email"),
-                "gender": stu.get("gender"),
-                "createdAt": datetime.utcnow().isoformat(),
-                "sourceFile": key
-            }
+def put_summary(key, data):
+    s3.put_object(
+        Bucket=INGEST_SUMMARY_BUCKET, Key=key,
+        Body=json.dumps(data, ensure_ascii=False).encode("utf-8"), ContentType="application/json"
+    )
+
+def list_part_summaries(job):
+    keys = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=INGEST_SUMMARY_BUCKET, Prefix=summary_prefix(job) + "/part-"):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    return keys
+
+def finish_part(job, part, counts):
+    """구간 결과를 저장하고, 모든 구간이 끝났으면 파일 요약(summary.json)을 만들어 반환합니다."""
+    prefix = summary_prefix(job)
+    finished_at = datetime.utcnow().isoformat()
+    try:
+        put_summary(f"{prefix}/part-{part:04d}.json", dict(counts, part=part, finishedAt=finished_at))
+
+        # 마지막으로 끝난 구간이 요약을 씀 (동시에 끝나 두 번 써도 내용은 같음)
+        keys = list_part_summaries(job)
+        if len(keys) < job["parts"]:
+            return None
+        if job["parts"] > 1:
+            counts = dict.fromkeys(INGEST_COUNTS, 0)
+            for k in keys:
+                add_counts(counts, json.loads(s3.get_object(Bucket=INGEST_SUMMARY_BUCKET, Key=k)["Body"].read()))
+        summary = {
+            "bucket": job["bucket"],
+            "key": job["key"],
+            "format": job["format"],
+            "parts": job["parts"],
+            **{name: counts[name] for name in INGEST_COUNTS},
+            "createdAt": job["createdAt"],
+            "finishedAt": finished_at,
+        }
+        put_summary(f"{prefix}/summary.json", summary)
+        print(f"✅ Ingest finished: s3://{job['bucket']}/{job['key']} ({counts['totalStudents']} students, {job['parts']} parts)")
+        return summary
+    except Exception as e:
+        # 학생 저장은 끝났으므로 요약 실패로 재시도하지 않음
+        print(f"⚠️ Ingest Summary Warning: {str(e)}")
+        return None
+
+
+# -----------------------------
+#  구간 분할 (큰 CSV)
+# -----------------------------
+def plan_ranges(job, size, context):
+    """구간 [(start, end)] 목록. 나누지 않을 파일이면 None."""
+    if job["format"] != "csv" or RANGE_SPLIT_BYTES <= 0 or size <= RANGE_SPLIT_BYTES:
+        return None
+    # 구간 작업은 이 함수를 다시 호출해야 하므로 Lambda 밖 (로컬 실행) 에서는 한 번에 처리
+    if not hasattr(context, "function_name"):
+        return None
+    header = read_csv_headers(job["bucket"], job["key"])
+    if header is None:
+        return None
+    job["headers"], data_start = header
+    part_bytes = max(RANGE_PART_BYTES, 1)
+    return [(start, min(start + part_bytes, size)) for start in range(data_start, size, part_bytes)]
+
+def dispatch_ranges(job, ranges, context):
+    job["parts"] = len(ranges)
+    for part, (start, end) in enumerate(ranges):
+        lambda_client.invoke(
+            FunctionName=context.function_name,
+            InvocationType="Event",
+            Payload=json.dumps(dict(job, action="ingestRange", part=part, start=start, end=end)).encode("utf-8"),
+        )
+    print(f"Dispatched {len(ranges)} range workers for s3://{job['bucket']}/{job['key']}")
+
+def ingest_range(event):
+    # 헤더는 원래 호출이 읽어서 넘겨 줌. 중복 학번이 다른 구간에 있으면 어느 쪽이 남을지는 보장하지 않음
+    print(f"Processing range {event['part'] + 1}/{event['parts']} of s3://{event['bucket']}/{event['key']}"
+          f" (bytes {event['start']}-{event['end']})")
+    lines = iter_range_lines(event["bucket"], event["key"], event["start"], event["end"])
+    rows = iter_csv_rows((line.decode(CSV_ENCODING) for line in lines), event["headers"])
+    counts = write_students(iter_students(rows, event["key"], event["createdAt"]))
+    print(f"Range students saved: {counts['totalStudents']}")
+
+    summary = finish_part(event, event["part"], counts)
+    return {
+        "statusCode": 200,
+        "body": json.dumps(dict(counts, part=event["part"], summary=summary), ensure_ascii=False)
+    }
+
+
+# -----------------------------
+#  파일 처리
+# -----------------------------
+def ingest_file(bucket, key, context):
+    print(f"Processing file: s3://{bucket}/{key}")
+
+    # 같은 키로 다시 올린 파일은 ETag 가 달라 요약도 따로 남음
+    head = s3.head_object(Bucket=bucket, Key=key)
+    job = {
+        "bucket": bucket,
+        "key": key,
+        "run": head["ETag"].strip('"'),
+        "format": detect_format(bucket, key),
+        "createdAt": datetime.utcnow().isoformat(),
+        "parts": 1,
+    }
+
+    ranges = plan_ranges(job, head["ContentLength"], context)
+    if ranges:
+        dispatch_ranges(job, ranges, context)
+        return {"key": key, "format": job["format"], "status": "dispatched", "parts": job["parts"]}
+
+    # 형식(xlsx / csv / csv.gz / parquet)에 맞는 파서로 행 단위로 읽으면서 바로 저장
+    # (전체 학생 목록을 메모리에 두지 않음)
+    with open_roster_rows(bucket, key, job["format"]) as rows:
+        counts = write_students(iter_students(rows, key, job["createdAt"]))
+
+    print(f"Total students saved: {counts['totalStudents']} ({job['format']})")
+    finish_part(job, 0, counts)
+    return dict(counts, key=key, format=job["format"], status="completed")
+
+def ingest_files(files, context):
+    """(bucket, key) 목록을 동시에 처리합니다. 실패한 파일이 있으면 나머지를 끝낸 뒤 첫 오류를 다시 던짐."""
+    def run(file):
+        try:
+            return ingest_file(file[0], file[1], context), None
+        except Exception as e:
+            print(f"❌ Error processing s3://{file[0]}/{file[1]}: {str(e)}")
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(RECORD_WORKERS, len(files)))) as pool:
+        outcomes = list(pool.map(run, files))
+
+    errors = [error for _, error in outcomes if error is not None]
+    if errors:
+        # S3 비동기 호출 재시도 시 성공한 파일도 다시 저장되지만 같은 레코드를 덮어쓰므로 무해
+        raise errors[0]
+    return [result for result, _ in outcomes]
+
+
+def lambda_handler(event, context):
+    try:
+        # dispatch_ranges 가 보낸 구간 작업
+        if event.get("action") == "ingestRange":
+            return ingest_range(event)
 
-            print("Saving student:", item)
-            table.put_item(Item=item)
+        # S3 이벤트의 모든 레코드
+        files = [
+            (record["s3"]["bucket"]["name"], unquote_plus(record["s3"]["object"]["key"]))
+            for record in event["Records"]
+        ]
+        results = ingest_files(files, context)
 
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "message": "Student Excel processed successfully",
-                "totalStudents": len(students)
+                "totalStudents": sum(r.get("totalStudents", 0) for r in results),
+                "files": results
             })
         }
 
     except Exception as e:
         print("Error:", e)
-        raise e
\ No newline at end of file
+        raise e
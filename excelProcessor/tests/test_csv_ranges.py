@@ -0,0 +1,145 @@
+"""excelProcessor 큰 CSV 구간 분할: 구간별로 읽은 행을 이으면 파일 전체를 한 번에 파싱한 것과 같은지 (S3 는 moto)"""
+import importlib.util
+import json
+import os
+import threading
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+
+# 다른 함수의 lambda_function 과 섞이지 않도록 다른 이름으로 불러옴
+spec = importlib.util.spec_from_file_location(
+    "excel_lambda", os.path.join(os.path.dirname(__file__), "..", "lambda_function.py")
+)
+excel_lambda = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(excel_lambda)
+
+BUCKET = "roomeya-upload"
+SUMMARY_BUCKET = "roomeya-export"
+
+
+class Context:
+    function_name = "excelProcessor"
+
+
+class LocalLambda:
+    """비동기 invoke 로 받은 구간 작업을 쌓아 두었다가 순서대로 실행하는 Lambda 대역."""
+
+    def __init__(self):
+        self.payloads = []
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        self.payloads.append(json.loads(Payload))
+
+    def run_all(self):
+        return [excel_lambda.lambda_handler(payload, Context()) for payload in self.payloads]
+
+
+def roster_csv(rows, newline="\n", trailing=True):
+    lines = ["studentId,name,email,gender"]
+    for i in range(rows):
+        email = "" if i % 9 == 0 else f"s{i}@example.com"
+        name = f"\"김, 학생{i}\"" if i % 11 == 0 else f"학생{i}"
+        lines.append(f"2024{i:05d},{name},{email},{'남자' if i % 2 else '여자'}")
+    text = newline.join(lines) + (newline if trailing else "")
+    return text.encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def aws(monkeypatch):
+    with moto.mock_aws():
+        s3 = boto3.client("s3")
+        for bucket in (BUCKET, SUMMARY_BUCKET):
+            s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": "ap-northeast-2"})
+        boto3.resource("dynamodb").create_table(
+            TableName=excel_lambda.STUDENTS_TABLE,
+            KeySchema=[{"AttributeName": "studentId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "studentId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        # 모듈 수준 클라이언트 / 스레드별 테이블은 mock 밖에서 만들어졌으므로 바꿔 끼움
+        monkeypatch.setattr(excel_lambda, "s3", s3)
+        monkeypatch.setattr(excel_lambda, "_local", threading.local())
+        yield s3
+
+
+def upload(s3, key, body):
+    s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def full_parse(key):
+    with excel_lambda.open_roster_rows(BUCKET, key, "csv") as rows:
+        return list(rows)
+
+
+def ranged_parse(key, size, part_bytes, monkeypatch):
+    monkeypatch.setattr(excel_lambda, "RANGE_SPLIT_BYTES", 1)
+    monkeypatch.setattr(excel_lambda, "RANGE_PART_BYTES", part_bytes)
+    job = {"bucket": BUCKET, "key": key, "format": "csv"}
+    ranges = excel_lambda.plan_ranges(job, size, Context())
+
+    rows = []
+    for start, end in ranges:
+        lines = excel_lambda.iter_range_lines(BUCKET, key, start, end)
+        rows.extend(excel_lambda.iter_csv_rows((line.decode("utf-8-sig") for line in lines), job["headers"]))
+    return ranges, rows
+
+
+# 구간이 작을수록 구간 수(= S3 요청 수)가 늘어나므로 행 수를 줄임
+@pytest.mark.parametrize("part_bytes, count", [(1, 6), (7, 20), (40, 60), (333, 60), (4096, 60), (10 ** 9, 60)])
+@pytest.mark.parametrize("newline, trailing", [("\n", True), ("\r\n", True), ("\n", False)])
+def test_ranges_match_full_parse(aws, monkeypatch, part_bytes, count, newline, trailing):
+    body = roster_csv(count, newline, trailing)
+    upload(aws, "roster.csv", body)
+
+    ranges, rows = ranged_parse("roster.csv", len(body), part_bytes, monkeypatch)
+
+    assert rows == full_parse("roster.csv")
+    assert len(rows) == count
+    # 구간은 겹치지 않고 헤더 다음부터 파일 끝까지 이어짐
+    assert ranges[-1][1] == len(body)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_ranges_match_full_parse_with_bom_and_multibyte_boundaries(aws, monkeypatch):
+    # 구간 경계가 한글(3바이트) 중간에 떨어져도 줄 단위로 읽으므로 깨지지 않음
+    body = "\ufeff".encode("utf-8") + roster_csv(12)
+    upload(aws, "bom.csv", body)
+
+    for part_bytes in (2, 5, 13):
+        _, rows = ranged_parse("bom.csv", len(body), part_bytes, monkeypatch)
+        assert rows == full_parse("bom.csv")
+
+
+def test_dispatched_ranges_store_the_same_students(aws, monkeypatch):
+    body = roster_csv(120)
+    upload(aws, "big.csv", body)
+    upload(aws, "small.csv", roster_csv(120))
+    local = LocalLambda()
+    monkeypatch.setattr(excel_lambda, "lambda_client", local)
+    monkeypatch.setattr(excel_lambda, "RANGE_SPLIT_BYTES", 1000)
+    monkeypatch.setattr(excel_lambda, "RANGE_PART_BYTES", 500)
+
+    event = {"Records": [{"s3": {"bucket": {"name": BUCKET}, "object": {"key": "big.csv"}}}]}
+    result = json.loads(excel_lambda.lambda_handler(event, Context())["body"])
+    assert result["files"][0]["status"] == "dispatched"
+    parts = result["files"][0]["parts"]
+    assert parts == len(local.payloads) > 1
+
+    local.run_all()
+
+    table = boto3.resource("dynamodb").Table(excel_lambda.STUDENTS_TABLE)
+    stored = {item["studentId"]: item for item in table.scan()["Items"]}
+    expected = full_parse("small.csv")
+    assert sorted(stored) == sorted(row["studentId"] for row in expected)
+    for row in expected:
+        item = stored[row["studentId"]]
+        assert (item["name"], item.get("email"), item["gender"]) == (row["name"], row["email"], row["gender"])
+
+    etag = aws.head_object(Bucket=BUCKET, Key="big.csv")["ETag"].strip('"')
+    summary_key = f"{excel_lambda.INGEST_SUMMARY_PREFIX}/{BUCKET}/big.csv/{etag}/summary.json"
+    summary = json.loads(aws.get_object(Bucket=SUMMARY_BUCKET, Key=summary_key)["Body"].read())
+    assert (summary["parts"], summary["totalStudents"], summary["inserted"]) == (parts, 120, 120)
@@ -1,6 +1,7 @@
 import json
 import boto3
 from decimal import Decimal
+from roomeya_common.dynamo import iter_scan
 
 dynamodb = boto3.resource("dynamodb")
 form_table = dynamodb.Table("Roomeya-Forms")
@@ -18,9 +19,8 @@ def convert_decimal(obj):
 
 def lambda_handler(event, context):
     try:
-        # 전체 폼 조회 (Scan)
-        response = form_table.scan()
-        items = response.get("Items", [])
+        # 전체 폼 조회 (Scan, 전체 페이지)
+        items = iter_scan(form_table)
 
         results = []
 
@@ -0,0 +1 @@
+"""Roomeya Lambda 함수들이 함께 쓰는 공통 모듈 (Lambda Layer 로 배포)."""
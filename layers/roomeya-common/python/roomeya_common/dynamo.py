@@ -0,0 +1,229 @@
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+# TotalSegments 기본값. 1 이면 순차 스캔, 2 이상이면 세그먼트별 스레드 병렬 스캔
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "1"))
+# 병렬 스캔 시 소비자보다 앞서 읽어 둘 최대 페이지 수 (메모리 상한)
+SCAN_BUFFER_PAGES = 8
+
+# Roomeya-Results / Roomeya-FormResponses / Roomeya-Students 의 formId GSI 이름
+FORM_ID_INDEX = os.environ.get("FORM_ID_INDEX", "formId-index")
+
+# BatchGetItem 한 번에 요청할 수 있는 최대 키 수 / 동시에 보낼 요청 수
+BATCH_GET_SIZE = 100
+BATCH_GET_WORKERS = int(os.environ.get("BATCH_GET_WORKERS", "8"))
+# UnprocessedKeys 재시도 횟수 (지수 백오프 + 지터)
+BATCH_GET_RETRIES = 8
+
+# 인덱스가 없는 테이블은 웜 컨테이너에서 다시 query 를 시도하지 않음
+_missing_indexes = set()
+
+
+# -----------------------------
+#  페이지네이션
+# -----------------------------
+def iter_pages(method, **kwargs):
+    """scan / query 를 LastEvaluatedKey 가 없을 때까지 이어서 호출하며 응답 페이지를 반환합니다."""
+    while True:
+        response = method(**kwargs)
+        yield response
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+# -----------------------------
+#  스캔 (순차 / 병렬 세그먼트)
+# -----------------------------
+def iter_scan(table, segments=None, **kwargs):
+    """테이블 전체를 스캔하며 아이템을 하나씩 반환합니다 (1MB 페이지 제한 없이 끝까지).
+
+    segments >= 2 이면 Segment/TotalSegments 로 나눠 스레드마다 병렬로 읽습니다.
+    이 경우 아이템 순서는 보장되지 않습니다.
+    """
+    segments = segments or SCAN_SEGMENTS
+    if segments <= 1:
+        for page in iter_pages(table.scan, **kwargs):
+            yield from page.get("Items", [])
+        return
+
+    yield from _iter_parallel_scan(table, segments, kwargs)
+
+def _thread_table(table):
+    # boto3 resource 는 스레드 간 공유가 안전하지 않으므로 스레드마다 세션을 새로 만듦
+    session = boto3.session.Session()
+    resource = session.resource("dynamodb", region_name=table.meta.client.meta.region_name)
+    return resource.Table(table.name)
+
+def _iter_parallel_scan(table, segments, kwargs):
+    pages = queue.Queue(maxsize=SCAN_BUFFER_PAGES)
+    stop = threading.Event()
+
+    def worker(segment):
+        try:
+            segment_table = _thread_table(table)
+            for page in iter_pages(segment_table.scan, Segment=segment, TotalSegments=segments, **kwargs):
+                if stop.is_set():
+                    return
+                pages.put(("items", page.get("Items", [])))
+        except Exception as e:
+            pages.put(("error", e))
+        finally:
+            pages.put(("done", None))
+
+    threads = [threading.Thread(target=worker, args=(s,), daemon=True) for s in range(segments)]
+    for t in threads:
+        t.start()
+
+    try:
+        finished = 0
+        while finished < segments:
+            kind, value = pages.get()
+            if kind == "done":
+                finished += 1
+            elif kind == "error":
+                raise value
+            else:
+                yield from value
+    finally:
+        # 소비자가 중간에 멈춰도 put 에서 막힌 스레드가 끝날 수 있도록 큐를 비움
+        stop.set()
+        while any(t.is_alive() for t in threads):
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+# -----------------------------
+#  formId 기준 조회 (GSI query, 없으면 scan)
+# -----------------------------
+def _is_missing_index(error):
+    # DynamoDB: ValidationException "...does not have the specified index"
+    # DynamoDB Local / moto: ResourceNotFoundException "Invalid index: ..."
+    err = error.response.get("Error", {})
+    return (err.get("Code") in ("ValidationException", "ResourceNotFoundException") and
+            "index" in err.get("Message", "").lower())
+
+def iter_by_form(table, form_id, index_name=None, **kwargs):
+    """formId 가 같은 아이템을 하나씩 반환합니다.
+
+    formId GSI 가 있으면 query 로 해당 폼의 아이템만 읽고,
+    인덱스가 없으면 기존처럼 FilterExpression scan 으로 대체합니다.
+    kwargs 의 FilterExpression / ProjectionExpression 등은 두 경로에 모두 적용됩니다.
+    """
+    index_name = index_name or FORM_ID_INDEX
+    cache_key = (table.name, index_name)
+
+    if cache_key not in _missing_indexes:
+        pages = iter_pages(
+            table.query,
+            IndexName=index_name,
+            KeyConditionExpression=Key("formId").eq(form_id),
+            **kwargs
+        )
+        try:
+            first = next(pages)
+        except ClientError as e:
+            if not _is_missing_index(e):
+                raise
+            print(f"⚠️ {table.name} has no {index_name}; falling back to scan")
+            _missing_indexes.add(cache_key)
+        else:
+            yield from first.get("Items", [])
+            for page in pages:
+                yield from page.get("Items", [])
+            return
+
+    condition = Attr("formId").eq(form_id)
+    if "FilterExpression" in kwargs:
+        condition = condition & kwargs.pop("FilterExpression")
+    yield from iter_scan(table, FilterExpression=condition, **kwargs)
+
+def query_index_page(table, index_name, key_name, value, limit, start_key=None, **kwargs):
+    """인덱스에서 key_name = value 인 아이템을 limit 개까지 읽어 (아이템, LastEvaluatedKey) 를 반환합니다.
+
+    인덱스가 없으면 None 을 반환하므로 호출한 쪽에서 다른 경로로 대체해야 합니다.
+    """
+    cache_key = (table.name, index_name)
+    if cache_key in _missing_indexes:
+        return None
+
+    params = dict(kwargs, IndexName=index_name, KeyConditionExpression=Key(key_name).eq(value), Limit=limit)
+    if start_key:
+        params["ExclusiveStartKey"] = start_key
+    try:
+        response = table.query(**params)
+    except ClientError as e:
+        if not _is_missing_index(e):
+            raise
+        print(f"⚠️ {table.name} has no {index_name}")
+        _missing_indexes.add(cache_key)
+        return None
+    return response.get("Items", []), response.get("LastEvaluatedKey")
+
+
+# -----------------------------
+#  키 목록 일괄 조회 (BatchGetItem)
+# -----------------------------
+def _batch_get_chunk(table, keys, request, strict=False):
+    # resource 의 client 는 스레드 간 공유해도 안전하고 값도 파이썬 타입으로 변환됨
+    client = table.meta.client
+    items = []
+    pending = {table.name: dict(request, Keys=keys)}
+    for attempt in range(BATCH_GET_RETRIES + 1):
+        response = client.batch_get_item(RequestItems=pending)
+        items.extend(response.get("Responses", {}).get(table.name, []))
+
+        pending = response.get("UnprocessedKeys") or {}
+        if not pending:
+            return items
+        if attempt < BATCH_GET_RETRIES:
+            time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+
+    left = len(pending[table.name]["Keys"])
+    if strict:
+        raise RuntimeError(f"{table.name}: {left} keys still unprocessed after {BATCH_GET_RETRIES} retries")
+    print(f"⚠️ {table.name}: {left} keys still unprocessed after {BATCH_GET_RETRIES} retries")
+    return items
+
+def batch_get_items(table, key_name, values, fields=None, max_workers=None, strict=False, consistent=False):
+    """values 의 중복을 없애고 100 개씩 BatchGetItem 으로 동시에 읽어 {키 값: 아이템} 을 반환합니다.
+
+    fields 를 주면 그 속성만 읽습니다. (key_name 은 항상 포함)
+    재시도 후에도 처리되지 않았거나 없는 키는 결과에 들어가지 않습니다.
+    strict 면 처리되지 않은 키가 남았을 때 예외를 던집니다. (없는 키와 구별해야 할 때)
+    consistent 면 강한 일관성 읽기 (방금 쓴 아이템도 보임, 읽기 용량 2배)
+    """
+    unique = list(dict.fromkeys(v for v in values if v is not None))
+    if not unique:
+        return {}
+
+    request = {"ConsistentRead": True} if consistent else {}
+    if fields:
+        names = {f"#f{i}": name for i, name in enumerate(dict.fromkeys((key_name,) + tuple(fields)))}
+        request["ProjectionExpression"] = ", ".join(names)
+        request["ExpressionAttributeNames"] = names
+
+    chunks = [
+        [{key_name: v} for v in unique[start:start + BATCH_GET_SIZE]]
+        for start in range(0, len(unique), BATCH_GET_SIZE)
+    ]
+    workers = min(max_workers or BATCH_GET_WORKERS, len(chunks))
+    if workers <= 1:
+        results = [_batch_get_chunk(table, chunk, request, strict) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda chunk: _batch_get_chunk(table, chunk, request, strict), chunks))
+
+    return {item[key_name]: item for items in results for item in items}
@@ -0,0 +1,210 @@
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from roomeya_common.dynamo import batch_get_items, iter_by_form
+
+s3 = boto3.client("s3")
+
+# Roomeya-Forms 에서 현재 매칭 결과 세대를 가리키는 속성
+GENERATION_ATTR = "resultGeneration"
+
+# 0 보다 크면 결과 아이템에 expiresAt(TTL) 을 넣고, 지난 세대는 삭제하지 않고 TTL 에 맡김
+# (Roomeya-Results 테이블의 TTL 속성을 expiresAt 으로 설정해야 함. 현재 세대도 이 기간이 지나면 사라짐)
+# 0 이면 재매칭마다 지난 세대의 방을 하나씩 지우므로 쓰기 비용은 줄지 않음
+RESULT_TTL_DAYS = int(os.environ.get("RESULT_TTL_DAYS", "0"))
+
+# 세대별 결과 문서 (matchingResult 가 그대로 내려주는 방 목록, gzip JSON)
+RESULT_DOCUMENT_BUCKET = os.environ.get("RESULT_DOCUMENT_BUCKET", "roomeya-export")
+RESULT_DOCUMENT_PREFIX = "result-documents"
+
+# 프론트엔드가 방 카드에 표시하는 학생 속성
+RESULT_MEMBER_FIELDS = ("studentId", "name", "gender", "email")
+
+# 방 아이템의 "{formId}#{generation}#{male|female}" 속성과 그 GSI (정렬 키 roomId -> 방 번호순 페이지 조회)
+FORM_GENDER_ATTR = "formGender"
+FORM_GENDER_INDEX = os.environ.get("FORM_GENDER_INDEX", "formGender-roomId-index")
+
+
+# -----------------------------
+#  세대 (generation)
+# -----------------------------
+def new_generation():
+    # 시간순으로 정렬되고 "_" 가 없어야 roomId("{formId}_{gen}_room-0001") 의 마지막 조각이 방 번호로 남음
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+
+def current_generation(forms_table, form_id):
+    item = forms_table.get_item(
+        Key={"formId": form_id}, ProjectionExpression=GENERATION_ATTR
+    ).get("Item", {})
+    return item.get(GENERATION_ATTR)
+
+def generation_filter(generation):
+    # 세대 포인터가 없던 폼은 세대 속성이 없는 기존 결과만 보여 줌
+    if generation:
+        return Attr("generation").eq(generation)
+    return Attr("generation").not_exists()
+
+def iter_results(results_table, form_id, generation, **kwargs):
+    """현재 세대의 방만 반환합니다. (작성 중이거나 지난 세대의 방은 제외)"""
+    condition = generation_filter(generation)
+    if "FilterExpression" in kwargs:
+        condition = condition & kwargs.pop("FilterExpression")
+    return iter_by_form(results_table, form_id, FilterExpression=condition, **kwargs)
+
+
+# -----------------------------
+#  세대 전환 / 정리
+# -----------------------------
+def missing_room_ids(results_table, room_ids):
+    """room_ids 중 테이블에 없는 roomId 목록.
+
+    formId GSI 는 최종 일관성이라 방금 쓴 방이 빠져 보일 수 있으므로
+    알고 있는 roomId 를 강한 일관성 BatchGetItem 으로 확인합니다.
+    """
+    present = batch_get_items(results_table, "roomId", room_ids, ("roomId",), strict=True, consistent=True)
+    return [room_id for room_id in room_ids if room_id not in present]
+
+def publish_generation(forms_table, form_id, generation):
+    """모든 방을 쓴 뒤 폼의 세대 포인터를 한 번에 바꿉니다.
+
+    더 새로운 세대가 이미 게시되어 있으면 바꾸지 않고 False 를 반환합니다.
+    """
+    try:
+        forms_table.update_item(
+            Key={"formId": form_id},
+            UpdateExpression=f"SET {GENERATION_ATTR} = :g, resultUpdatedAt = :t",
+            ConditionExpression=f"attribute_not_exists({GENERATION_ATTR}) OR {GENERATION_ATTR} < :g",
+            ExpressionAttributeValues={":g": generation, ":t": datetime.utcnow().isoformat()},
+        )
+    except forms_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+def delete_rooms(results_table, form_id, condition):
+    deleted = 0
+    items = iter_by_form(
+        results_table, form_id,
+        FilterExpression=condition,
+        ProjectionExpression="roomId",
+    )
+    with results_table.batch_writer() as batch:
+        for item in items:
+            batch.delete_item(Key={"roomId": item["roomId"]})
+            deleted += 1
+    return deleted
+
+def purge_generations(results_table, form_id, keep):
+    """keep 보다 오래된 세대(세대 속성이 없는 기존 결과 포함)의 방을 삭제하고 삭제 수를 반환합니다.
+
+    세대 문자열은 시간순으로 정렬되므로, keep 보다 새로운 세대 (다른 실행이 아직 쓰는 중) 는 건드리지 않습니다.
+    TTL 을 쓰는 경우에는 expiresAt 이 없는 아이템만 지웁니다.
+    """
+    condition = Attr("generation").lt(keep) | Attr("generation").not_exists()
+    if RESULT_TTL_DAYS > 0:
+        condition = condition & Attr("expiresAt").not_exists()
+    return delete_rooms(results_table, form_id, condition)
+
+def delete_generation(results_table, form_id, generation):
+    """한 세대의 방을 모두 삭제합니다. (게시하지 못한 실행이 자기 결과를 치울 때)"""
+    return delete_rooms(results_table, form_id, Attr("generation").eq(generation))
+
+
+# -----------------------------
+#  결과 문서 (성별 방 목록)
+# -----------------------------
+def display_room_id(raw_room_id):
+    # DB의 "uuid_gen_room-0001" -> 프론트용 "room-0001" 로 변환
+    return raw_room_id.split("_")[-1] if "_" in raw_room_id else raw_room_id
+
+def room_gender(gender):
+    # 성별 분류 (알 수 없으면 여자 목록 -> 프론트 에러 방지)
+    return "male" if (gender or "").startswith("남") else "female"
+
+def form_gender_key(form_id, generation, gender):
+    return f"{form_id}#{generation}#{gender}"
+
+def build_result_room(room, students):
+    """방 아이템과 {studentId: 학생} 으로 프론트엔드 방 객체를 만듭니다."""
+    members = room.get("members", [])
+    return {
+        "roomId": display_room_id(room.get("roomId", "")),
+        # 기존 응답과 같은 형태: DynamoDB Decimal 을 json.dumps(default=str) 한 문자열 ("31")
+        "score": str(room["score"]) if "score" in room else 0,
+        "memberA": students.get(members[0], {"studentId": members[0]}) if len(members) > 0 else None,
+        "memberB": students.get(members[1], {"studentId": members[1]}) if len(members) > 1 else None
+    }
+
+def build_result_rooms(rooms, students):
+    """방 목록과 {studentId: 학생} 으로 (maleResults, femaleResults) 를 만듭니다."""
+    male_results = []
+    female_results = []
+
+    for room in rooms:
+        room_result = build_result_room(room, students)
+        memberA = room_result["memberA"]
+        if room_gender(memberA.get("gender", "") if memberA else "") == "male":
+            male_results.append(room_result)
+        else:
+            female_results.append(room_result)
+
+    # 방 번호순 정렬 (room-0001, room-0002 ...)
+    male_results.sort(key=lambda x: x["roomId"])
+    female_results.sort(key=lambda x: x["roomId"])
+    return male_results, female_results
+
+def result_document_key(form_id, generation):
+    return f"{RESULT_DOCUMENT_PREFIX}/{form_id}/{generation}.json.gz"
+
+def save_result_document(form_id, generation, male_results, female_results):
+    # 세대마다 키가 달라 한 번 쓴 문서는 바뀌지 않음 -> 세대가 곧 캐시 버전
+    document = {
+        "formId": form_id,
+        "generation": generation,
+        "maleResults": male_results,
+        "femaleResults": female_results,
+    }
+    body = json.dumps(document, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    s3.put_object(
+        Bucket=RESULT_DOCUMENT_BUCKET, Key=result_document_key(form_id, generation),
+        Body=gzip.compress(body), ContentType="application/json", ContentEncoding="gzip"
+    )
+
+def load_result_document(form_id, generation):
+    """세대의 결과 문서를 반환합니다. 없으면 None."""
+    try:
+        obj = s3.get_object(Bucket=RESULT_DOCUMENT_BUCKET, Key=result_document_key(form_id, generation))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None
+        raise
+    return json.loads(gzip.decompress(obj["Body"].read()))
+
+def document_generation(key):
+    # "result-documents/{formId}/{generation}.json.gz" -> generation
+    return key.rsplit("/", 1)[-1].removesuffix(".json.gz")
+
+def delete_result_document(form_id, generation):
+    s3.delete_object(Bucket=RESULT_DOCUMENT_BUCKET, Key=result_document_key(form_id, generation))
+
+def purge_result_documents(form_id, keep):
+    """keep 보다 오래된 세대의 결과 문서를 삭제하고 삭제 수를 반환합니다. (새로운 세대의 문서는 유지)"""
+    prefix = f"{RESULT_DOCUMENT_PREFIX}/{form_id}/"
+
+    deleted = 0
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=RESULT_DOCUMENT_BUCKET, Prefix=prefix):
+        old_keys = [
+            {"Key": obj["Key"]} for obj in page.get("Contents", [])
+            if document_generation(obj["Key"]) < keep
+        ]
+        if old_keys:
+            s3.delete_objects(Bucket=RESULT_DOCUMENT_BUCKET, Delete={"Objects": old_keys})
+            deleted += len(old_keys)
+    return deleted
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from roomeya_common.dynamo import batch_get_items
+
+# 명부 내용으로 보는 학생 속성 (formId / completed 등 CreateForm 이 넣는 폼 배정 정보는 제외)
+ROSTER_FIELDS = ("name", "email", "gender")
+# 학생 아이템에 저장하는 명부 내용 해시
+CONTENT_HASH_ATTR = "contentHash"
+
+# 동시에 보낼 UpdateItem 수
+ROSTER_WRITE_WORKERS = int(os.environ.get("ROSTER_WRITE_WORKERS", "8"))
+
+
+# -----------------------------
+#  내용 해시
+# -----------------------------
+def content_hash(student):
+    # 빈 문자열(CreateForm 기본값)과 빈 칸(None, 명부 파일)은 같은 값으로 봄
+    values = [student.get(field) if student.get(field) != "" else None for field in ROSTER_FIELDS]
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+def stored_hash(item):
+    # 해시를 넣기 전에 저장된 학생은 저장된 속성으로 계산 (처음 한 번 전부 다시 쓰지 않도록)
+    return item.get(CONTENT_HASH_ATTR) or content_hash(item)
+
+
+# -----------------------------
+#  쓰기 (UpdateItem)
+# -----------------------------
+def new_student_item(student, assign=None):
+    item = {"studentId": student["studentId"]}
+    for field in ROSTER_FIELDS:
+        item[field] = student.get(field)
+    item[CONTENT_HASH_ATTR] = content_hash(student)
+    if student.get("sourceFile") is not None:
+        item["sourceFile"] = student["sourceFile"]
+    item["createdAt"] = student.get("createdAt") or datetime.utcnow().isoformat()
+    item.update(assign or {})
+    return item
+
+def put_new_students(table, items):
+    """없는 학생은 보존할 속성이 없으므로 batch_writer 로 25 개씩 씀 (UnprocessedItems 는 batch_writer 가 재시도)."""
+    with table.batch_writer(overwrite_by_pkeys=["studentId"]) as batch:
+        for item in items:
+            batch.put_item(Item=item)
+
+def update_student(table, student, content=True, assign=None):
+    """학생 한 명을 속성 단위로 씁니다. 없는 학생이면 새로 만들어짐.
+
+    content 면 명부 속성 + 해시 + sourceFile 을, assign 이면 그 속성(formId 등)을 SET 합니다.
+    createdAt 은 처음 만들 때만 넣고 나머지 속성(formId / completed 등)은 그대로 둡니다.
+    """
+    names = {}
+    values = {}
+    sets = []
+
+    def set_attr(name, value, expression="{v}"):
+        i = len(names)
+        names[f"#a{i}"] = name
+        values[f":v{i}"] = value
+        sets.append(f"#a{i} = " + expression.format(n=f"#a{i}", v=f":v{i}"))
+
+    if content:
+        for field in ROSTER_FIELDS:
+            set_attr(field, student.get(field))
+        set_attr(CONTENT_HASH_ATTR, content_hash(student))
+        if student.get("sourceFile") is not None:
+            set_attr("sourceFile", student["sourceFile"])
+        set_attr("createdAt", student.get("createdAt") or datetime.utcnow().isoformat(), "if_not_exists({n}, {v})")
+    for name, value in (assign or {}).items():
+        set_attr(name, value)
+
+    # resource 의 client 는 스레드 간 공유해도 안전하고 값도 파이썬 타입으로 변환됨
+    table.meta.client.update_item(
+        TableName=table.name,
+        Key={"studentId": student["studentId"]},
+        UpdateExpression="SET " + ", ".join(sets),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
+
+def run_updates(table, updates, max_workers=None):
+    """(student, content, assign) 목록을 스레드 풀로 UpdateItem 합니다."""
+    if not updates:
+        return
+    workers = min(max_workers or ROSTER_WRITE_WORKERS, len(updates))
+    if workers <= 1:
+        for student, content, assign in updates:
+            update_student(table, student, content, assign)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() 로 끝까지 돌려 예외가 있으면 여기서 다시 발생
+        list(pool.map(lambda update: update_student(table, *update), updates))
+
+
+# -----------------------------
+#  upsert
+# -----------------------------
+def upsert_students(table, students, max_workers=None):
+    """명부 학생 중 새로 생겼거나 내용이 바뀐 학생만 씁니다.
+
+    저장된 해시를 BatchGetItem 으로 한 번에 읽어 비교하고, 새 학생은 batch_writer 로,
+    바뀐 학생은 UpdateItem 으로 명부 속성만 고칩니다. (createdAt / formId / completed 는 유지)
+    같은 학번이 여러 번 나오면 마지막 행을 씁니다.
+    반환: {"inserted": n, "updated": n, "unchanged": n}
+    """
+    latest = {}
+    for student in students:
+        latest[student["studentId"]] = student
+
+    # 읽지 못한 학생을 새 학생으로 보고 덮어쓰지 않도록 strict
+    stored = batch_get_items(table, "studentId", list(latest), ROSTER_FIELDS + (CONTENT_HASH_ATTR,), strict=True)
+
+    inserts = []
+    updates = []
+    unchanged = 0
+    for student_id, student in latest.items():
+        item = stored.get(student_id)
+        if item is None:
+            inserts.append(new_student_item(student))
+        elif stored_hash(item) != content_hash(student):
+            updates.append((student, True, None))
+        else:
+            unchanged += 1
+
+    if inserts:
+        put_new_students(table, inserts)
+    run_updates(table, updates, max_workers)
+    return {"inserted": len(inserts), "updated": len(updates), "unchanged": unchanged}
+
+def register_students(table, students, assign, max_workers=None):
+    """폼 참가자를 등록하고 배정 속성(formId 등)을 넣은 학생 아이템을 참가자 순서대로 반환합니다.
+
+    기존 학생은 BatchGetItem 으로 한 번에 읽어 배정 속성만 UpdateItem 으로 동시에 쓰고
+    (명부 속성 / createdAt 은 그대로), 없는 학생은 참가자 정보로 만들어 batch_writer 로 씁니다.
+    같은 학번이 여러 번 나오면 처음 것만 사용합니다.
+    """
+    unique = {}
+    for student in students:
+        unique.setdefault(student["studentId"], student)
+
+    stored = batch_get_items(table, "studentId", list(unique), max_workers=max_workers, strict=True)
+
+    items = []
+    inserts = []
+    updates = []
+    for student_id, student in unique.items():
+        item = stored.get(student_id)
+        if item is None:
+            item = new_student_item(student, assign)
+            inserts.append(item)
+        else:
+            updates.append((item, False, assign))
+            item = dict(item, **assign)
+        items.append(item)
+
+    if inserts:
+        put_new_students(table, inserts)
+    run_updates(table, updates, max_workers)
+    return items
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+# 폼에 scoringRules 가 없을 때 쓰는 기존 점수 기준 (calc_score 와 동일)
+#   field:       answers 의 항목 이름
+#   weight:      두 사람의 값이 같으면 더하는 점수 (0 이상 정수)
+#   similar:     같지 않아도 weight 를 주는 값 쌍 목록
+#   similarity:  값 쌍별 부분 점수 {a: {b: 점수}} (대칭으로 적용, 0 이상 정수)
+#   transform:   "initial" 이면 값의 첫 글자만 비교
+#   ignoreEmpty: true 면 빈 값(None / "")은 어떤 값과도 일치하지 않음
+DEFAULT_SCORING_RULES = [
+    {"field": "smoking", "weight": 15},
+    {"field": "wakeup", "weight": 8},
+    {"field": "bedtime", "weight": 8, "similar": [["10to12", "12to2"], ["12to2", "after2"]]},
+    {"field": "mbti", "weight": 3, "transform": "initial", "ignoreEmpty": True},
+]
+
+TRANSFORMS = (None, "initial")
+RESERVED_FIELDS = ("studentId", "gender")
+
+
+def _value(value):
+    # DynamoDB Decimal -> 파이썬 숫자 (응답 값과 같은 타입으로 비교되도록)
+    if isinstance(value, Decimal):
+        return int(value) if value == int(value) else float(value)
+    return value
+
+def _points(value, where):
+    value = _value(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0 or value != int(value):
+        raise ValueError(f"{where} must be a non-negative integer")
+    return int(value)
+
+def normalize_rules(rules):
+    """scoringRules 를 검증하고 기본값을 채운 목록을 반환합니다. 잘못되면 ValueError."""
+    if not isinstance(rules, list) or not rules:
+        raise ValueError("scoringRules must be a non-empty list")
+
+    normalized = []
+    seen = set()
+    for rule in rules:
+        if not isinstance(rule, dict):
+            raise ValueError("each scoring rule must be an object")
+
+        field = rule.get("field")
+        if not isinstance(field, str) or not field or field in RESERVED_FIELDS:
+            raise ValueError(f"invalid scoring rule field: {field!r}")
+        if field in seen:
+            raise ValueError(f"duplicate scoring rule field: {field}")
+        seen.add(field)
+
+        transform = rule.get("transform")
+        if transform not in TRANSFORMS:
+            raise ValueError(f"{field}: unknown transform {transform!r}")
+
+        similar = []
+        for pair in rule.get("similar") or []:
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                raise ValueError(f"{field}: similar entries must be [a, b] pairs")
+            similar.append([_value(pair[0]), _value(pair[1])])
+
+        similarity = {}
+        for a, row in (rule.get("similarity") or {}).items():
+            if not isinstance(row, dict):
+                raise ValueError(f"{field}: similarity must be {{a: {{b: points}}}}")
+            similarity[a] = {b: _points(p, f"{field}.similarity") for b, p in row.items()}
+
+        normalized.append({
+            "field": field,
+            "weight": _points(rule.get("weight"), f"{field}.weight"),
+            "similar": similar,
+            "similarity": similarity,
+            "transform": transform,
+            "ignoreEmpty": bool(rule.get("ignoreEmpty", False)),
+        })
+    return normalized
+
+def rules_from_form(form):
+    """폼 항목에서 점수 기준을 읽습니다.
+
+    scoringRules 가 있으면 그것을, 없으면 fields 중 weight 가 있는 항목
+    ({"field" | "key" | "id": 이름, "weight": ...})을, 둘 다 없으면 기본 기준을 사용합니다.
+    """
+    rules = form.get("scoringRules")
+    if not rules:
+        rules = []
+        for f in form.get("fields") or []:
+            if isinstance(f, dict) and "weight" in f:
+                name = f.get("field") or f.get("key") or f.get("id")
+                rules.append(dict(f, field=name))
+    return normalize_rules(rules) if rules else normalize_rules(DEFAULT_SCORING_RULES)
@@ -0,0 +1,270 @@
+import gzip
+import json
+import os
+import random
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import boto3
+from botocore.exceptions import ClientError
+
+s3 = boto3.client("s3")
+
+SNAPSHOT_BUCKET = os.environ.get("SNAPSHOT_BUCKET", "roomeya-export")
+SNAPSHOT_PREFIX = "snapshots"
+SNAPSHOT_VERSION = 3
+
+# 기본 점수 기준 항목 (없으면 None, mbti 만 ""). 그 밖의 단일 값 응답 항목도 모두 컬럼으로 저장
+FEATURE_FIELDS = ("smoking", "wakeup", "bedtime", "mbti")
+SCALAR_TYPES = (str, int, float, bool, Decimal, type(None))
+RESERVED_FIELDS = ("studentId", "gender", "responseIds", "student")
+
+# 동시 제출로 ETag 가 어긋나면 다시 읽고 재시도
+UPDATE_RETRIES = 8
+CONFLICT_CODES = ("PreconditionFailed", "ConditionalRequestConflict", "412", "409")
+
+
+# -----------------------------
+#  응답자 특징
+# -----------------------------
+def respondent_features(answers):
+    # 폼 점수 기준이 어떤 항목을 쓰든 매칭할 수 있도록 단일 값 항목은 모두 보관 (목록 / 객체 응답은 제외)
+    features = {
+        k: v for k, v in answers.items()
+        if isinstance(v, SCALAR_TYPES) and k not in RESERVED_FIELDS
+    }
+    # matchingProcessor 응답자 객체와 같은 기본값 (mbti 만 "")
+    features.update({
+        "smoking": answers.get("smoking"),
+        "wakeup": answers.get("wakeup"),
+        "bedtime": answers.get("bedtime"),
+        "mbti": answers.get("mbti", ""),
+    })
+    return features
+
+def _plain(value):
+    # DynamoDB Decimal -> JSON 숫자
+    if isinstance(value, Decimal):
+        return int(value) if value == int(value) else float(value)
+    return value
+
+
+# -----------------------------
+#  스냅샷 구조
+# -----------------------------
+#  {
+#    "formId", "version", "updatedAt", "submitted",
+#    "fields": [응답 항목 이름 (제출 중 처음 보는 항목이면 뒤에 추가)],
+#    "dictionaries": {"gender": [...], "smoking": [...], ...},
+#    "students":  {"studentIds": [...], "names": [...], "gender": [코드]},
+#    "responses": {"responseIds": [...], "student": [students 행 번호], "smoking": [코드], ...}
+#  }
+#  응답은 제출 한 건마다 한 행이므로 같은 학생이 두 번 제출한 경우도 스캔 경로와 동일하게 재현됩니다.
+#  submitted 는 명부 밖 학생을 포함한 전체 제출 수로, Forms.completedCount 와 비교해 빠진 응답을 감지합니다.
+def snapshot_key(form_id):
+    return f"{SNAPSHOT_PREFIX}/{form_id}.json.gz"
+
+def new_snapshot(form_id):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "formId": form_id,
+        "submitted": 0,
+        "fields": list(FEATURE_FIELDS),
+        "dictionaries": {c: [] for c in ("gender",) + FEATURE_FIELDS},
+        "students": {"studentIds": [], "names": [], "gender": []},
+        "responses": dict({"responseIds": [], "student": []}, **{f: [] for f in FEATURE_FIELDS}),
+    }
+
+def _append_features(snapshot, code, features):
+    table = snapshot["responses"]
+    rows = len(table["student"]) - 1
+    for f in features:
+        if f not in snapshot["fields"]:
+            # 새 항목: 이전 응답들은 값 없음(None)으로 채움
+            snapshot["fields"].append(f)
+            snapshot["dictionaries"][f] = []
+            table[f] = [code(f, None)] * rows
+    for f in snapshot["fields"]:
+        table[f].append(code(f, features.get(f)))
+
+def _encoder(snapshot):
+    # 사전의 값 -> 코드 역색인을 한 번 만들어 두고 새 값만 뒤에 추가
+    index = {c: {v: k for k, v in enumerate(vocab)} for c, vocab in snapshot["dictionaries"].items()}
+
+    def code(column, value):
+        value = _plain(value)
+        index.setdefault(column, {})
+        if value not in index[column]:
+            index[column][value] = len(index[column])
+            snapshot["dictionaries"][column].append(value)
+        return index[column][value]
+
+    return code
+
+def build_snapshot(form_id, students, responses):
+    """students = [(studentId, gender, name)], responses = [(responseId, studentId, answers)] 로 스냅샷을 만듭니다.
+
+    명부에 없는 학생의 응답은 매칭과 동일하게 제외합니다.
+    """
+    snapshot = new_snapshot(form_id)
+    snapshot["submitted"] = len(responses)
+    code = _encoder(snapshot)
+    rows = {}
+
+    table = snapshot["students"]
+    for sid, gender, name in students:
+        if sid in rows:
+            table["gender"][rows[sid]] = code("gender", gender)
+            table["names"][rows[sid]] = name
+            continue
+        rows[sid] = len(table["studentIds"])
+        table["studentIds"].append(sid)
+        table["names"].append(name)
+        table["gender"].append(code("gender", gender))
+
+    table = snapshot["responses"]
+    for response_id, sid, answers in responses:
+        if sid not in rows:
+            continue
+        table["responseIds"].append(response_id)
+        table["student"].append(rows[sid])
+        _append_features(snapshot, code, respondent_features(answers))
+
+    return snapshot
+
+def add_response(snapshot, response_id, student_id, gender, answers, on_roster=True):
+    """제출 한 건을 추가합니다. 명부에 없는 학생이면 제출 수만 올리고 False."""
+    snapshot["submitted"] += 1
+    if not on_roster:
+        return False
+
+    students = snapshot["students"]
+    try:
+        row = students["studentIds"].index(student_id)
+    except ValueError:
+        return False
+
+    code = _encoder(snapshot)
+    students["gender"][row] = code("gender", gender)
+
+    table = snapshot["responses"]
+    table["responseIds"].append(response_id)
+    table["student"].append(row)
+    _append_features(snapshot, code, respondent_features(answers))
+    return True
+
+def snapshot_rows(snapshot):
+    """스냅샷을 (학생 목록, 응답자 목록) 으로 풀어 반환합니다.
+
+    학생: {"studentId", "name", "gender"}
+    응답자: {"studentId", "gender", "smoking", "wakeup", "bedtime", "mbti", 그 밖의 응답 항목} (제출 순서)
+    """
+    dictionaries = snapshot["dictionaries"]
+    table = snapshot["students"]
+    students = [
+        {"studentId": sid, "name": name, "gender": dictionaries["gender"][g]}
+        for sid, name, g in zip(table["studentIds"], table["names"], table["gender"])
+    ]
+
+    table = snapshot["responses"]
+    features = [(f, dictionaries[f], table[f]) for f in snapshot["fields"]]
+    respondents = []
+    for k, row in enumerate(table["student"]):
+        item = {"studentId": students[row]["studentId"], "gender": students[row]["gender"]}
+        for f, vocab, codes in features:
+            item[f] = vocab[codes[k]]
+        respondents.append(item)
+
+    return students, respondents
+
+def apply_roster(snapshot, students):
+    """현재 명부 students = [(studentId, gender, name)] 를 스냅샷에 반영합니다.
+
+    명부가 같으면 snapshot 을 그대로, 이름 / 성별이 바뀌었거나 빠진 학생만 있으면 (빠진 학생의 응답은 제외)
+    새 스냅샷을 반환합니다. 새로 들어온 학생이 있으면 그 학생의 응답이 스냅샷에 없으므로 None (다시 만들어야 함).
+    """
+    current, respondents = snapshot_rows(snapshot)
+    before = {s["studentId"]: (s["gender"], s["name"]) for s in current}
+    after = {sid: (gender, name) for sid, gender, name in students}
+    if before == after:
+        return snapshot
+    if set(after) - set(before):
+        return None
+
+    responses = [
+        (response_id, item["studentId"], item)
+        for response_id, item in zip(snapshot["responses"]["responseIds"], respondents)
+    ]
+    refreshed = build_snapshot(snapshot["formId"], students, responses)
+    # 제출 수는 명부 밖 학생을 포함한 전체 수이므로 그대로 유지
+    refreshed["submitted"] = snapshot["submitted"]
+    return refreshed
+
+
+# -----------------------------
+#  S3 읽기 / 쓰기
+# -----------------------------
+def _error_code(error):
+    return error.response.get("Error", {}).get("Code")
+
+def load_snapshot(form_id):
+    """(스냅샷, ETag) 를 반환합니다. 없으면 (None, None)."""
+    try:
+        obj = s3.get_object(Bucket=SNAPSHOT_BUCKET, Key=snapshot_key(form_id))
+    except ClientError as e:
+        if _error_code(e) in ("NoSuchKey", "404"):
+            return None, None
+        raise
+
+    snapshot = json.loads(gzip.decompress(obj["Body"].read()))
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None, obj["ETag"]
+    return snapshot, obj["ETag"]
+
+def save_snapshot(snapshot, if_match=None, if_none_match=False):
+    """스냅샷을 저장합니다. 조건(If-Match / If-None-Match)이 맞지 않으면 False."""
+    snapshot["updatedAt"] = datetime.utcnow().isoformat()
+    body = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    params = {
+        "Bucket": SNAPSHOT_BUCKET,
+        "Key": snapshot_key(snapshot["formId"]),
+        "Body": gzip.compress(body),
+        "ContentType": "application/gzip",
+    }
+    if if_match:
+        params["IfMatch"] = if_match
+    elif if_none_match:
+        params["IfNoneMatch"] = "*"
+
+    try:
+        s3.put_object(**params)
+    except ClientError as e:
+        if _error_code(e) in CONFLICT_CODES:
+            return False
+        raise
+    return True
+
+def delete_snapshot(form_id):
+    # 지워 두면 다음 매칭이 DynamoDB 에서 다시 만듦
+    s3.delete_object(Bucket=SNAPSHOT_BUCKET, Key=snapshot_key(form_id))
+
+def append_response(form_id, response_id, student_id, gender, answers, on_roster=True):
+    """SubmitForm 에서 제출 한 건을 스냅샷에 반영합니다.
+
+    on_roster=False (다른 폼 소속 학생) 이면 매칭 대상이 아니므로 제출 수만 올립니다.
+    스냅샷이 없으면(이 기능 이전에 만든 폼 등) 아무것도 하지 않습니다.
+    다른 제출과 계속 충돌해 반영하지 못하면 스냅샷을 삭제해 빠진 응답이 있는 스냅샷이 남지 않게 합니다.
+    """
+    for attempt in range(UPDATE_RETRIES):
+        snapshot, etag = load_snapshot(form_id)
+        if snapshot is None:
+            return False
+        add_response(snapshot, response_id, student_id, gender, answers, on_roster)
+        if save_snapshot(snapshot, if_match=etag):
+            return True
+        time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+
+    print(f"⚠️ Snapshot update conflicted {UPDATE_RETRIES} times, dropping snapshot for {form_id}")
+    delete_snapshot(form_id)
+    return False
@@ -0,0 +1,94 @@
+"""roomeya_common.dynamo.iter_by_form: formId GSI query 와 인덱스가 없을 때의 scan 이 같은 아이템을 반환하는지 (moto)
+
+    pip install pytest "moto[dynamodb]"
+    pytest layers/roomeya-common/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "python"))
+
+# moto 는 자격 증명 / 리전만 있으면 되므로 실제 계정에 접근하지 않도록 가짜 값을 넣어 둠
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+from boto3.dynamodb.conditions import Attr  # noqa: E402
+
+from roomeya_common import dynamo  # noqa: E402
+
+FORMS = ("form-a", "form-b")
+
+
+@pytest.fixture
+def responses_table():
+    dynamo._missing_indexes.clear()
+    with moto.mock_aws():
+        table = boto3.resource("dynamodb").create_table(
+            TableName="Roomeya-FormResponses",
+            KeySchema=[{"AttributeName": "responseId", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "responseId", "AttributeType": "S"},
+                {"AttributeName": "formId", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[{
+                "IndexName": dynamo.FORM_ID_INDEX,
+                "KeySchema": [{"AttributeName": "formId", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        with table.batch_writer() as batch:
+            for i in range(60):
+                batch.put_item(Item={
+                    "responseId": f"r{i:03d}",
+                    "formId": FORMS[i % 2],
+                    "studentId": f"2024{i:04d}",
+                    "completed": i % 3 == 0,
+                })
+        yield table
+    dynamo._missing_indexes.clear()
+
+
+def by_id(items):
+    return sorted(items, key=lambda item: item["responseId"])
+
+
+def test_query_and_scan_fallback_return_same_items(responses_table):
+    # Limit 으로 페이지를 잘게 나눠 두 경로 모두 LastEvaluatedKey 를 따라가게 함
+    via_query = list(dynamo.iter_by_form(responses_table, "form-a", Limit=7))
+    via_scan = list(dynamo.iter_by_form(responses_table, "form-a", index_name="missing-index", Limit=7))
+
+    assert ("Roomeya-FormResponses", "missing-index") in dynamo._missing_indexes
+    assert ("Roomeya-FormResponses", dynamo.FORM_ID_INDEX) not in dynamo._missing_indexes
+    assert len(via_query) == 30
+    assert by_id(via_query) == by_id(via_scan)
+    assert {item["formId"] for item in via_scan} == {"form-a"}
+
+
+def test_filter_and_projection_apply_to_both_paths(responses_table):
+    kwargs = {"FilterExpression": Attr("completed").eq(True), "ProjectionExpression": "responseId, studentId"}
+    via_query = list(dynamo.iter_by_form(responses_table, "form-b", **kwargs))
+    via_scan = list(dynamo.iter_by_form(responses_table, "form-b", index_name="missing-index", **kwargs))
+
+    assert via_query
+    assert by_id(via_query) == by_id(via_scan)
+    assert all(set(item) == {"responseId", "studentId"} for item in via_scan)
+
+
+def test_missing_index_is_remembered(responses_table):
+    list(dynamo.iter_by_form(responses_table, "form-a", index_name="missing-index"))
+
+    # 두 번째 호출은 query 를 다시 시도하지 않고 바로 scan
+    calls = []
+    original = responses_table.query
+    responses_table.query = lambda **kwargs: calls.append(kwargs) or original(**kwargs)
+    items = list(dynamo.iter_by_form(responses_table, "form-a", index_name="missing-index"))
+
+    assert calls == []
+    assert len(items) == 30
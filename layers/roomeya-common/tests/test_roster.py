@@ -0,0 +1,129 @@
+"""roomeya_common.roster.upsert_students: 내용 해시가 같은 학생은 쓰지 않고, 바뀐 학생은 명부 속성만 고치는지 (moto)"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "python"))
+
+# moto 는 자격 증명 / 리전만 있으면 되므로 실제 계정에 접근하지 않도록 가짜 값을 넣어 둠
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+
+from roomeya_common.roster import CONTENT_HASH_ATTR, upsert_students  # noqa: E402
+
+
+@pytest.fixture
+def students_table():
+    with moto.mock_aws():
+        yield boto3.resource("dynamodb").create_table(
+            TableName="Roomeya-Students",
+            KeySchema=[{"AttributeName": "studentId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "studentId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+@pytest.fixture
+def writes(monkeypatch, students_table):
+    """Students 테이블에 보낸 UpdateItem 학번 / BatchWriteItem 요청 수."""
+    client = students_table.meta.client
+    calls = {"update": [], "batch": 0}
+    update_item, batch_write_item = client.update_item, client.batch_write_item
+
+    def counted_update(**kwargs):
+        calls["update"].append(kwargs["Key"]["studentId"])
+        return update_item(**kwargs)
+
+    def counted_batch(**kwargs):
+        calls["batch"] += 1
+        return batch_write_item(**kwargs)
+
+    monkeypatch.setattr(client, "update_item", counted_update)
+    monkeypatch.setattr(client, "batch_write_item", counted_batch)
+    return calls
+
+
+def roster(count, overrides=None):
+    return [
+        dict({
+            "studentId": f"2024{i:04d}", "name": f"학생{i}", "email": f"s{i}@example.com",
+            "gender": "남자" if i % 2 else "여자", "sourceFile": "roster.xlsx",
+        }, **(overrides or {}).get(i, {}))
+        for i in range(count)
+    ]
+
+
+def item(table, student_id):
+    return table.get_item(Key={"studentId": student_id})["Item"]
+
+
+def test_first_upload_inserts_everyone_with_batch_writes(students_table, writes):
+    counts = upsert_students(students_table, roster(30))
+
+    assert counts == {"inserted": 30, "updated": 0, "unchanged": 0}
+    assert writes["update"] == [] and writes["batch"] >= 2
+    assert item(students_table, "20240007")[CONTENT_HASH_ATTR]
+
+
+def test_unchanged_rows_are_not_written(students_table, writes):
+    upsert_students(students_table, roster(30))
+    writes["batch"] = 0
+
+    counts = upsert_students(students_table, roster(30))
+
+    assert counts == {"inserted": 0, "updated": 0, "unchanged": 30}
+    assert writes == {"update": [], "batch": 0}
+
+
+def test_changed_rows_update_roster_fields_only(students_table, writes):
+    upsert_students(students_table, roster(10))
+    # CreateForm 이 넣는 폼 배정 속성
+    students_table.update_item(
+        Key={"studentId": "20240003"},
+        UpdateExpression="SET formId = :f, completed = :c",
+        ExpressionAttributeValues={":f": "form-1", ":c": True},
+    )
+    before = item(students_table, "20240003")
+    writes["update"].clear()
+
+    counts = upsert_students(students_table, roster(11, {3: {"name": "개명", "createdAt": "2030-01-01"}}))
+
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 9}
+    assert writes["update"] == ["20240003"]
+    after = item(students_table, "20240003")
+    assert after["name"] == "개명" and after[CONTENT_HASH_ATTR] != before[CONTENT_HASH_ATTR]
+    assert (after["formId"], after["completed"], after["createdAt"]) == ("form-1", True, before["createdAt"])
+
+
+def test_empty_string_and_missing_value_hash_the_same(students_table, writes):
+    upsert_students(students_table, roster(4, {1: {"email": ""}}))
+
+    counts = upsert_students(students_table, roster(4, {1: {"email": None}}))
+
+    assert counts["unchanged"] == 4 and writes["update"] == []
+
+
+def test_items_stored_before_hashing_are_compared_by_content(students_table, writes):
+    # contentHash 가 없는 기존 학생: 내용이 같으면 다시 쓰지 않음
+    for student in roster(5):
+        students_table.put_item(Item={k: v for k, v in student.items() if k != "sourceFile"})
+
+    counts = upsert_students(students_table, roster(5, {2: {"gender": "남자"}}))
+
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 4}
+    assert writes["update"] == ["20240002"]
+
+
+def test_duplicate_rows_keep_the_last_one(students_table):
+    rows = roster(3) + [dict(roster(3)[1], name="마지막")]
+
+    counts = upsert_students(students_table, rows)
+
+    assert counts == {"inserted": 3, "updated": 0, "unchanged": 0}
+    assert item(students_table, "20240001")["name"] == "마지막"
@@ -0,0 +1,81 @@
+"""roomeya_common.scoring_rules: scoringRules 검증 / 기본값 / 폼 항목에서 읽기"""
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "python"))
+
+from roomeya_common.scoring_rules import DEFAULT_SCORING_RULES, normalize_rules, rules_from_form  # noqa: E402
+
+
+def test_defaults_are_filled_in():
+    rules = normalize_rules([{"field": "smoking", "weight": 15}])
+
+    assert rules == [{
+        "field": "smoking", "weight": 15, "similar": [], "similarity": {},
+        "transform": None, "ignoreEmpty": False,
+    }]
+
+
+def test_dynamodb_decimals_become_python_numbers():
+    rules = normalize_rules([{
+        "field": "floor", "weight": Decimal("5"),
+        "similar": [[Decimal("3"), Decimal("4")]],
+        "similarity": {"a": {"b": Decimal("2")}},
+    }])
+
+    assert rules[0]["weight"] == 5 and type(rules[0]["weight"]) is int
+    assert rules[0]["similar"] == [[3, 4]]
+    assert rules[0]["similarity"] == {"a": {"b": 2}}
+
+
+@pytest.mark.parametrize("rules, message", [
+    ([], "non-empty list"),
+    ({"field": "smoking"}, "non-empty list"),
+    (["smoking"], "must be an object"),
+    ([{"weight": 1}], "invalid scoring rule field"),
+    ([{"field": "gender", "weight": 1}], "invalid scoring rule field"),
+    ([{"field": "studentId", "weight": 1}], "invalid scoring rule field"),
+    ([{"field": "a", "weight": 1}, {"field": "a", "weight": 2}], "duplicate"),
+    ([{"field": "a", "weight": 1, "transform": "lower"}], "unknown transform"),
+    ([{"field": "a", "weight": 1, "similar": [["x"]]}], "pairs"),
+    ([{"field": "a", "weight": 1, "similarity": {"x": 3}}], "similarity must be"),
+    ([{"field": "a", "weight": 1, "similarity": {"x": {"y": -1}}}], "non-negative integer"),
+    ([{"field": "a"}], "non-negative integer"),
+    ([{"field": "a", "weight": -1}], "non-negative integer"),
+    ([{"field": "a", "weight": 1.5}], "non-negative integer"),
+    ([{"field": "a", "weight": True}], "non-negative integer"),
+    ([{"field": "a", "weight": "3"}], "non-negative integer"),
+])
+def test_invalid_rules_raise_value_error(rules, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_rules(rules)
+
+
+def test_form_without_rules_uses_default():
+    assert rules_from_form({}) == normalize_rules(DEFAULT_SCORING_RULES)
+
+
+def test_form_scoring_rules_take_precedence_over_fields():
+    form = {
+        "scoringRules": [{"field": "pets", "weight": 4}],
+        "fields": [{"key": "smoking", "weight": 15}],
+    }
+
+    assert [r["field"] for r in rules_from_form(form)] == ["pets"]
+
+
+def test_weighted_form_fields_become_rules():
+    form = {"fields": [
+        {"key": "smoking", "weight": 15, "label": "흡연"},
+        {"id": "mbti", "weight": 3, "transform": "initial", "ignoreEmpty": True},
+        {"key": "comment"},
+    ]}
+
+    rules = rules_from_form(form)
+
+    assert [(r["field"], r["weight"], r["transform"]) for r in rules] == [
+        ("smoking", 15, None), ("mbti", 3, "initial")
+    ]
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+
+import boto3
+from botocore.exceptions import ClientError
+
+s3 = boto3.client("s3")
+lambda_client = boto3.client("lambda")
+
+JOB_BUCKET = os.environ.get("JOB_BUCKET", "roomeya-export")
+JOB_PREFIX = "matching-jobs"
+
+# 남은 시간이 이보다 적으면 다음 단계를 시작하지 않고 체크포인트 후 종료
+JOB_SAFETY_MARGIN_SEC = float(os.environ.get("JOB_SAFETY_MARGIN_SEC", "30"))
+# 1 이면 중단된 작업을 같은 jobId 로 비동기 재호출해 이어서 실행
+JOB_AUTO_RESUME = os.environ.get("JOB_AUTO_RESUME", "0") == "1"
+
+# 작업 파일: input(스냅샷, 점수 기준, 세대, 원래 이벤트) / matching(파티션별 Phase 1 결과, 진행 중인 점수 구간) /
+#           progress(저장한 방 수) / status(완료 응답)
+JOB_FILES = ("input", "matching", "progress", "status")
+
+
+# -----------------------------
+#  S3 체크포인트
+# -----------------------------
+def job_key(formId, jobId, name):
+    return f"{JOB_PREFIX}/{formId}/{jobId}/{name}.json.gz"
+
+def save_checkpoint(formId, jobId, name, data):
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    s3.put_object(
+        Bucket=JOB_BUCKET, Key=job_key(formId, jobId, name),
+        Body=gzip.compress(body), ContentType="application/gzip"
+    )
+
+def load_checkpoint(formId, jobId, name):
+    try:
+        obj = s3.get_object(Bucket=JOB_BUCKET, Key=job_key(formId, jobId, name))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None
+        raise
+    return json.loads(gzip.decompress(obj["Body"].read()))
+
+def clear_job(formId, jobId, keep=("status",)):
+    # 완료 후에는 재호출에 같은 응답을 돌려줄 status 만 남김
+    s3.delete_objects(
+        Bucket=JOB_BUCKET,
+        Delete={"Objects": [{"Key": job_key(formId, jobId, name)} for name in JOB_FILES if name not in keep]},
+    )
+
+def purge_job_statuses(formId, keep_jobId):
+    """keep_jobId 가 아닌 완료 작업의 status 를 삭제하고 삭제 수를 반환합니다.
+
+    새 세대를 게시한 뒤 지난 세대와 함께 지우므로 폼마다 마지막 완료 응답만 남습니다.
+    (완료되지 않고 버려진 작업은 matching-jobs/ 에 S3 수명 주기 규칙을 두어 만료)
+    """
+    keep_key = job_key(formId, keep_jobId, "status")
+    deleted = 0
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=JOB_BUCKET, Prefix=f"{JOB_PREFIX}/{formId}/"):
+        old_keys = [
+            {"Key": obj["Key"]} for obj in page.get("Contents", [])
+            if obj["Key"].endswith("/status.json.gz") and obj["Key"] != keep_key
+        ]
+        if old_keys:
+            s3.delete_objects(Bucket=JOB_BUCKET, Delete={"Objects": old_keys})
+            deleted += len(old_keys)
+    return deleted
+
+
+# -----------------------------
+#  남은 시간 / 재호출
+# -----------------------------
+def time_left(context):
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return context.get_remaining_time_in_millis() / 1000
+
+def out_of_time(context, margin=JOB_SAFETY_MARGIN_SEC):
+    remaining = time_left(context)
+    return remaining is not None and remaining < margin
+
+def resume_later(context, event, jobId):
+    """같은 jobId 로 이 함수를 비동기 재호출합니다. 재호출했으면 True."""
+    if not (event.get("autoResume", JOB_AUTO_RESUME) and hasattr(context, "function_name")):
+        return False
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType="Event",
+        Payload=json.dumps(dict(event, jobId=jobId)).encode("utf-8"),
+    )
+    return True
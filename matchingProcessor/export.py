@@ -0,0 +1,206 @@
+import csv
+import gzip
+import io
+import os
+from contextlib import contextmanager
+
+import boto3
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet 내보내기는 pyarrow 레이어가 있을 때만
+    pa = None
+    pq = None
+
+s3 = boto3.client("s3")
+
+# 멀티파트 업로드 파트 크기 (S3 최소 5MB). 이보다 작은 파일은 put_object 한 번으로 저장
+EXPORT_PART_SIZE = int(os.environ.get("EXPORT_PART_SIZE_MB", "8")) * 1024 * 1024
+# 기본 CSV 외에 추가로 만들 형식 (쉼표 구분: csv.gz, parquet)
+EXPORT_FORMATS = [f for f in os.environ.get("EXPORT_FORMATS", "").split(",") if f]
+PARQUET_ROW_GROUP = 50000
+
+CSV_HEADER = ["formId", "roomId", "studentA", "studentB", "score", "matchType"]
+# csv.gz / parquet: 이름 / 성별을 붙여 DynamoDB 를 다시 읽지 않고 분석할 수 있게 함
+DETAIL_HEADER = [
+    "formId", "generation", "roomId",
+    "studentA", "nameA", "genderA",
+    "studentB", "nameB", "genderB",
+    "score", "matchType",
+]
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# -----------------------------
+#  S3 멀티파트 스트림
+# -----------------------------
+class S3MultipartWriter(io.RawIOBase):
+    """쓰는 대로 part_size 단위로 S3 멀티파트 업로드하는 쓰기 전용 파일 객체.
+
+    메모리에는 파트 하나 크기까지만 들고 있으며, 전체가 한 파트보다 작으면 put_object 로 저장합니다.
+    """
+
+    def __init__(self, bucket, key, content_type, part_size=EXPORT_PART_SIZE):
+        super().__init__()
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload_id = None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _upload_part(self, data):
+        if self._upload_id is None:
+            self._upload_id = s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )["UploadId"]
+        number = len(self._parts) + 1
+        response = s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+            PartNumber=number, Body=data
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                s3.put_object(
+                    Bucket=self.bucket, Key=self.key,
+                    Body=bytes(self._buffer), ContentType=self.content_type
+                )
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                s3.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts}
+                )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self):
+        # 올라간 파트가 남아 비용이 나가지 않도록 업로드 취소
+        if self._upload_id is not None:
+            s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        super().close()
+
+@contextmanager
+def s3_upload(bucket, key, content_type):
+    writer = S3MultipartWriter(bucket, key, content_type)
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+# -----------------------------
+#  행 생성
+# -----------------------------
+def _clean_room_id(raw_id):
+    # [CSV용 ID 정제] "uuid_gen_room-0001" -> "room-0001"
+    return raw_id.split("_")[-1] if "_" in raw_id else raw_id
+
+def iter_csv_rows(formId, final_rooms):
+    for room in final_rooms:
+        m = room["members"]
+        a = m[0]
+        b = m[1] if len(m) > 1 else ""
+        yield [formId, _clean_room_id(room["roomId"]), a, b, room["score"], room.get("type", "preference")]
+
+def iter_detail_rows(formId, generation, final_rooms, student_map):
+    for room in final_rooms:
+        m = room["members"]
+        a = student_map.get(m[0], {})
+        b = student_map.get(m[1], {}) if len(m) > 1 else {}
+        yield [
+            formId, generation, _clean_room_id(room["roomId"]),
+            m[0], a.get("name", ""), a.get("gender", ""),
+            m[1] if len(m) > 1 else "", b.get("name", ""), b.get("gender", ""),
+            room["score"], room.get("type", "preference"),
+        ]
+
+
+# -----------------------------
+#  형식별 쓰기
+# -----------------------------
+def write_csv(bucket, key, header, rows, compress=False):
+    content_type = CONTENT_TYPES["csv.gz" if compress else "csv"]
+    with s3_upload(bucket, key, content_type) as raw:
+        stream = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(header)
+        writer.writerows(rows)
+        # raw 는 s3_upload 가 닫아야 업로드가 완료되므로 래퍼만 떼어 냄
+        text.flush()
+        text.detach()
+        if compress:
+            stream.close()
+    return key
+
+def write_parquet(bucket, key, header, rows):
+    if pq is None:
+        raise ValueError("parquet export requires pyarrow")
+
+    types = {"score": pa.int32()}
+    schema = pa.schema([(name, types.get(name, pa.string())) for name in header])
+
+    def flush(writer, batch):
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+        ))
+
+    with s3_upload(bucket, key, CONTENT_TYPES["parquet"]) as raw:
+        sink = pa.PythonFile(raw, mode="w")
+        writer = pq.ParquetWriter(sink, schema)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_ROW_GROUP:
+                flush(writer, batch)
+                batch = []
+        if batch:
+            flush(writer, batch)
+        writer.close()
+    return key
+
+def export_results(bucket, formId, generation, final_rooms, student_map, formats):
+    """추가 형식(csv.gz / parquet)으로 결과를 내보내고 {형식: key} 를 반환합니다."""
+    keys = {}
+    for fmt in formats:
+        key = f"matching-results/{formId}.{fmt}"
+        rows = iter_detail_rows(formId, generation, final_rooms, student_map)
+        if fmt == "csv.gz":
+            keys[fmt] = write_csv(bucket, key, DETAIL_HEADER, rows, compress=True)
+        elif fmt == "parquet":
+            keys[fmt] = write_parquet(bucket, key, DETAIL_HEADER, rows)
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+    return keys
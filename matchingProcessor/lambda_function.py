@@ -1,65 +1,220 @@
 import json
 import boto3
-from boto3.dynamodb.conditions import Attr
-import csv
-import io
-from datetime import datetime
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from roomeya_common.dynamo import batch_get_items, iter_by_form
+from roomeya_common.results import (
+    FORM_GENDER_ATTR, RESULT_MEMBER_FIELDS, RESULT_TTL_DAYS, build_result_rooms, delete_generation,
+    delete_result_document, form_gender_key, missing_room_ids, new_generation, publish_generation,
+    purge_generations, purge_result_documents, room_gender, save_result_document
+)
+from roomeya_common.scoring_rules import normalize_rules, rules_from_form
+from roomeya_common.snapshot import apply_roster, build_snapshot, load_snapshot, save_snapshot, snapshot_rows
+# calc_score / calc_bedtime_similarity 는 기존 경로(lambda_function.calc_score) 호환용
+from scoring import calc_score, calc_bedtime_similarity, encode_respondents
+from matching import match_stream_levels
+from optimizer import optimize_assignment
+from parallel import match_parallel, match_partition, merge_optimization, split_partitions, to_global_pairs
+from checkpoint import (
+    clear_job, load_checkpoint, out_of_time, purge_job_statuses, resume_later, save_checkpoint
+)
+from export import CSV_HEADER, EXPORT_FORMATS, export_results, iter_csv_rows, write_csv
 
 dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
 
 FORM_TABLE = "Roomeya-FormResponses"
+FORMS_TABLE = "Roomeya-Forms"
 STUDENTS_TABLE = "Roomeya-Students"
 RESULT_TABLE = "Roomeya-Results"
 BUCKET = "roomeya-export"
 
+# stream: 점수 구간별 후보 생성 (메모리 O(n)) / numpy: 블록 점수 행렬 / profile: 클래스 매칭 / loop: 기존 방식
+DEFAULT_ENGINE = os.environ.get("MATCH_ENGINE", "stream")
+
+# optimize=true 일 때 greedy 결과 개선에 쓰는 시간 (Lambda 남은 시간에서 여유분은 항상 남김)
+OPTIMIZE_BUDGET_SEC = float(os.environ.get("OPTIMIZE_BUDGET_SEC", "20"))
+OPTIMIZE_SAFETY_MARGIN_SEC = 30
+
+# parallel=true (또는 MATCH_PARALLEL=1) 이면 성별 파티션별로 프로세스를 나눠 매칭
+MATCH_PARALLEL = os.environ.get("MATCH_PARALLEL", "0") == "1"
+
+# 결과 저장 중 진행 상황을 체크포인트하는 방 개수 단위
+PERSIST_CHUNK = 1000
+# jobId 는 S3 키에 들어가므로 안전한 문자만 허용
+JOB_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,100}")
+
+
+# -----------------------------
+#  최적화 시간 예산
+# -----------------------------
+def get_optimize_budget(event, context):
+    budget = float(event.get("optimizeBudgetSec", OPTIMIZE_BUDGET_SEC))
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        remaining = context.get_remaining_time_in_millis() / 1000 - OPTIMIZE_SAFETY_MARGIN_SEC
+        budget = min(budget, remaining)
+    return max(0.0, budget)
 
 # -----------------------------
-#  점수 계산 로직
+#  단계별 소요 시간 (응답 body 의 timings)
 # -----------------------------
-def calc_bedtime_similarity(b1, b2):
-    similar_pairs = [("10to12", "12to2"), ("12to2", "after2")]
-    if b1 == b2: return True
-    for a, b in similar_pairs:
-        if (b1 == a and b2 == b) or (b1 == b and b2 == a): return True
-    return False
-
-def calc_score(a, b):
-    if a["gender"] != b["gender"]: return -1
-    score = 0
-    if a["smoking"] == b["smoking"]: score += 15
-    if a["wakeup"] == b["wakeup"]: score += 8
-    if calc_bedtime_similarity(a["bedtime"], b["bedtime"]): score += 8
-    if a["mbti"] and b["mbti"] and a["mbti"][0] == b["mbti"][0]: score += 3
-    return score
+def mark_phase(timings, name, start):
+    now = time.perf_counter()
+    timings[name] = round(now - start, 3)
+    return now
 
 # -----------------------------
-#  S3 저장 (CSV) - ID 깔끔하게 자르기
+#  응답자 로드 (S3 스냅샷 -> 없거나 오래되면 DynamoDB)
+# -----------------------------
+def load_roster(formId, student_table):
+    # 폼에 배정된 학생의 이름 / 성별만 (폼 생성 후 수정 / 다른 폼으로 옮긴 학생을 스냅샷에 반영하기 위함)
+    items = iter_by_form(
+        student_table, formId,
+        ProjectionExpression="studentId, #n, gender",
+        ExpressionAttributeNames={"#n": "name"},
+    )
+    return [(s["studentId"], s.get("gender", ""), s.get("name", "")) for s in items]
+
+def load_from_snapshot(formId, form, student_table):
+    """SubmitForm 이 갱신해 온 스냅샷을 읽습니다.
+
+    제출 수가 Forms.completedCount 와 다르거나 명부에 새 학생이 들어왔으면 (None, etag).
+    이름 / 성별이 바뀌었거나 빠진 학생은 스냅샷에 반영해 저장합니다.
+    """
+    snapshot, etag = load_snapshot(formId)
+    if snapshot is None:
+        return None, etag
+
+    completed = int(form.get("completedCount", 0))
+    if snapshot["submitted"] != completed:
+        print(f"⚠️ Snapshot is stale ({snapshot['submitted']} submitted, {completed} completed), rebuilding")
+        return None, etag
+
+    refreshed = apply_roster(snapshot, load_roster(formId, student_table))
+    if refreshed is None:
+        print("⚠️ Snapshot roster is stale (new students on this form), rebuilding")
+        return None, etag
+    if refreshed is not snapshot:
+        print("🟦 Students changed since the snapshot, refreshing roster")
+        try:
+            # 그 사이 SubmitForm 이 스냅샷을 바꿨으면 덮어쓰지 않음 (다음 매칭에서 다시 반영)
+            save_snapshot(refreshed, if_match=etag)
+        except Exception as e:
+            print(f"⚠️ Snapshot Save Warning: {str(e)}")
+    return refreshed, etag
+
+def load_from_tables(formId, form_table, student_table):
+    # A. 설문 응답자 (해당 폼)
+    form_items = list(iter_by_form(form_table, formId))
+
+    # B. [핵심] 전체 학생 목록 (해당 폼에 등록된 학생만!!)
+    # 폼 생성 시 저장된 formId를 기준으로 필터링합니다.
+    all_students = list(iter_by_form(student_table, formId))
+
+    print(f"🟦 Loaded: {len(form_items)} responses, {len(all_students)} total students in this form.")
+
+    # C. 스냅샷 형태로 정리 (학생 명부에 없는 사람이 응답한 경우 스킵)
+    return build_snapshot(
+        formId,
+        [(s["studentId"], s.get("gender", ""), s.get("name", "")) for s in all_students],
+        [(item.get("responseId"), item["studentId"], item["answers"]) for item in form_items],
+    )
+
+# -----------------------------
+#  S3 저장 (CSV) - ID 깔끔하게 자르기, 멀티파트로 나눠 스트리밍
 # -----------------------------
 def save_to_s3_csv(formId, final_rooms):
     key = f"matching-results/{formId}.csv"
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["formId", "roomId", "studentA", "studentB", "score", "matchType"])
-
-    for room in final_rooms:
-        m = room["members"]
-        a = m[0]
-        b = m[1] if len(m) > 1 else ""
-        
-        # [CSV용 ID 정제] "uuid_room-0001" -> "room-0001"
-        raw_id = room["roomId"]
-        clean_id = raw_id.split("_")[-1] if "_" in raw_id else raw_id
-        
-        writer.writerow([formId, clean_id, a, b, room["score"], room.get("type", "preference")])
+    return write_csv(BUCKET, key, CSV_HEADER, iter_csv_rows(formId, final_rooms))
 
-    s3.put_object(
-        Bucket=BUCKET, 
-        Key=key, 
-        Body=output.getvalue().encode("utf-8"), 
-        ContentType="text/csv"
-    )
-    return key
+
+# -----------------------------
+#  Phase 1 (성별 파티션 / 점수 구간별 체크포인트)
+# -----------------------------
+def match_stream_partition(formId, jobId, state, p, sub_cohort, context):
+    """stream 엔진: 점수 구간을 하나 끝낼 때마다 진행 중인 파티션의 used / matched 를 저장합니다.
+
+    한 파티션이 한 번의 호출에 끝나지 않아도 재개하면 저장한 구간 다음부터 이어서 진행합니다.
+    시간이 부족하면 None.
+    """
+    current = state.get("current")
+    if not current or current["partition"] != p:
+        current = {"partition": p, "level": 0, "used": [], "matched": []}
+    used = set(current["used"])
+    matched = [tuple(pair) for pair in current["matched"]]
+
+    for level in match_stream_levels(sub_cohort, used, matched, current["level"]):
+        state["current"] = {"partition": p, "level": level, "used": sorted(used), "matched": matched}
+        save_checkpoint(formId, jobId, "matching", state)
+        if out_of_time(context):
+            return None
+    return matched
+
+def match_with_checkpoints(formId, jobId, event, context, respondents, cohort):
+    """파티션 하나를 끝낼 때마다 결과를 S3 에 저장합니다. 시간이 부족하면 (None, None).
+
+    성별이 다르면 점수가 -1 이므로 파티션별 greedy 결과를 (점수 내림차순, i, j) 로 합치면
+    전체를 한 번에 매칭한 것과 같습니다. stream 엔진은 파티션 안에서도 점수 구간마다 저장합니다.
+    """
+    engine = event.get("engine", DEFAULT_ENGINE)
+    state = load_checkpoint(formId, jobId, "matching") or {"partitions": {}}
+    if "matched" in state:
+        return [tuple(p) for p in state["matched"]], state.get("optimization")
+
+    # 선택: 성별 파티션별 최대 가중치 매칭 / 지역 탐색으로 greedy 결과 개선
+    optimize_budget = get_optimize_budget(event, context) if event.get("optimize") else None
+
+    if event.get("parallel", MATCH_PARALLEL) and not state["partitions"] and not state.get("current"):
+        matched, optimization = match_parallel(
+            respondents, cohort, engine, optimize_budget, event.get("maxWorkers")
+        )
+        save_checkpoint(formId, jobId, "matching", {"matched": matched, "optimization": optimization})
+        return matched, optimization
+
+    done = state["partitions"]
+    parts = split_partitions(respondents, cohort)
+    pending = sum(len(indices) for p, (indices, _, _) in enumerate(parts) if str(p) not in done)
+
+    for p, (indices, sub_respondents, sub_cohort) in enumerate(parts):
+        if str(p) in done: continue
+        if out_of_time(context):
+            return None, None
+
+        budget = None
+        if optimize_budget is not None:
+            budget = optimize_budget * len(indices) / pending
+        if engine == "stream":
+            local = match_stream_partition(formId, jobId, state, p, sub_cohort, context)
+            if local is None:
+                return None, None
+            stats = None
+            if budget is not None:
+                local, stats = optimize_assignment(sub_cohort, local, budget)
+        else:
+            local, stats = match_partition(sub_respondents, sub_cohort, engine, budget)
+        done[str(p)] = {"pairs": to_global_pairs(indices, local), "optimization": stats}
+        state.pop("current", None)
+        save_checkpoint(formId, jobId, "matching", state)
+
+    matched = [tuple(pair) for d in done.values() for pair in d["pairs"]]
+    matched.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+    return matched, merge_optimization([d["optimization"] for d in done.values()])
+
+def incomplete_response(context, event, formId, jobId, phase):
+    resumed = resume_later(context, event, jobId)
+    print(f"⏸️ Out of time during {phase}; checkpointed job {jobId}" + (" (resuming)" if resumed else ""))
+    return {
+        "statusCode": 202,
+        "body": json.dumps({
+            "message": "Matching in progress",
+            "status": "incomplete",
+            "formId": formId,
+            "jobId": jobId,
+            "phase": phase,
+            "autoResumed": resumed
+        })
+    }
 
 
 # -----------------------------
@@ -70,103 +225,121 @@ def lambda_handler(event, context):
     if not formId:
         return {"statusCode": 400, "body": "formId is required"}
 
+    jobId = event.get("jobId")
+    if jobId is not None and not JOB_ID_PATTERN.fullmatch(str(jobId)):
+        return {"statusCode": 400, "body": "invalid jobId"}
+
     form_table = dynamodb.Table(FORM_TABLE)
+    forms_table = dynamodb.Table(FORMS_TABLE)
     student_table = dynamodb.Table(STUDENTS_TABLE)
     result_table = dynamodb.Table(RESULT_TABLE)
 
-    print(f"🟦 Starting Matching for Form: {formId}")
+    timings = {}
+    phase_start = time.perf_counter()
 
     # ====================================================
-    # 0) 기존 결과 삭제 (초기화)
+    # 0) 작업 재개 확인 (같은 formId + jobId 면 S3 체크포인트에서 이어서)
     # ====================================================
-    try:
-        # formId로 조회해서 roomId(PK)를 찾아 삭제
-        scan_res = result_table.scan(
-            FilterExpression=Attr("formId").eq(formId),
-            ProjectionExpression="roomId"
-        )
-        old_items = scan_res.get("Items", [])
-        
-        if old_items:
-            print(f"🟥 Deleting {len(old_items)} old records...")
-            with result_table.batch_writer() as batch:
-                for item in old_items:
-                    batch.delete_item(Key={"roomId": item["roomId"]})
-    except Exception as e:
-        print(f"⚠️ Cleanup Warning: {str(e)}")
+    job = None
+    if jobId:
+        status = load_checkpoint(formId, jobId, "status")
+        if status:
+            print(f"🟦 Job {jobId} already completed")
+            return {"statusCode": 200, "body": json.dumps(status)}
+        job = load_checkpoint(formId, jobId, "input")
 
-    # ====================================================
-    # 1) 데이터 로드 (필터링 적용)
-    # ====================================================
-    
-    # A. 설문 응답자 (해당 폼)
-    resp_res = form_table.scan(FilterExpression=Attr("formId").eq(formId))
-    form_items = resp_res.get("Items", [])
-    
-    # B. [핵심] 전체 학생 목록 (해당 폼에 등록된 학생만!!)
-    # 폼 생성 시 저장된 formId를 기준으로 필터링합니다.
-    stu_res = student_table.scan(
-        FilterExpression=Attr("formId").eq(formId)
-    )
-    all_students = stu_res.get("Items", [])
-    
-    student_map = {s["studentId"]: s for s in all_students}
-    
-    print(f"🟦 Loaded: {len(form_items)} responses, {len(all_students)} total students in this form.")
+    if job:
+        # 재개 시에는 처음 호출의 옵션 / 입력 스냅샷 / 점수 기준 / 세대를 그대로 사용
+        event = dict(job["event"], jobId=jobId)
+        generation = job["generation"]
+        rules = job["rules"]
+        snapshot = job["snapshot"]
+        created_at = datetime.fromisoformat(job["createdAt"])
+        print(f"🟦 Resuming Matching for Form: {formId} (job {jobId}, generation {generation})")
+    else:
+        # 이번 실행의 결과 세대. 기존 결과를 먼저 지우지 않고 새 세대로 쓴 뒤 포인터만 바꿈
+        generation = new_generation()
+        jobId = jobId or generation
+        created_at = datetime.utcnow()
+        print(f"🟦 Starting Matching for Form: {formId} (job {jobId}, generation {generation})")
 
-    # C. 응답자 객체화
-    respondents = []
-    
-    for item in form_items:
-        sid = item["studentId"]
-        s_info = student_map.get(sid)
-        
-        # 학생 명부에 없는 사람이 응답한 경우 스킵 
-        if not s_info: 
-            continue 
-
-        respondents.append({
-            "studentId": sid,
-            "gender": s_info.get("gender", ""),
-            "smoking": item["answers"].get("smoking"),
-            "wakeup": item["answers"].get("wakeup"),
-            "bedtime": item["answers"].get("bedtime"),
-            "mbti": item["answers"].get("mbti", "")
+        # 폼 정보: 제출 수(스냅샷 확인용) + 점수 기준 (이벤트의 scoringRules 가 있으면 우선)
+        form = forms_table.get_item(
+            Key={"formId": formId},
+            ProjectionExpression="completedCount, scoringRules, #fields",
+            ExpressionAttributeNames={"#fields": "fields"}
+        ).get("Item", {})
+        try:
+            if event.get("scoringRules"):
+                rules = normalize_rules(event["scoringRules"])
+            else:
+                rules = rules_from_form(form)
+        except ValueError as e:
+            return {"statusCode": 400, "body": f"Invalid scoringRules: {e}"}
+
+        # ====================================================
+        # 1) 데이터 로드 (S3 스냅샷 우선, 없으면 DynamoDB 스캔 후 스냅샷 저장)
+        # ====================================================
+        snapshot, snapshot_etag = None, None
+        try:
+            snapshot, snapshot_etag = load_from_snapshot(formId, form, student_table)
+        except Exception as e:
+            print(f"⚠️ Snapshot Warning: {str(e)}")
+
+        if snapshot is not None and not event.get("refreshSnapshot"):
+            print(f"🟦 Loaded snapshot: {len(snapshot['responses']['responseIds'])} responses, "
+                  f"{len(snapshot['students']['studentIds'])} total students in this form.")
+        else:
+            snapshot = load_from_tables(formId, form_table, student_table)
+            try:
+                # 그 사이 SubmitForm 이 스냅샷을 바꿨으면 덮어쓰지 않음 (제출 수 비교로 다음 매칭에서 다시 생성)
+                save_snapshot(snapshot, if_match=snapshot_etag, if_none_match=snapshot_etag is None)
+            except Exception as e:
+                print(f"⚠️ Snapshot Save Warning: {str(e)}")
+
+        # 체크포인트: 이후 재개는 이 입력으로만 진행 (그 사이 제출이 늘어도 결과가 섞이지 않음)
+        save_checkpoint(formId, jobId, "input", {
+            "event": {k: v for k, v in event.items() if k != "jobId"},
+            "generation": generation,
+            "createdAt": created_at.isoformat(),
+            "rules": rules,
+            "snapshot": snapshot,
         })
 
+    print("🟦 Scoring rules: " + ", ".join(f"{r['field']} {r['weight']}" for r in rules))
+
+    # 학생 목록 {studentId, name, gender} / 응답자 객체 {studentId, gender, 응답 항목...}
+    all_students, respondents = snapshot_rows(snapshot)
+    student_map = {s["studentId"]: s for s in all_students}
+    phase_start = mark_phase(timings, "load", phase_start)
+
     # ====================================================
     # 2) Phase 1: 취향 매칭 (Score > 0)
     # ====================================================
-    potential_pairs = []
-    for i in range(len(respondents)):
-        for j in range(i + 1, len(respondents)):
-            score = calc_score(respondents[i], respondents[j])
-            if score >= 0:
-                potential_pairs.append({
-                    "members": [respondents[i]["studentId"], respondents[j]["studentId"]],
-                    "score": score
-                })
-    
-    potential_pairs.sort(key=lambda x: x["score"], reverse=True)
+    cohort = encode_respondents(respondents, rules)
+    # stream / profile 엔진은 쌍 점수를 매칭하면서 계산하므로 그 시간은 match 에 포함됨
+    phase_start = mark_phase(timings, "score", phase_start)
 
     used_ids = set()
     final_rooms = []
     room_cnt = 1
 
-    for pair in potential_pairs:
-        a, b = pair["members"]
-        if a in used_ids or b in used_ids: continue
-        
+    matched, optimization = match_with_checkpoints(formId, jobId, event, context, respondents, cohort)
+    if matched is None:
+        return incomplete_response(context, event, formId, jobId, "match")
+
+    for i, j, score in matched:
+        a, b = cohort["ids"][i], cohort["ids"][j]
         used_ids.add(a)
         used_ids.add(b)
-        
+
         # DB용 유니크 ID 생성
-        u_rid = f"{formId}_room-{room_cnt:04d}"
-        
+        u_rid = f"{formId}_{generation}_room-{room_cnt:04d}"
+
         final_rooms.append({
             "roomId": u_rid,
             "members": [a, b],
-            "score": pair["score"],
+            "score": score,
             "type": "preference"
         })
         room_cnt += 1
@@ -198,7 +371,7 @@ def lambda_handler(event, context):
             m = [pool[i]]
             if i+1 < len(pool): m.append(pool[i+1])
             
-            u_rid = f"{formId}_room-{counter:04d}"
+            u_rid = f"{formId}_{generation}_room-{counter:04d}"
             rooms.append({
                 "roomId": u_rid,
                 "members": m,
@@ -215,30 +388,127 @@ def lambda_handler(event, context):
     final_rooms.extend(f_rooms)
 
     print(f"🟩 Total Rooms Generated: {len(final_rooms)}")
+    phase_start = mark_phase(timings, "match", phase_start)
 
     # ====================================================
-    # 4) 저장
+    # 4) 저장 (PERSIST_CHUNK 개마다 진행 상황 체크포인트)
     # ====================================================
-    with result_table.batch_writer() as batch:
-        for room in final_rooms:
-            batch.put_item(
-                Item={
+    expires_at = None
+    if RESULT_TTL_DAYS > 0:
+        expires_at = int((created_at + timedelta(days=RESULT_TTL_DAYS)).timestamp())
+
+    def write_rooms(rooms):
+        with result_table.batch_writer() as batch:
+            for room in rooms:
+                item = {
                     "roomId": room["roomId"],  # PK (Unique)
                     "formId": formId,
+                    "generation": generation,
                     "members": room["members"],
                     "score": room["score"],
                     "matchType": room["type"],
-                    "createdAt": datetime.utcnow().isoformat()
+                    "createdAt": created_at.isoformat()
                 }
-            )
+                # matchingResult 의 성별 페이지 조회용 (첫 번째 학생 성별 기준)
+                first = student_map.get(room["members"][0], {})
+                item[FORM_GENDER_ATTR] = form_gender_key(formId, generation, room_gender(first.get("gender")))
+                if expires_at:
+                    item["expiresAt"] = expires_at
+                batch.put_item(Item=item)
+
+    progress = load_checkpoint(formId, jobId, "progress") or {"written": 0}
+    resumed_at = progress["written"]
+    for start in range(progress["written"], len(final_rooms), PERSIST_CHUNK):
+        if out_of_time(context):
+            return incomplete_response(context, event, formId, jobId, "persist")
+
+        write_rooms(final_rooms[start:start + PERSIST_CHUNK])
+        progress["written"] = min(start + PERSIST_CHUNK, len(final_rooms))
+        save_checkpoint(formId, jobId, "progress", progress)
+
+    if resumed_at:
+        # 이전 호출이 쓴 방이 그 사이 지워졌을 수 있으므로 (다른 실행의 정리 등) 빠진 방만 다시 씀
+        # (이번 호출에서 쓴 방은 batch_writer 가 끝까지 재시도하므로 확인하지 않음)
+        try:
+            missing = set(missing_room_ids(result_table, [room["roomId"] for room in final_rooms[:resumed_at]]))
+        except Exception as e:
+            print(f"⚠️ Room Check Warning: {str(e)}")
+            return incomplete_response(context, event, formId, jobId, "persist")
+        if missing:
+            print(f"⚠️ {len(missing)} rooms of {generation} were missing, rewriting")
+            write_rooms([room for room in final_rooms if room["roomId"] in missing])
 
     csv_key = save_to_s3_csv(formId, final_rooms)
 
+    # 선택: 이름 / 성별을 붙인 csv.gz / parquet (이벤트 exportFormats 또는 EXPORT_FORMATS)
+    export_keys = {}
+    try:
+        export_keys = export_results(
+            BUCKET, formId, generation, final_rooms, student_map,
+            event.get("exportFormats", EXPORT_FORMATS)
+        )
+    except Exception as e:
+        print(f"⚠️ Export Warning: {str(e)}")
+
+    # matchingResult 가 그대로 내려줄 성별 방 목록 문서 (실패하면 matchingResult 가 테이블에서 직접 조회)
+    try:
+        member_ids = [sid for room in final_rooms for sid in room["members"]]
+        students = batch_get_items(student_table, "studentId", member_ids, RESULT_MEMBER_FIELDS)
+        male_results, female_results = build_result_rooms(final_rooms, students)
+        save_result_document(formId, generation, male_results, female_results)
+    except Exception as e:
+        print(f"⚠️ Result Document Warning: {str(e)}")
+
+    # 모든 방을 쓴 뒤에 포인터 전환 -> 조회 쪽은 항상 완성된 결과만 봄
+    published = publish_generation(forms_table, formId, generation)
+    if not published:
+        # 아무도 가리키지 않을 이번 세대의 방 / 문서는 바로 정리 (TTL 이 없으면 영영 남음)
+        print(f"⚠️ A newer generation is already published; {generation} was not published")
+        try:
+            deleted = delete_generation(result_table, formId, generation)
+            delete_result_document(formId, generation)
+            print(f"🟥 Deleted {deleted} unpublished records")
+        except Exception as e:
+            print(f"⚠️ Cleanup Warning: {str(e)}")
+    phase_start = mark_phase(timings, "persist", phase_start)
+
+    # ====================================================
+    # 5) 지난 세대 정리 (조회에는 영향 없음, TTL 을 쓰면 기존 결과만 / 시간이 부족하면 다음 실행에서)
+    # ====================================================
+    if published and event.get("purge", True) and not out_of_time(context):
+        try:
+            deleted = purge_generations(result_table, formId, keep=generation)
+            if deleted:
+                print(f"🟥 Deleted {deleted} old records")
+            purge_result_documents(formId, keep=generation)
+            purge_job_statuses(formId, keep_jobId=jobId)
+        except Exception as e:
+            print(f"⚠️ Cleanup Warning: {str(e)}")
+        mark_phase(timings, "purge", phase_start)
+    print(f"⏱️ Timings: {timings}")
+
+    response_body = {
+        "message": "Matching completed",
+        "status": "completed",
+        "jobId": jobId,
+        "totalRooms": len(final_rooms),
+        "generation": generation,
+        "published": published,
+        "csvKey": csv_key,
+        "exportKeys": export_keys,
+        "timings": timings
+    }
+    if optimization:
+        response_body["optimization"] = optimization
+
+    # 완료 응답만 남기고 작업 체크포인트 정리 (같은 jobId 재호출에는 이 응답을 반환)
+    try:
+        save_checkpoint(formId, jobId, "status", response_body)
+        clear_job(formId, jobId)
+    except Exception as e:
+        print(f"⚠️ Job Cleanup Warning: {str(e)}")
+
     return {
         "statusCode": 200,
-        "body": json.dumps({
-            "message": "Matching completed",
-            "totalRooms": len(final_rooms),
-            "csvKey": csv_key
-        })
+        "body": json.dumps(response_body)
     }
@@ -0,0 +1,211 @@
+import bisect
+import heapq
+from collections import Counter, deque
+
+from scoring import np, iter_ranked_pairs_loop, iter_ranked_pairs_numpy
+
+
+# -----------------------------
+#  Phase 1 greedy 선택
+# -----------------------------
+def greedy_match(ranked_pairs, ids, gender, used=None):
+    # 점수 높은 쌍부터, 두 사람(학번 기준) 모두 미배정일 때만 채택
+    # used 를 넘기면 후보 생성기와 배정 상태를 공유 (iter_ranked_pairs_stream)
+    used = set() if used is None else used
+    matched = []
+
+    # 중복 응답이 없으면 성별마다 남은 인원이 1명 이하가 되는 순간 더 채택할 쌍이 없음
+    remaining = Counter(gender) if len(set(ids)) == len(ids) else None
+    open_groups = sum(1 for c in remaining.values() if c > 1) if remaining else 0
+
+    for i, j, score in ranked_pairs:
+        a, b = ids[i], ids[j]
+        if a in used or b in used: continue
+        used.add(a)
+        used.add(b)
+        matched.append((i, j, score))
+
+        if remaining is not None:
+            g = gender[i]
+            remaining[g] -= 2
+            if remaining[g] in (0, 1):
+                open_groups -= 1
+                if open_groups == 0: break
+    return matched
+
+
+# -----------------------------
+#  프로필 클래스 매칭
+# -----------------------------
+def group_profile_classes(cohort):
+    """(성별, 항목 코드...) 가 같은 응답자를 한 클래스로 묶습니다.
+
+    반환: (클래스별 멤버 인덱스 목록, 클래스 간 점수 행렬)
+    """
+    columns, tables = cohort["columns"], cohort["tables"]
+    classes = {}
+    for idx, key in enumerate(zip(cohort["gender"], *columns)):
+        classes.setdefault(key, []).append(idx)
+
+    keys = list(classes)
+
+    def class_score(a, b):
+        if a[0] != b[0]: return -1
+        return sum(t[x][y] for t, x, y in zip(tables, a[1:], b[1:]))
+
+    scores = [[class_score(a, b) for b in keys] for a in keys]
+    return [classes[key] for key in keys], scores
+
+def stream_index(cohort):
+    """후보 생성에 쓰는 (클래스별 멤버, 클래스 간 점수, 점수 구간 내림차순, 응답자별 클래스)."""
+    members, scores = group_profile_classes(cohort)
+    k = len(members)
+    levels = sorted({scores[a][b] for a in range(k) for b in range(a, k) if scores[a][b] >= 0}, reverse=True)
+
+    class_of = [0] * len(cohort["ids"])
+    for c, ms in enumerate(members):
+        for m in ms:
+            class_of[m] = c
+    return members, scores, levels, class_of
+
+def iter_level_pairs(cohort, index, s, used=None):
+    # 점수가 s 인 후보 쌍을 (i, j) 순으로
+    ids = cohort["ids"]
+    members, scores, _, class_of = index
+    k = len(members)
+
+    def tail(ms, i):
+        for p in range(bisect.bisect_right(ms, i), len(ms)):
+            yield ms[p]
+
+    compat = [[members[d] for d in range(k) if scores[c][d] == s] for c in range(k)]
+    for i in range(len(ids)):
+        targets = compat[class_of[i]]
+        if not targets: continue
+        if used is not None and ids[i] in used: continue
+
+        tails = [tail(ms, i) for ms in targets]
+        for j in (tails[0] if len(tails) == 1 else heapq.merge(*tails)):
+            yield i, j, s
+            if used is not None and ids[i] in used: break
+
+def iter_ranked_pairs_stream(cohort, used=None):
+    """후보 쌍을 점수 구간별로 (높은 점수부터, 구간 안에서는 (i, j) 순) 하나씩 생성합니다.
+
+    전체 쌍 목록 대신 클래스별 멤버 목록과 클래스 간 점수만 들고 있으므로
+    메모리는 응답자 수에 비례합니다. used(학번 집합)를 넘기면 이미 배정된 사람의 행은 건너뜁니다.
+    """
+    index = stream_index(cohort)
+    for s in index[2]:
+        yield from iter_level_pairs(cohort, index, s, used)
+
+def match_stream_levels(cohort, used, matched, start=0):
+    """stream 엔진의 greedy 를 점수 구간 하나씩 진행하고, 구간을 끝낼 때마다 다음 구간 번호를 반환합니다.
+
+    used(학번 집합) / matched 를 제자리에서 채우므로, 중간에 멈춘 뒤 저장해 둔 used / matched /
+    구간 번호로 이어서 진행해도 한 번에 매칭한 것과 같은 결과입니다.
+    """
+    index = stream_index(cohort)
+    levels = index[2]
+    for level in range(start, len(levels)):
+        pairs = iter_level_pairs(cohort, index, levels[level], used)
+        matched.extend(greedy_match(pairs, cohort["ids"], cohort["gender"], used=used))
+        yield level + 1
+
+def match_by_profile_class(cohort):
+    """greedy_match 와 같은 결과를 클래스 단위로 계산합니다.
+
+    같은 점수 구간 안에서 greedy 는 i 가 작은 사람부터, 아직 남은 가장 작은 j 와 짝을 짓습니다.
+    이 순서를 클래스별 대기열의 맨 앞만 보고 재현하므로 전체 쌍을 나열하지 않습니다.
+    """
+    ids = cohort["ids"]
+    members, scores = group_profile_classes(cohort)
+    k = len(members)
+    levels = sorted({scores[a][b] for a in range(k) for b in range(a, k) if scores[a][b] >= 0}, reverse=True)
+    has_duplicates = len(set(ids)) != len(ids)
+
+    used = set()
+    matched = []
+
+    for s in levels:
+        compat = {c: [d for d in range(k) if scores[c][d] == s] for c in range(k)}
+        compat = {c: ds for c, ds in compat.items() if ds}
+        queues = {c: deque(m for m in members[c] if ids[m] not in used) for c in compat}
+        level_pairs = []
+
+        # 자기 클래스끼리만 이 점수인 클래스는 앞에서부터 두 명씩 묶으면 끝 (개수 계산)
+        if not has_duplicates:
+            for c, ds in list(compat.items()):
+                if ds != [c]: continue
+                q = list(queues.pop(c))
+                for t in range(0, len(q) - 1, 2):
+                    level_pairs.append((q[t], q[t + 1], s))
+                del compat[c]
+
+        heap = [(q[0], c) for c, q in queues.items() if q]
+        heapq.heapify(heap)
+
+        def front(c):
+            q = queues[c]
+            while q and ids[q[0]] in used:
+                q.popleft()
+            return q[0] if q else None
+
+        while heap:
+            i, c = heapq.heappop(heap)
+            head = front(c)
+            if head is None: continue
+            if head != i:
+                heapq.heappush(heap, (head, c))
+                continue
+            queues[c].popleft()
+
+            # 이 점수로 이어지는 클래스들 중 가장 앞(작은 인덱스)에 있는 사람이 짝
+            partner = None
+            for d in compat[c]:
+                j = front(d)
+                if j is not None and (partner is None or j < partner[0]):
+                    partner = (j, d)
+
+            if partner:
+                j, d = partner
+                queues[d].popleft()
+                used.add(ids[i])
+                used.add(ids[j])
+                level_pairs.append((i, j, s))
+
+            head = front(c)
+            if head is not None:
+                heapq.heappush(heap, (head, c))
+
+        level_pairs.sort()
+        for i, j, _ in level_pairs:
+            used.add(ids[i])
+            used.add(ids[j])
+        matched.extend(level_pairs)
+
+    return matched
+
+
+# -----------------------------
+#  후보 쌍 엔진 선택
+# -----------------------------
+def get_ranked_pairs(respondents, cohort, engine):
+    if engine == "loop":
+        return iter_ranked_pairs_loop(respondents, cohort)
+    if engine == "numpy":
+        if np is None:
+            raise ValueError("numpy engine requires numpy")
+        return iter_ranked_pairs_numpy(cohort)
+    raise ValueError(f"Unknown matching engine: {engine}")
+
+def match_preferences(respondents, cohort, engine):
+    # profile: 프로필 클래스 단위 매칭 (greedy 와 동일 결과, 전체 쌍을 만들지 않음)
+    if engine == "profile":
+        return match_by_profile_class(cohort)
+    if engine == "stream":
+        used = set()
+        ranked_pairs = iter_ranked_pairs_stream(cohort, used)
+        return greedy_match(ranked_pairs, cohort["ids"], cohort["gender"], used=used)
+    ranked_pairs = get_ranked_pairs(respondents, cohort, engine)
+    return greedy_match(ranked_pairs, cohort["ids"], cohort["gender"])
@@ -0,0 +1,565 @@
+import os
+import random
+import time
+
+from matching import group_profile_classes
+
+# 성별 파티션 인원이 이 이하이면 정확한 최대 가중치 매칭, 초과하면 지역 탐색
+# (지역 탐색도 이 인원 단위의 창에 정확 매칭을 반복 적용)
+EXACT_MATCH_LIMIT = int(os.environ.get("EXACT_MATCH_LIMIT", "300"))
+LOCAL_SEARCH_SEED = 0
+LOCAL_SEARCH_STALE_ROUNDS = 5
+
+
+# -----------------------------
+#  최대 가중치 매칭 (Edmonds blossom, O(n^3))
+# -----------------------------
+def max_weight_matching(edges, maxcardinality=False, deadline=None):
+    """edges = [(i, j, w)] (정수 가중치) 에 대한 최대 가중치 매칭.
+
+    반환: mate 리스트 (mate[v] = 짝 정점, 없으면 -1).
+    deadline(time.monotonic 기준)을 넘기면 TimeoutError 를 발생시킵니다.
+    Van Rantwijk 의 mwmatching 구현을 따릅니다.
+    """
+    if not edges:
+        return []
+
+    nedge = len(edges)
+    nvertex = 1 + max(max(i, j) for i, j, _ in edges)
+    maxweight = max(0, max(w for _, _, w in edges))
+
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * nedge)]
+    neighbend = [[] for _ in range(nvertex)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    mate = nvertex * [-1]
+    label = (2 * nvertex) * [0]
+    labelend = (2 * nvertex) * [-1]
+    inblossom = list(range(nvertex))
+    blossomparent = (2 * nvertex) * [-1]
+    blossomchilds = (2 * nvertex) * [None]
+    blossombase = list(range(nvertex)) + nvertex * [-1]
+    blossomendps = (2 * nvertex) * [None]
+    bestedge = (2 * nvertex) * [-1]
+    blossombestedges = (2 * nvertex) * [None]
+    unusedblossoms = list(range(nvertex, 2 * nvertex))
+    dualvar = nvertex * [maxweight] + nvertex * [0]
+    allowedge = nedge * [False]
+    queue = []
+
+    def slack(k):
+        i, j, wt = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * wt
+
+    def blossom_leaves(b):
+        if b < nvertex:
+            yield b
+        else:
+            for t in blossomchilds[b]:
+                if t < nvertex:
+                    yield t
+                else:
+                    yield from blossom_leaves(t)
+
+    def assign_label(w, t, p):
+        b = inblossom[w]
+        label[w] = label[b] = t
+        labelend[w] = labelend[b] = p
+        bestedge[w] = bestedge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            base = blossombase[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        v, w, _ = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                queue.append(v)
+            inblossom[v] = b
+
+        bestedgeto = (2 * nvertex) * [-1]
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    i, j, _ = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if (bj != b and label[bj] == 1 and
+                            (bestedgeto[bj] == -1 or slack(k) < slack(bestedgeto[bj]))):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = [k for k in bestedgeto if k != -1]
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b, endstage):
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < nvertex:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+
+        if not endstage and label[b] == 2:
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                jstep = -1
+                endptrick = 1
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                allowedge[p // 2] = True
+                j += jstep
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(v, 2, labelend[v])
+                j += jstep
+
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b, v):
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= nvertex:
+            augment_blossom(t, v)
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k):
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= nvertex:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= nvertex:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    for _ in range(nvertex):
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("max_weight_matching exceeded its time budget")
+
+        label[:] = (2 * nvertex) * [0]
+        bestedge[:] = (2 * nvertex) * [-1]
+        blossombestedges[nvertex:] = nvertex * [None]
+        allowedge[:] = nedge * [False]
+        queue[:] = []
+
+        for v in range(nvertex):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue
+                    if not allowedge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        if bestedge[w] == -1 or kslack < slack(bestedge[w]):
+                            bestedge[w] = k
+
+            if augmented:
+                break
+
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+
+            if not maxcardinality:
+                deltatype = 1
+                delta = min(dualvar[:nvertex])
+
+            for v in range(nvertex):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+
+            for b in range(2 * nvertex):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    d = slack(bestedge[b]) // 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+
+            for b in range(nvertex, 2 * nvertex):
+                if (blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2 and
+                        (deltatype == -1 or dualvar[b] < delta)):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+
+            if deltatype == -1:
+                deltatype = 1
+                delta = max(0, min(dualvar[:nvertex]))
+
+            for v in range(nvertex):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            if deltatype == 1:
+                break
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                i, j, _ = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                i, j, _ = edges[deltaedge]
+                queue.append(i)
+            elif deltatype == 4:
+                expand_blossom(deltablossom, False)
+
+        if not augmented:
+            break
+
+        for b in range(nvertex, 2 * nvertex):
+            if (blossomparent[b] == -1 and blossombase[b] >= 0 and
+                    label[b] == 1 and dualvar[b] == 0):
+                expand_blossom(b, True)
+
+    return [endpoint[p] if p >= 0 else -1 for p in mate]
+
+
+# -----------------------------
+#  지역 탐색
+# -----------------------------
+def solve_exact(rooms, score, deadline):
+    # rooms 의 멤버 전체를 다시 최대 가중치로 짝지음
+    nodes = [m for room in rooms for m in room if m is not None]
+    edges = [(u, v, score(nodes[u], nodes[v]))
+             for u in range(len(nodes)) for v in range(u + 1, len(nodes))]
+    if not edges:
+        return [list(room) for room in rooms]
+    mate = max_weight_matching(edges, maxcardinality=True, deadline=deadline)
+    solved = [[nodes[u], nodes[v]] for u, v in enumerate(mate) if v > u]
+    solved += [[nodes[u], None] for u, v in enumerate(mate) if v == -1]
+    return solved
+
+def improve_by_windows(rooms, score, deadline, window, seed=LOCAL_SEARCH_SEED):
+    """점수가 낮은 방 절반 + 무작위 방 절반을 골라 그 멤버끼리 정확 매칭을 다시 푸는 것을 반복합니다.
+
+    고른 방들의 현재 배정도 해 중 하나이므로 합계는 줄지 않습니다.
+    """
+    m = len(rooms)
+    if m < 2:
+        return rooms
+
+    rnd = random.Random(seed)
+    size = max(2, window // 2)
+    stale = 0
+
+    while stale < LOCAL_SEARCH_STALE_ROUNDS and time.monotonic() < deadline:
+        order = sorted(range(m), key=lambda x: score(*rooms[x]))
+        picked = order[:size // 2]
+        rest = order[size // 2:]
+        picked += rnd.sample(rest, min(len(rest), size - len(picked)))
+
+        current = [rooms[x] for x in picked]
+        try:
+            solved = solve_exact(current, score, deadline)
+        except TimeoutError:
+            break
+
+        gain = sum(score(a, b) for a, b in solved) - sum(score(a, b) for a, b in current)
+        if gain > 0:
+            # 인원이 같으므로 방 개수도 같음 (홀수 인원이면 1인 방 하나)
+            for x, room in zip(picked, solved):
+                rooms[x] = room
+            stale = 0
+        else:
+            stale += 1
+
+    return rooms
+
+def improve_by_swaps(rooms, score, deadline, seed=LOCAL_SEARCH_SEED):
+    """rooms = [[a, b]] (b 는 None 가능) 를 제자리에서 개선합니다.
+
+    임의의 두 방 (a, b), (c, d) 를 (a, c)/(b, d) 또는 (a, d)/(b, c) 로 바꿔
+    합계가 늘어나면 채택합니다. 연속 LOCAL_SEARCH_STALE_ROUNDS 라운드 동안
+    개선이 없거나 deadline 을 넘기면 종료합니다.
+    """
+    m = len(rooms)
+    if m < 2:
+        return rooms
+
+    rnd = random.Random(seed)
+    order = list(range(m))
+    stale = 0
+    evals = 0
+
+    while stale < LOCAL_SEARCH_STALE_ROUNDS:
+        rnd.shuffle(order)
+        improved = False
+        for x in order:
+            y = rnd.randrange(m - 1)
+            if y >= x: y += 1
+            a, b = rooms[x]
+            c, d = rooms[y]
+            base = score(a, b) + score(c, d)
+            s1 = score(a, c) + score(b, d)
+            s2 = score(a, d) + score(b, c)
+            if s1 > base and s1 >= s2:
+                rooms[x], rooms[y] = [a, c], [b, d]
+                improved = True
+            elif s2 > base:
+                rooms[x], rooms[y] = [a, d], [b, c]
+                improved = True
+
+            evals += 1
+            if evals % 1024 == 0 and time.monotonic() > deadline:
+                return rooms
+        stale = 0 if improved else stale + 1
+
+    return rooms
+
+
+# -----------------------------
+#  greedy 결과 개선
+# -----------------------------
+def optimize_assignment(cohort, matched, budget_sec):
+    """Phase 1 greedy 결과(matched = [(i, j, score)])를 성별 파티션별로 개선합니다.
+
+    반환: (개선된 matched, 통계 dict). 개선되지 않은 파티션은 greedy 결과를 그대로 둡니다.
+    """
+    started = time.monotonic()
+    deadline = started + max(0.0, budget_sec)
+
+    ids, gender = cohort["ids"], cohort["gender"]
+    members, class_scores = group_profile_classes(cohort)
+    class_of = [0] * len(ids)
+    for c, ms in enumerate(members):
+        for m in ms:
+            class_of[m] = c
+
+    def score(a, b):
+        if a is None or b is None: return 0
+        return class_scores[class_of[a]][class_of[b]]
+
+    # 같은 학생이 두 번 응답해 자기 자신과 묶인 방은 건드리지 않음
+    fixed = [p for p in matched if ids[p[0]] == ids[p[1]]]
+    used = {ids[i] for i, j, _ in matched} | {ids[j] for i, j, _ in matched}
+
+    partitions = {}
+    for i, j, _ in matched:
+        if ids[i] != ids[j]:
+            partitions.setdefault(gender[i], []).append([i, j])
+    seen = set(used)
+    for idx, sid in enumerate(ids):
+        if sid not in seen:
+            seen.add(sid)
+            partitions.setdefault(gender[idx], []).append([idx, None])
+
+    result = list(fixed)
+    stats = []
+    remaining_size = sum(len(r) for r in partitions.values())
+
+    for g, rooms in sorted(partitions.items()):
+        size = sum(1 for room in rooms for m in room if m is not None)
+        before = sum(score(a, b) for a, b in rooms)
+
+        # 남은 시간을 남은 파티션 크기 비율로 나눔
+        now = time.monotonic()
+        share = (deadline - now) * len(rooms) / remaining_size if remaining_size else 0
+        part_deadline = min(deadline, now + max(0.0, share))
+        remaining_size -= len(rooms)
+
+        method = "local_search"
+        candidate = None
+        if size <= EXACT_MATCH_LIMIT:
+            try:
+                candidate = solve_exact(rooms, score, part_deadline)
+                method = "exact"
+            except TimeoutError:
+                candidate = None
+
+        if candidate is None:
+            candidate = [list(room) for room in rooms]
+            improve_by_windows(candidate, score, part_deadline, EXACT_MATCH_LIMIT)
+            improve_by_swaps(candidate, score, part_deadline)
+
+        after = sum(score(a, b) for a, b in candidate)
+        if after < before:
+            candidate, after, method = rooms, before, "greedy"
+
+        for a, b in candidate:
+            if a is not None and b is not None:
+                result.append((min(a, b), max(a, b), score(a, b)))
+
+        stats.append({"size": size, "method": method, "greedyScore": before, "optimizedScore": after})
+
+    # greedy 와 같은 방 번호 규칙: 점수 내림차순, 동점은 인덱스 순
+    result.sort(key=lambda p: (-p[2], p[0], p[1]))
+
+    greedy_total = sum(p[2] for p in matched)
+    optimized_total = sum(p[2] for p in result)
+    return result, {
+        "greedyScore": greedy_total,
+        "optimizedScore": optimized_total,
+        "gain": optimized_total - greedy_total,
+        "elapsedSec": round(time.monotonic() - started, 3),
+        "partitions": stats,
+    }
@@ -0,0 +1,160 @@
+import os
+import traceback
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+
+from matching import greedy_match, match_preferences
+from optimizer import optimize_assignment
+from scoring import block_pairs_numpy, iter_ranked_pairs_numpy, rank_block_pairs, subset_cohort
+
+# numpy 엔진에서 파티션 인원이 이보다 많으면 점수 계산을 행 블록으로 나눠 여러 프로세스에서 수행
+PARALLEL_BLOCK_ROWS = int(os.environ.get("PARALLEL_BLOCK_ROWS", "2000"))
+
+
+# -----------------------------
+#  프로세스 실행
+# -----------------------------
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _run_task(func, args, conn):
+    try:
+        conn.send((True, func(*args)))
+    except Exception:
+        conn.send((False, traceback.format_exc()))
+    finally:
+        conn.close()
+
+def run_in_processes(func, tasks, max_workers=None):
+    """tasks(인자 튜플 목록)를 최대 max_workers 개 프로세스에서 실행하고 입력 순서대로 결과를 반환합니다.
+
+    Lambda 에는 /dev/shm 이 없어 multiprocessing.Pool / ProcessPoolExecutor 를 쓸 수 없으므로
+    Process + Pipe 로 직접 실행합니다.
+    """
+    max_workers = max_workers or available_cpus()
+    if max_workers <= 1 or len(tasks) <= 1:
+        return [func(*args) for args in tasks]
+
+    results = [None] * len(tasks)
+    pending = list(enumerate(tasks))
+    running = {}
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            idx, args = pending.pop(0)
+            recv_conn, send_conn = Pipe(duplex=False)
+            proc = Process(target=_run_task, args=(func, args, send_conn))
+            proc.start()
+            send_conn.close()
+            running[recv_conn] = (idx, proc)
+
+        for conn in wait(list(running)):
+            idx, proc = running.pop(conn)
+            # 결과를 먼저 받아야 큰 결과를 보내는 자식이 파이프에서 막히지 않음
+            try:
+                ok, value = conn.recv()
+            except EOFError:
+                ok, value = False, f"worker exited with code {proc.exitcode}"
+            proc.join()
+            conn.close()
+            if not ok:
+                for other, other_proc in running.values():
+                    other_proc.terminate()
+                raise RuntimeError(f"Parallel matching task failed:\n{value}")
+            results[idx] = value
+
+    return results
+
+
+# -----------------------------
+#  성별 파티션 병렬 매칭
+# -----------------------------
+def split_partitions(respondents, cohort):
+    """성별 코드별로 (전체 인덱스 목록, 응답자 목록, 부분 cohort) 를 성별 코드 순으로 반환합니다."""
+    partitions = {}
+    for idx, g in enumerate(cohort["gender"]):
+        partitions.setdefault(g, []).append(idx)
+
+    parts = []
+    for g in sorted(partitions):
+        indices = partitions[g]
+        parts.append((indices, [respondents[i] for i in indices], subset_cohort(cohort, indices)))
+    return parts
+
+def to_global_pairs(indices, local):
+    return [(indices[i], indices[j], s) for i, j, s in local]
+
+def match_partition(respondents, cohort, engine, optimize_budget):
+    matched = match_preferences(respondents, cohort, engine)
+    optimization = None
+    if optimize_budget is not None:
+        matched, optimization = optimize_assignment(cohort, matched, optimize_budget)
+    return matched, optimization
+
+def _row_bounds(n, parts):
+    # 상삼각 쌍 수가 비슷하도록 앞쪽 블록을 작게 자름
+    bounds = sorted({min(n, int(n * (1 - (1 - k / parts) ** 0.5))) for k in range(parts + 1)})
+    return list(zip(bounds, bounds[1:]))
+
+def _match_partition_blocks(respondents, cohort, engine, optimize_budget, max_workers):
+    blocks = run_in_processes(
+        block_pairs_numpy,
+        [(cohort, start, end) for start, end in _row_bounds(len(cohort["ids"]), max_workers * 2)],
+        max_workers,
+    )
+    ranked = rank_block_pairs(blocks)
+    matched = greedy_match(iter_ranked_pairs_numpy(cohort, ranked=ranked), cohort["ids"], cohort["gender"])
+    optimization = None
+    if optimize_budget is not None:
+        matched, optimization = optimize_assignment(cohort, matched, optimize_budget)
+    return matched, optimization
+
+def merge_optimization(stats):
+    stats = [s for s in stats if s]
+    if not stats:
+        return None
+    greedy_total = sum(s["greedyScore"] for s in stats)
+    optimized_total = sum(s["optimizedScore"] for s in stats)
+    return {
+        "greedyScore": greedy_total,
+        "optimizedScore": optimized_total,
+        "gain": optimized_total - greedy_total,
+        "elapsedSec": max(s["elapsedSec"] for s in stats),
+        "partitions": [p for s in stats for p in s["partitions"]],
+    }
+
+def match_parallel(respondents, cohort, engine, optimize_budget=None, max_workers=None):
+    """성별 파티션별로 프로세스를 나눠 매칭하고, 직렬 실행과 같은 순서로 합칩니다.
+
+    calc_score 는 성별이 다르면 -1 이므로 파티션끼리는 서로 영향이 없습니다.
+    결과는 (점수 내림차순, i, j) 로 정렬되어 직렬 경로와 방 번호가 같습니다.
+    optimize_budget 이 있으면 각 파티션이 병렬로 그 시간만큼 개선을 수행합니다.
+    """
+    max_workers = max_workers or available_cpus()
+    parts = split_partitions(respondents, cohort)
+
+    results = [None] * len(parts)
+    whole = []
+    for p, (indices, sub_respondents, sub_cohort) in enumerate(parts):
+        if engine == "numpy" and len(indices) > PARALLEL_BLOCK_ROWS:
+            results[p] = _match_partition_blocks(sub_respondents, sub_cohort, engine, optimize_budget, max_workers)
+        else:
+            whole.append(p)
+
+    outputs = run_in_processes(
+        match_partition,
+        [(parts[p][1], parts[p][2], engine, optimize_budget) for p in whole],
+        max_workers,
+    )
+    for p, output in zip(whole, outputs):
+        results[p] = output
+
+    matched = []
+    for (indices, _, _), (local, _) in zip(parts, results):
+        matched.extend(to_global_pairs(indices, local))
+    matched.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    return matched, merge_optimization([stats for _, stats in results])
@@ -0,0 +1,189 @@
+try:
+    import numpy as np
+except ImportError:  # numpy 레이어가 없는 환경에서는 루프 엔진만 사용
+    np = None
+
+from roomeya_common.scoring_rules import DEFAULT_SCORING_RULES, normalize_rules
+
+SCORE_BLOCK_SIZE = 1024
+
+# 폼에 점수 기준이 없을 때 쓰는 기준 (calc_score 와 같은 점수)
+DEFAULT_RULES = normalize_rules(DEFAULT_SCORING_RULES)
+
+
+# -----------------------------
+#  점수 계산 로직
+# -----------------------------
+def calc_bedtime_similarity(b1, b2):
+    similar_pairs = [("10to12", "12to2"), ("12to2", "after2")]
+    if b1 == b2: return True
+    for a, b in similar_pairs:
+        if (b1 == a and b2 == b) or (b1 == b and b2 == a): return True
+    return False
+
+def calc_score(a, b):
+    if a["gender"] != b["gender"]: return -1
+    score = 0
+    if a["smoking"] == b["smoking"]: score += 15
+    if a["wakeup"] == b["wakeup"]: score += 8
+    if calc_bedtime_similarity(a["bedtime"], b["bedtime"]): score += 8
+    if a["mbti"] and b["mbti"] and a["mbti"][0] == b["mbti"][0]: score += 3
+    return score
+
+
+# -----------------------------
+#  응답자 인코딩 (정수 코드 컬럼)
+# -----------------------------
+def _encode_column(values):
+    # 값 -> 정수 코드. 같은 값이면 같은 코드이므로 == 비교가 코드 비교로 바뀜
+    vocab = {}
+    codes = [vocab.setdefault(v, len(vocab)) for v in values]
+    return codes, list(vocab)
+
+def _transform(value, transform):
+    # initial: 첫 글자만 비교 (calc_score 의 mbti[0] 와 같이 빈 값은 None)
+    if transform == "initial":
+        return str(value)[0] if value else None
+    return value
+
+def _rule_match(rule):
+    # 값 쌍 -> 점수. 같은 값이면 weight, similar / similarity 에 있는 쌍이면 그 점수
+    weight, ignore_empty = rule["weight"], rule["ignoreEmpty"]
+    partial = {}
+    for a, b in rule["similar"]:
+        partial[(a, b)] = partial[(b, a)] = weight
+    for a, row in rule["similarity"].items():
+        for b, points in row.items():
+            partial[(a, b)] = partial[(b, a)] = points
+
+    def match(x, y):
+        if ignore_empty and (x is None or x == "" or y is None or y == ""): return 0
+        if x == y: return weight
+        return partial.get((x, y), 0)
+    return match
+
+def encode_respondents(respondents, rules=None):
+    """응답자 dict 목록을 성별 코드 + 항목별 코드 컬럼 + 점수 테이블로 변환합니다.
+
+    rules(normalize_rules 결과)의 항목마다 값 사전을 만들고, 값 쌍별 점수를 미리 계산한
+    정수 테이블로 컴파일합니다. 두 응답자의 점수는 sum(tables[f][columns[f][i]][columns[f][j]]) 이며
+    성별 코드가 다르면 -1 입니다. rules 가 없으면 기본 기준 (calc_score 와 동일).
+    """
+    rules = DEFAULT_RULES if rules is None else rules
+    gender, _ = _encode_column([r["gender"] for r in respondents])
+
+    columns = []
+    tables = []
+
+    for rule in rules:
+        values = [_transform(r.get(rule["field"]), rule["transform"]) for r in respondents]
+        codes, vocab = _encode_column(values)
+        match = _rule_match(rule)
+        columns.append(codes)
+        tables.append([[match(x, y) for y in vocab] for x in vocab])
+
+    return {
+        "ids": [r["studentId"] for r in respondents],
+        "gender": gender,
+        "columns": columns,
+        "tables": tables,
+    }
+
+def subset_cohort(cohort, indices):
+    # 코드/점수 테이블은 그대로 두고 일부 응답자만 뽑은 cohort
+    return {
+        "ids": [cohort["ids"][i] for i in indices],
+        "gender": [cohort["gender"][i] for i in indices],
+        "columns": [[c[i] for i in indices] for c in cohort["columns"]],
+        "tables": cohort["tables"],
+    }
+
+def pair_score(cohort, i, j):
+    if cohort["gender"][i] != cohort["gender"][j]: return -1
+    return sum(t[c[i]][c[j]] for c, t in zip(cohort["columns"], cohort["tables"]))
+
+def max_pair_score(cohort):
+    return sum(max((max(row) for row in t), default=0) for t in cohort["tables"])
+
+def score_dtype(cohort):
+    # 점수 배열은 가장 작은 정수형으로 (기본 기준은 최대 34 점이라 int8)
+    top = max_pair_score(cohort)
+    if top <= np.iinfo(np.int8).max: return np.int8
+    if top <= np.iinfo(np.int16).max: return np.int16
+    return np.int32
+
+
+# -----------------------------
+#  후보 쌍 정렬 (점수 내림차순, 동점은 (i, j) 순)
+# -----------------------------
+def iter_ranked_pairs_loop(respondents, cohort=None):
+    """기존 이중 루프 방식. 결과 비교용 기준 구현입니다.
+
+    cohort 를 주면 calc_score 대신 폼 점수 기준으로 컴파일된 테이블을 사용합니다.
+    """
+    potential_pairs = []
+    for i in range(len(respondents)):
+        for j in range(i + 1, len(respondents)):
+            if cohort is None:
+                score = calc_score(respondents[i], respondents[j])
+            else:
+                score = pair_score(cohort, i, j)
+            if score >= 0:
+                potential_pairs.append((i, j, score))
+
+    potential_pairs.sort(key=lambda x: x[2], reverse=True)
+    return iter(potential_pairs)
+
+def score_blocks(cohort, block_size=SCORE_BLOCK_SIZE, row_start=0, row_end=None):
+    """점수 행렬의 [row_start, row_end) 행을 block_size 행씩 잘라 (시작 행, 블록) 으로 반환합니다."""
+    n = len(cohort["ids"])
+    row_end = n if row_end is None else row_end
+    gender = np.asarray(cohort["gender"], dtype=np.int32)
+    columns = [np.asarray(c, dtype=np.int32) for c in cohort["columns"]]
+    dtype = np.int16 if score_dtype(cohort) != np.int32 else np.int32
+    tables = [np.asarray(t, dtype=dtype) for t in cohort["tables"]]
+
+    for start in range(row_start, row_end, block_size):
+        end = min(start + block_size, row_end)
+        block = np.zeros((end - start, n), dtype=dtype)
+        for col, table in zip(columns, tables):
+            block += table[col[start:end, None], col[None, :]]
+        block[gender[start:end, None] != gender[None, :]] = -1
+        yield start, block
+
+def block_pairs_numpy(cohort, row_start, row_end, block_size=SCORE_BLOCK_SIZE):
+    """row_start <= i < row_end 행의 상삼각 쌍을 (i, j, score) 배열로 반환합니다 (정렬 전, (i, j) 순)."""
+    dtype = score_dtype(cohort)
+    rows, cols, scores = [], [], []
+    for start, block in score_blocks(cohort, block_size, row_start, row_end):
+        r, c = np.nonzero(block >= 0)
+        upper = c > r + start
+        r, c = r[upper] + start, c[upper]
+        rows.append(r.astype(np.int32))
+        cols.append(c.astype(np.int32))
+        scores.append(block[r - start, c].astype(dtype))
+
+    if not rows:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=dtype)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores)
+
+def rank_block_pairs(blocks):
+    """행 순서대로 나열된 block_pairs_numpy 결과들을 합쳐 점수 내림차순으로 정렬합니다."""
+    i = np.concatenate([b[0] for b in blocks])
+    j = np.concatenate([b[1] for b in blocks])
+    s = np.concatenate([b[2] for b in blocks])
+
+    # 블록이 이미 (i, j) 순서이므로 점수에 대해 stable 정렬만 하면 기존 sort 와 같은 순서
+    order = np.argsort(-s, kind="stable")
+    return i[order], j[order], s[order]
+
+def ranked_pairs_numpy(cohort, block_size=SCORE_BLOCK_SIZE):
+    """상삼각(j > i) 의 점수 >= 0 쌍을 (i, j, score) 배열로 정렬해 반환합니다."""
+    return rank_block_pairs([block_pairs_numpy(cohort, 0, len(cohort["ids"]), block_size)])
+
+def iter_ranked_pairs_numpy(cohort, block_size=SCORE_BLOCK_SIZE, ranked=None):
+    i, j, s = ranked if ranked is not None else ranked_pairs_numpy(cohort, block_size)
+    # 전체를 한 번에 tolist() 하면 파이썬 객체가 쌍 수만큼 생기므로 조금씩 변환
+    for start in range(0, len(s), block_size * block_size):
+        end = start + block_size * block_size
+        yield from zip(i[start:end].tolist(), j[start:end].tolist(), s[start:end].tolist())
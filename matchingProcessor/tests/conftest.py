@@ -0,0 +1,37 @@
+import os
+import random
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+# 함수마다 lambda_function 이 있으므로 다른 함수의 테스트와 같이 돌 때 가리지 않도록 뒤에 추가
+# (scoring / matching 등 이 함수의 모듈 이름은 겹치지 않음)
+sys.path.append(os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "layers", "roomeya-common", "python"))
+
+# 모듈 수준 boto3 클라이언트 생성에 필요한 리전 / 자격 증명 (실제 계정에는 접근하지 않음)
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+# 가상 응답 값 (빈 mbti / 유사 취침 시간이 섞이도록)
+ANSWER_VALUES = {
+    "smoking": ["no", "no", "no", "yes"],
+    "wakeup": ["before7", "7to9", "7to9", "after9"],
+    "bedtime": ["before10", "10to12", "12to2", "after2"],
+    "mbti": ["ENFP", "ISTJ", "INTP", "ESFJ", ""],
+}
+
+
+@pytest.fixture
+def make_respondents():
+    """시드가 같으면 같은 응답자 목록 ({studentId, gender, 응답 항목...}) 을 만드는 함수."""
+    def make(n, seed=0, genders=("남자", "여자")):
+        rnd = random.Random(seed)
+        return [
+            dict({"studentId": f"2024{i:05d}", "gender": rnd.choice(genders)},
+                 **{field: rnd.choice(values) for field, values in ANSWER_VALUES.items()})
+            for i in range(n)
+        ]
+    return make
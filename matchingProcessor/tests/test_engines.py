@@ -0,0 +1,84 @@
+"""Phase 1 엔진이 기존 이중 루프(iter_ranked_pairs_loop) 와 같은 후보 순서 / 같은 방을 만드는지"""
+import json
+
+import pytest
+
+from matching import greedy_match, iter_ranked_pairs_stream, match_preferences, match_stream_levels
+from scoring import encode_respondents, iter_ranked_pairs_loop, iter_ranked_pairs_numpy, np
+
+SEEDS = (0, 1, 2)
+
+
+def loop_matched(respondents, cohort):
+    return greedy_match(iter_ranked_pairs_loop(respondents), cohort["ids"], cohort["gender"])
+
+
+@pytest.mark.skipif(np is None, reason="numpy engine requires numpy")
+@pytest.mark.parametrize("seed", SEEDS)
+def test_numpy_ranked_pairs_match_loop(make_respondents, seed):
+    respondents = make_respondents(150, seed)
+    cohort = encode_respondents(respondents)
+
+    assert list(iter_ranked_pairs_numpy(cohort, block_size=32)) == list(iter_ranked_pairs_loop(respondents))
+
+
+@pytest.mark.skipif(np is None, reason="numpy engine requires numpy")
+@pytest.mark.parametrize("seed", SEEDS)
+def test_numpy_engine_matches_loop(make_respondents, seed):
+    respondents = make_respondents(301, seed)
+    cohort = encode_respondents(respondents)
+
+    assert match_preferences(respondents, cohort, "numpy") == loop_matched(respondents, cohort)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_profile_engine_matches_loop(make_respondents, seed):
+    respondents = make_respondents(301, seed)
+    cohort = encode_respondents(respondents)
+
+    assert match_preferences(respondents, cohort, "profile") == loop_matched(respondents, cohort)
+
+
+def test_profile_engine_matches_loop_with_duplicate_responses(make_respondents):
+    # 같은 학생이 두 번 응답한 경우 (클래스 안 두 명씩 묶기 대신 대기열 경로)
+    respondents = make_respondents(120, seed=3)
+    respondents += [dict(r) for r in respondents[:10]]
+    cohort = encode_respondents(respondents)
+
+    assert match_preferences(respondents, cohort, "profile") == loop_matched(respondents, cohort)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_stream_ranked_pairs_match_loop(make_respondents, seed):
+    respondents = make_respondents(150, seed)
+    cohort = encode_respondents(respondents)
+
+    assert list(iter_ranked_pairs_stream(cohort)) == list(iter_ranked_pairs_loop(respondents))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_stream_engine_matches_loop(make_respondents, seed):
+    respondents = make_respondents(301, seed)
+    cohort = encode_respondents(respondents)
+
+    assert match_preferences(respondents, cohort, "stream") == loop_matched(respondents, cohort)
+
+
+@pytest.mark.parametrize("stop_after", (1, 3, 6))
+def test_stream_levels_resume_from_saved_state(make_respondents, stop_after):
+    respondents = make_respondents(301, seed=4, genders=("남자",))
+    cohort = encode_respondents(respondents)
+
+    # stop_after 구간까지 진행한 상태를 체크포인트처럼 JSON 으로 저장했다가 이어서 진행
+    used, matched = set(), []
+    for level in match_stream_levels(cohort, used, matched):
+        if level == stop_after:
+            break
+    saved = json.loads(json.dumps({"level": level, "used": sorted(used), "matched": matched}))
+
+    used = set(saved["used"])
+    matched = [tuple(pair) for pair in saved["matched"]]
+    for _ in match_stream_levels(cohort, used, matched, saved["level"]):
+        pass
+
+    assert matched == loop_matched(respondents, cohort)
@@ -0,0 +1,221 @@
+"""matchingProcessor 작업 재개 / 세대 게시 / 정리 (DynamoDB / S3 는 moto)
+
+저장(persist) 도중 시간이 부족해 멈춘 작업을 같은 jobId 로 이어서 실행했을 때
+세대 하나만 게시되고 지난 세대 / 게시하지 못한 세대의 방이 남지 않는지 확인합니다.
+"""
+import importlib.util
+import json
+import os
+import random
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+
+import checkpoint  # noqa: E402
+import export  # noqa: E402
+from roomeya_common import results, snapshot  # noqa: E402
+
+# 다른 함수의 lambda_function 과 섞이지 않도록 다른 이름으로 불러옴
+spec = importlib.util.spec_from_file_location(
+    "matching_lambda", os.path.join(os.path.dirname(__file__), "..", "lambda_function.py")
+)
+matching_lambda = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(matching_lambda)
+
+BUCKET = "roomeya-export"
+STUDENTS = 40
+
+
+class Context:
+    """expired 가 되면 남은 시간이 0 인 Lambda context."""
+
+    def __init__(self):
+        self.expired = False
+
+    def get_remaining_time_in_millis(self):
+        return 0 if self.expired else 900000
+
+
+def create_table(name, key, form_index=True):
+    params = {}
+    attributes = [{"AttributeName": key, "AttributeType": "S"}]
+    if form_index:
+        attributes.append({"AttributeName": "formId", "AttributeType": "S"})
+        params["GlobalSecondaryIndexes"] = [{
+            "IndexName": "formId-index",
+            "KeySchema": [{"AttributeName": "formId", "KeyType": "HASH"}],
+            "Projection": {"ProjectionType": "ALL"},
+        }]
+    boto3.resource("dynamodb").create_table(
+        TableName=name, KeySchema=[{"AttributeName": key, "KeyType": "HASH"}],
+        AttributeDefinitions=attributes, BillingMode="PAY_PER_REQUEST", **params
+    )
+
+
+def seed_form(form_id, seed=0):
+    rnd = random.Random(seed)
+    dynamodb = boto3.resource("dynamodb")
+    with dynamodb.Table("Roomeya-Students").batch_writer() as students, \
+            dynamodb.Table("Roomeya-FormResponses").batch_writer() as responses:
+        for i in range(STUDENTS):
+            sid = f"{form_id}-{i:03d}"
+            students.put_item(Item={
+                "studentId": sid, "name": f"학생{i}", "gender": rnd.choice(["남자", "여자"]),
+                "email": f"s{i}@example.com", "formId": form_id,
+            })
+            if i % 5 == 4:
+                continue  # 미응답
+            responses.put_item(Item={"responseId": f"{sid}-r", "formId": form_id, "studentId": sid, "answers": {
+                "smoking": rnd.choice(["yes", "no"]), "wakeup": rnd.choice(["before7", "7to9"]),
+                "bedtime": rnd.choice(["10to12", "12to2", "after2"]), "mbti": rnd.choice(["ENFP", "ISTJ", ""]),
+            }})
+    dynamodb.Table("Roomeya-Forms").put_item(Item={"formId": form_id, "completedCount": STUDENTS * 4 // 5})
+
+
+@pytest.fixture(autouse=True)
+def aws(monkeypatch):
+    with moto.mock_aws():
+        create_table("Roomeya-Forms", "formId", form_index=False)
+        create_table("Roomeya-Students", "studentId")
+        create_table("Roomeya-FormResponses", "responseId")
+        create_table("Roomeya-Results", "roomId")
+        boto3.client("s3").create_bucket(
+            Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "ap-northeast-2"}
+        )
+        # 모듈 수준 클라이언트는 mock 밖에서 만들어졌으므로 바꿔 끼움
+        monkeypatch.setattr(matching_lambda, "dynamodb", boto3.resource("dynamodb"))
+        for module in (checkpoint, export, results, snapshot):
+            monkeypatch.setattr(module, "s3", boto3.client("s3"))
+        monkeypatch.setattr(matching_lambda, "PERSIST_CHUNK", 5)
+        seed_form("form-1")
+        yield
+
+
+def run(event, context=None):
+    response = matching_lambda.lambda_handler(event, context or Context())
+    return response["statusCode"], json.loads(response["body"])
+
+
+def stop_after_first_chunk(monkeypatch, context):
+    # 방을 한 묶음 쓰고 진행 상황을 저장한 직후 시간이 다 된 것으로 만듦
+    save = matching_lambda.save_checkpoint
+
+    def save_and_expire(formId, jobId, name, data):
+        save(formId, jobId, name, data)
+        if name == "progress":
+            context.expired = True
+
+    monkeypatch.setattr(matching_lambda, "save_checkpoint", save_and_expire)
+
+
+def result_items(form_id="form-1"):
+    items = boto3.resource("dynamodb").Table("Roomeya-Results").scan()["Items"]
+    return [item for item in items if item["formId"] == form_id]
+
+
+def pointer(form_id="form-1"):
+    return results.current_generation(boto3.resource("dynamodb").Table("Roomeya-Forms"), form_id)
+
+
+def rooms_of(items):
+    return sorted((results.display_room_id(i["roomId"]), tuple(i["members"]), int(i["score"])) for i in items)
+
+
+def job_keys():
+    listed = boto3.client("s3").list_objects_v2(Bucket=BUCKET, Prefix="matching-jobs/")
+    return [obj["Key"] for obj in listed.get("Contents", [])]
+
+
+def test_resume_at_persist_publishes_exactly_one_generation(monkeypatch):
+    status, first = run({"formId": "form-1"})
+    assert status == 200 and first["published"]
+
+    context = Context()
+    stop_after_first_chunk(monkeypatch, context)
+    status, paused = run({"formId": "form-1"}, context)
+
+    assert status == 202 and paused["phase"] == "persist"
+    # 멈춘 동안에도 조회 쪽은 이전 세대를 그대로 봄
+    assert pointer() == first["generation"]
+    assert len([i for i in result_items() if i["generation"] != first["generation"]]) == 5
+
+    monkeypatch.setattr(matching_lambda, "save_checkpoint", checkpoint.save_checkpoint)
+    status, done = run({"formId": "form-1", "jobId": paused["jobId"]})
+
+    assert status == 200 and done["published"] and done["jobId"] == paused["jobId"]
+    items = result_items()
+    assert pointer() == done["generation"]
+    assert {item["generation"] for item in items} == {done["generation"]}
+    assert len(items) == done["totalRooms"]
+    members = [m for item in items for m in item["members"]]
+    assert sorted(members) == [f"form-1-{i:03d}" for i in range(STUDENTS)]
+    # 완료 응답만 남고 이전 작업의 응답 / 이번 작업의 체크포인트는 정리됨
+    assert job_keys() == [checkpoint.job_key("form-1", paused["jobId"], "status")]
+
+
+def test_resumed_rooms_match_an_uninterrupted_run(monkeypatch):
+    seed_form("form-2")
+    status, whole = run({"formId": "form-2"})
+    assert status == 200
+
+    context = Context()
+    stop_after_first_chunk(monkeypatch, context)
+    _, paused = run({"formId": "form-1"}, context)
+    monkeypatch.setattr(matching_lambda, "save_checkpoint", checkpoint.save_checkpoint)
+    run({"formId": "form-1", "jobId": paused["jobId"]})
+
+    # 같은 응답 데이터 (학번 접두사만 다름) 이므로 방 번호 / 점수 / 멤버 순번이 같아야 함
+    def normalized(form_id):
+        return [(rid, tuple(m.split("-")[-1] for m in members), score)
+                for rid, members, score in rooms_of(result_items(form_id))]
+
+    assert normalized("form-1") == normalized("form-2")
+
+
+def test_resume_rewrites_rooms_deleted_in_between(monkeypatch):
+    context = Context()
+    stop_after_first_chunk(monkeypatch, context)
+    _, paused = run({"formId": "form-1"}, context)
+    monkeypatch.setattr(matching_lambda, "save_checkpoint", checkpoint.save_checkpoint)
+
+    table = boto3.resource("dynamodb").Table("Roomeya-Results")
+    written = result_items()
+    for item in written[:3]:
+        table.delete_item(Key={"roomId": item["roomId"]})
+
+    status, done = run({"formId": "form-1", "jobId": paused["jobId"]})
+
+    assert status == 200 and done["published"]
+    assert {i["roomId"] for i in written} <= {i["roomId"] for i in result_items()}
+    assert len(result_items()) == done["totalRooms"]
+
+
+def test_losing_publish_deletes_its_own_generation(monkeypatch):
+    context = Context()
+    stop_after_first_chunk(monkeypatch, context)
+    _, older = run({"formId": "form-1"}, context)
+    monkeypatch.setattr(matching_lambda, "save_checkpoint", checkpoint.save_checkpoint)
+
+    # 그 사이 시작한 더 새로운 실행이 먼저 게시
+    _, newer = run({"formId": "form-1"})
+    status, late = run({"formId": "form-1", "jobId": older["jobId"]})
+
+    assert status == 200 and not late["published"]
+    assert pointer() == newer["generation"]
+    items = result_items()
+    assert {item["generation"] for item in items} == {newer["generation"]}
+    assert len(items) == newer["totalRooms"]
+    assert results.load_result_document("form-1", late["generation"]) is None
+    assert results.load_result_document("form-1", newer["generation"]) is not None
+
+
+def test_completed_job_returns_saved_response():
+    _, done = run({"formId": "form-1", "jobId": "job-1"})
+
+    status, again = run({"formId": "form-1", "jobId": "job-1"})
+
+    assert status == 200 and again == done
+    assert len(result_items()) == done["totalRooms"]
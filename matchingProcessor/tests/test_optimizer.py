@@ -0,0 +1,69 @@
+"""optimize_assignment: greedy 보다 점수가 낮아지지 않고, 결과가 올바른 배정인지"""
+import pytest
+
+import optimizer
+from matching import match_preferences
+from optimizer import optimize_assignment
+from scoring import encode_respondents, pair_score
+
+
+def assert_valid(cohort, matched):
+    # 한 학생은 한 방에만, 같은 성별끼리, 점수는 점수 테이블 그대로
+    members = [m for i, j, _ in matched for m in (i, j)]
+    assert len(members) == len(set(members))
+    for i, j, score in matched:
+        assert i < j
+        assert score == pair_score(cohort, i, j) >= 0
+    assert matched == sorted(matched, key=lambda p: (-p[2], p[0], p[1]))
+
+
+@pytest.mark.parametrize("seed", (0, 1, 2))
+@pytest.mark.parametrize("exact_limit", (300, 20))
+def test_optimizer_never_scores_below_greedy(monkeypatch, make_respondents, seed, exact_limit):
+    # exact_limit 20 이면 두 파티션 모두 지역 탐색 경로
+    monkeypatch.setattr(optimizer, "EXACT_MATCH_LIMIT", exact_limit)
+    respondents = make_respondents(160, seed)
+    cohort = encode_respondents(respondents)
+    greedy = match_preferences(respondents, cohort, "stream")
+
+    matched, stats = optimize_assignment(cohort, greedy, budget_sec=5)
+
+    assert_valid(cohort, matched)
+    assert stats["greedyScore"] == sum(p[2] for p in greedy)
+    assert stats["optimizedScore"] == sum(p[2] for p in matched) >= stats["greedyScore"]
+    assert {p["method"] for p in stats["partitions"]} <= {"exact", "local_search", "greedy"}
+
+
+def test_zero_budget_keeps_greedy_score(make_respondents):
+    respondents = make_respondents(80, seed=4)
+    cohort = encode_respondents(respondents)
+    greedy = match_preferences(respondents, cohort, "stream")
+
+    matched, stats = optimize_assignment(cohort, greedy, budget_sec=0)
+
+    assert_valid(cohort, matched)
+    assert stats["optimizedScore"] >= stats["greedyScore"]
+
+
+def best_total(cohort, people):
+    # 모든 짝짓기를 나열한 최댓값 (작은 인원에서 정확 매칭 확인용)
+    if len(people) < 2:
+        return 0
+    first, rest = people[0], people[1:]
+    best = best_total(cohort, rest)  # first 가 혼자 남는 경우 (홀수 인원)
+    for k, other in enumerate(rest):
+        best = max(best, pair_score(cohort, first, other) + best_total(cohort, rest[:k] + rest[k + 1:]))
+    return best
+
+
+@pytest.mark.parametrize("seed", (5, 6, 7))
+def test_exact_pass_reaches_brute_force_optimum(make_respondents, seed):
+    respondents = make_respondents(9, seed, genders=("남자",))
+    cohort = encode_respondents(respondents)
+    greedy = match_preferences(respondents, cohort, "stream")
+
+    matched, stats = optimize_assignment(cohort, greedy, budget_sec=5)
+
+    assert stats["partitions"][0]["method"] in ("exact", "greedy")
+    assert sum(p[2] for p in matched) == best_total(cohort, list(range(len(respondents))))
+    assert len(matched) == 4
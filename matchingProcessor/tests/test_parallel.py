@@ -0,0 +1,48 @@
+"""match_parallel: 성별 파티션 / 행 블록을 프로세스로 나눠도 직렬 loop greedy 와 같은 방"""
+import pytest
+
+import parallel
+from matching import greedy_match
+from parallel import match_parallel
+from scoring import encode_respondents, iter_ranked_pairs_loop, np
+
+ENGINES = ["loop", "stream", "profile"] + (["numpy"] if np is not None else [])
+
+
+def loop_matched(respondents, cohort):
+    return greedy_match(iter_ranked_pairs_loop(respondents), cohort["ids"], cohort["gender"])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("max_workers", (1, 2))
+def test_parallel_matches_serial_loop(make_respondents, engine, max_workers):
+    respondents = make_respondents(241, seed=11, genders=("남자", "여자", "기타"))
+    cohort = encode_respondents(respondents)
+
+    matched, optimization = match_parallel(respondents, cohort, engine, max_workers=max_workers)
+
+    assert matched == loop_matched(respondents, cohort)
+    assert optimization is None
+
+
+@pytest.mark.skipif(np is None, reason="numpy engine requires numpy")
+def test_numpy_row_blocks_match_serial_loop(monkeypatch, make_respondents):
+    # 파티션을 행 블록으로 나눠 여러 프로세스에서 점수 계산하는 경로
+    monkeypatch.setattr(parallel, "PARALLEL_BLOCK_ROWS", 40)
+    respondents = make_respondents(241, seed=12)
+    cohort = encode_respondents(respondents)
+
+    matched, _ = match_parallel(respondents, cohort, "numpy", max_workers=3)
+
+    assert matched == loop_matched(respondents, cohort)
+
+
+def test_parallel_optimization_is_merged_per_partition(make_respondents):
+    respondents = make_respondents(120, seed=13)
+    cohort = encode_respondents(respondents)
+
+    matched, optimization = match_parallel(respondents, cohort, "stream", optimize_budget=2, max_workers=2)
+
+    assert optimization["optimizedScore"] == sum(p[2] for p in matched) >= optimization["greedyScore"]
+    assert optimization["greedyScore"] == sum(p[2] for p in loop_matched(respondents, cohort))
+    assert len(optimization["partitions"]) == 2
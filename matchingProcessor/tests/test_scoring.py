@@ -0,0 +1,59 @@
+"""폼 점수 기준을 정수 테이블로 컴파일한 점수가 기존 calc_score / 기준 정의와 같은지"""
+import pytest
+
+from matching import greedy_match, match_preferences
+from roomeya_common.scoring_rules import normalize_rules
+from scoring import calc_score, encode_respondents, iter_ranked_pairs_loop, np, pair_score
+
+CUSTOM_RULES = normalize_rules([
+    {"field": "smoking", "weight": 10},
+    {"field": "wakeup", "weight": 6, "similarity": {"before7": {"7to9": 3}, "7to9": {"after9": 2}}},
+    {"field": "bedtime", "weight": 5, "similar": [["10to12", "12to2"]]},
+    {"field": "mbti", "weight": 2, "transform": "initial", "ignoreEmpty": True},
+])
+ENGINES = ["stream", "profile"] + (["numpy"] if np is not None else [])
+
+
+def expected_score(rules, a, b):
+    # 기준 정의를 그대로 따라 계산한 점수
+    if a["gender"] != b["gender"]: return -1
+    total = 0
+    for rule in rules:
+        x, y = a.get(rule["field"]), b.get(rule["field"])
+        if rule["transform"] == "initial":
+            x, y = (str(x)[0] if x else None), (str(y)[0] if y else None)
+        if rule["ignoreEmpty"] and (x in (None, "") or y in (None, "")): continue
+        if x == y:
+            total += rule["weight"]
+        elif [x, y] in rule["similar"] or [y, x] in rule["similar"]:
+            total += rule["weight"]
+        else:
+            total += rule["similarity"].get(x, {}).get(y, rule["similarity"].get(y, {}).get(x, 0))
+    return total
+
+
+def test_default_tables_equal_calc_score(make_respondents):
+    respondents = make_respondents(80, seed=21)
+    cohort = encode_respondents(respondents)
+
+    for i in range(len(respondents)):
+        for j in range(len(respondents)):
+            assert pair_score(cohort, i, j) == calc_score(respondents[i], respondents[j])
+
+
+def test_custom_tables_follow_rule_definition(make_respondents):
+    respondents = make_respondents(80, seed=22)
+    cohort = encode_respondents(respondents, CUSTOM_RULES)
+
+    for i in range(len(respondents)):
+        for j in range(len(respondents)):
+            assert pair_score(cohort, i, j) == expected_score(CUSTOM_RULES, respondents[i], respondents[j])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_match_loop_with_custom_rules(make_respondents, engine):
+    respondents = make_respondents(301, seed=23)
+    cohort = encode_respondents(respondents, CUSTOM_RULES)
+    expected = greedy_match(iter_ranked_pairs_loop(respondents, cohort), cohort["ids"], cohort["gender"])
+
+    assert match_preferences(respondents, cohort, engine) == expected
@@ -1,6 +1,15 @@
+import base64
+import binascii
+import hashlib
 import json
+from functools import lru_cache
 import boto3
 from boto3.dynamodb.conditions import Attr
+from roomeya_common.dynamo import batch_get_items, query_index_page
+from roomeya_common.results import (
+    FORM_GENDER_ATTR, FORM_GENDER_INDEX, GENERATION_ATTR, RESULT_MEMBER_FIELDS,
+    build_result_room, build_result_rooms, form_gender_key, iter_results, load_result_document
+)
 
 dynamodb = boto3.resource("dynamodb")
 
@@ -8,6 +17,143 @@ results_table = dynamodb.Table("Roomeya-Results")
 students_table = dynamodb.Table("Roomeya-Students")
 forms_table = dynamodb.Table("Roomeya-Forms")
 
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag"}
+
+# 페이지 조회 (?gender=male&limit=50&cursor=...) 의 기본 / 최대 방 수
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+GENDERS = ("male", "female")
+# 웜 컨테이너에 보관하는 결과 문서 수 (세대별 문서는 한 번 쓰면 바뀌지 않음)
+DOCUMENT_CACHE_SIZE = 8
+
+
+# -----------------------------
+#  ETag
+# -----------------------------
+def get_header(event, name):
+    # REST API 는 원래 대소문자, HTTP API 는 소문자로 헤더를 넘김
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+def etag_matches(event, etag):
+    header = get_header(event, "If-None-Match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+def not_modified(etag):
+    return {
+        "statusCode": 304,
+        "headers": dict(CORS_HEADERS, ETag=etag, **{"Cache-Control": "no-cache"}),
+        "body": ""
+    }
+
+
+# -----------------------------
+#  방 목록 (결과 문서 우선, 없으면 테이블에서)
+# -----------------------------
+def fetch_members(rooms):
+    # 방 학생을 모아 중복 없이 BatchGetItem 으로 한 번에 조회 (방마다 get_item 2번 대신)
+    member_ids = [sid for room in rooms for sid in room.get("members", [])[:2]]
+    try:
+        return batch_get_items(students_table, "studentId", member_ids, RESULT_MEMBER_FIELDS)
+    except Exception as e:
+        print(f"⚠️ Student Lookup Warning: {str(e)}")
+        return {}
+
+def load_live_rooms(form_id, generation):
+    # 결과 문서가 없는 폼 (이전 버전 matchingProcessor 로 매칭했거나 문서 저장 실패)
+    items = list(iter_results(results_table, form_id, generation))
+    return build_result_rooms(items, fetch_members(items))
+
+@lru_cache(maxsize=DOCUMENT_CACHE_SIZE)
+def cached_result_document(form_id, generation):
+    return load_result_document(form_id, generation)
+
+def load_document(form_id, generation):
+    # matchingProcessor 가 세대별로 만들어 둔 문서 (없거나 읽지 못하면 None)
+    if not generation:
+        return None
+    try:
+        return cached_result_document(form_id, generation)
+    except Exception as e:
+        print(f"⚠️ Result Document Warning: {str(e)}")
+        return None
+
+def load_all_rooms(form_id, generation):
+    # 결과 문서, 없으면 현재 세대의 방을 직접 조회
+    document = load_document(form_id, generation)
+    if document is not None:
+        return document["maleResults"], document["femaleResults"]
+    return load_live_rooms(form_id, generation)
+
+
+# -----------------------------
+#  페이지 / 학생별 조회
+# -----------------------------
+def encode_cursor(generation, position):
+    raw = json.dumps({"g": generation, "p": position}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(data, dict):
+        raise ValueError("invalid cursor")
+    # 위치: GSI 의 LastEvaluatedKey 또는 전체 목록에서의 순번
+    position = data.get("p")
+    valid_key = isinstance(position, dict) and all(isinstance(v, str) for v in position.values())
+    valid_offset = isinstance(position, int) and not isinstance(position, bool) and position >= 0
+    if not (valid_key or valid_offset):
+        raise ValueError("invalid cursor")
+    return data.get("g"), position
+
+def load_page(form_id, generation, gender, limit, position):
+    """(방 목록, 다음 위치) 를 반환합니다. 다음 위치가 None 이면 마지막 페이지."""
+    # formGender GSI 가 있으면 해당 성별의 방을 방 번호순으로 limit 개만 읽음
+    if generation and not isinstance(position, int):
+        page = query_index_page(
+            results_table, FORM_GENDER_INDEX, FORM_GENDER_ATTR,
+            form_gender_key(form_id, generation, gender), limit, position
+        )
+        if page is not None:
+            items, last_key = page
+            students = fetch_members(items)
+            return [build_result_room(item, students) for item in items], last_key
+
+    # 인덱스가 없거나 이전 세대 결과: 전체 목록에서 잘라냄 (다음 위치는 순번)
+    offset = position if isinstance(position, int) else 0
+    male_results, female_results = load_all_rooms(form_id, generation)
+    rooms = male_results if gender == "male" else female_results
+    next_offset = offset + limit if offset + limit < len(rooms) else None
+    return rooms[offset:offset + limit], next_offset
+
+def find_student_room(form_id, generation, student_id):
+    # 결과 문서에서 찾으면 방 아이템을 읽지 않음
+    document = load_document(form_id, generation)
+    if document is not None:
+        for room in document["maleResults"] + document["femaleResults"]:
+            if any(member and member.get("studentId") == student_id
+                   for member in (room["memberA"], room["memberB"])):
+                return room
+        return None
+
+    # 문서가 없는 폼: members 필터 조회 (필터는 읽은 뒤 적용되므로 폼의 방을 모두 읽음)
+    items = iter_results(
+        results_table, form_id, generation,
+        FilterExpression=Attr("members").contains(student_id)
+    )
+    room = next(iter(items), None)
+    if room is None:
+        return None
+    return build_result_room(room, fetch_members([room]))
+
+
 def lambda_handler(event, context):
 
     # 1) Path Parameter 확인
@@ -23,92 +169,96 @@ def lambda_handler(event, context):
 
     # 2) 폼 통계 정보 가져오기
     form_item = forms_table.get_item(Key={"formId": form_id}).get("Item", {})
-    
+
     total_participants = int(form_item.get("totalParticipants", 0))
     completed_count = int(form_item.get("completedCount", 0))
-    
+
     # 0 미만 방지
     not_completed = max(0, total_participants - completed_count)
 
-    # 3) 매칭 결과 조회
-    response = results_table.scan(
-        FilterExpression=Attr("formId").eq(form_id)
-    )
-    items = response.get("Items", [])
-
-    male_results = []
-    female_results = []
-
-    # 4) 데이터 가공
-    for item in items:
-        members = item.get("members", [])
-        
-        # DB의 "uuid_room-0001" -> 프론트용 "room-0001" 로 변환
-        raw_room_id = item.get("roomId", "")
-        if "_" in raw_room_id:
-            display_room_id = raw_room_id.split("_")[-1]
-        else:
-            display_room_id = raw_room_id
-
-        memberA = None
-        memberB = None
-
-        # --- A 학생 ---
-        if len(members) > 0:
-            sidA = members[0]
-            try:
-                resA = students_table.get_item(Key={"studentId": sidA})
-                memberA = resA.get("Item", {"studentId": sidA})
-            except:
-                memberA = {"studentId": sidA}
-
-        # --- B 학생 ---
-        if len(members) > 1:
-            sidB = members[1]
-            try:
-                resB = students_table.get_item(Key={"studentId": sidB})
-                memberB = resB.get("Item", {"studentId": sidB})
-            except:
-                memberB = {"studentId": sidB}
-
-        # 프론트엔드 반환 객체
-        room_result = {
-            "roomId": display_room_id,   # 깔끔한 ID
-            "score": item.get("score", 0),
-            "memberA": memberA,
-            "memberB": memberB
-        }
+    generation = form_item.get(GENERATION_ATTR)
 
-        # 5) 성별 분류
-        gender = memberA.get("gender", "") if memberA else ""
+    # 3) 쿼리 검증 (잘못된 요청은 ETag 가 같아도 304 가 아니라 400 / 409)
+    query = event.get("queryStringParameters") or {}
+    student_id = query.get("studentId")
+    gender = query.get("gender")
+    paged = not student_id and (gender or query.get("limit") or query.get("cursor"))
 
-        if gender.startswith("남"):
-            male_results.append(room_result)
-        elif gender.startswith("여"):
-            female_results.append(room_result)
-        else:
-            # 예외처리 (프론트 에러 방지)
-            female_results.append(room_result)
+    if paged:
+        # 성별 페이지 (cursor 는 이전 응답의 nextCursor)
+        try:
+            if gender not in GENDERS:
+                raise ValueError("gender must be male or female")
+            limit = int(query.get("limit") or DEFAULT_PAGE_SIZE)
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            position = None
+            if query.get("cursor"):
+                cursor_generation, position = decode_cursor(query["cursor"])
+                if cursor_generation != generation:
+                    # 그 사이 매칭이 다시 돌았으면 처음부터 다시 읽어야 함
+                    return {
+                        "statusCode": 409,
+                        "headers": CORS_HEADERS,
+                        "body": json.dumps({"error": "cursor belongs to an older matching result"})
+                    }
+        except ValueError as e:
+            return {
+                "statusCode": 400,
+                "headers": CORS_HEADERS,
+                "body": json.dumps({"error": str(e)})
+            }
 
-    # 방 번호순 정렬 (room-0001, room-0002 ...)
-    male_results.sort(key=lambda x: x["roomId"])
-    female_results.sort(key=lambda x: x["roomId"])
+    # 4) 세대 + 제출 통계가 같으면 응답도 같음 -> 결과를 읽기 전에 304
+    etag = None
+    if generation:
+        etag = f'"{generation}-{total_participants}-{completed_count}"'
+        if etag_matches(event, etag):
+            return not_modified(etag)
 
-    # 6) 최종 응답
+    # 5) 매칭 결과
     response_body = {
         "formId": form_id,
         "totalParticipants": total_participants,
         "completedCount": completed_count,
-        "notCompletedCount": not_completed,
-        "maleResults": male_results,
-        "femaleResults": female_results
+        "notCompletedCount": not_completed
     }
 
+    if student_id:
+        # 학생 한 명의 방만
+        room = find_student_room(form_id, generation, student_id)
+        if room is None:
+            return {
+                "statusCode": 404,
+                "headers": CORS_HEADERS,
+                "body": json.dumps({"error": "room not found for studentId"})
+            }
+        response_body["room"] = room
+
+    elif paged:
+        rooms, next_position = load_page(form_id, generation, gender, limit, position)
+        response_body["gender"] = gender
+        response_body["results"] = rooms
+        response_body["nextCursor"] = encode_cursor(generation, next_position) if next_position is not None else None
+
+    else:
+        male_results, female_results = load_all_rooms(form_id, generation)
+        response_body["maleResults"] = male_results
+        response_body["femaleResults"] = female_results
+
+    # 6) 최종 응답
+    body = json.dumps(response_body, ensure_ascii=False, default=str)
+
+    if etag is None:
+        etag = '"' + hashlib.md5(body.encode("utf-8")).hexdigest() + '"'
+        if etag_matches(event, etag):
+            return not_modified(etag)
+
     return {
         "statusCode": 200,
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Content-Type": "application/json"
-        },
-        "body": json.dumps(response_body, ensure_ascii=False, default=str)
+        "headers": dict(CORS_HEADERS, ETag=etag, **{
+            "Content-Type": "application/json",
+            "Cache-Control": "no-cache"
+        }),
+        "body": body
     }
@@ -8,11 +8,26 @@ s3 = boto3.client("s3")
 
 BUCKET_NAME = "roomeya-upload"  # 네 S3 버킷 이름
 
+# 업로드 가능한 명부 형식 -> Content-Type (excelProcessor 가 확장자로 파서를 고름)
+UPLOAD_CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
 def lambda_handler(event, context):
     try:
         # 1) 업로드될 파일 이름 생성
-        # 파일명 예: uploads/students/2024-02-07-uuid.xlsx
-        ext = "xlsx"
+        # 파일명 예: uploads/students/2024-02-07-uuid.xlsx (?format=csv 면 .csv)
+        query = event.get("queryStringParameters") or {}
+        ext = (query.get("format") or "xlsx").lower()
+        if ext not in UPLOAD_CONTENT_TYPES:
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": f"format must be one of {', '.join(UPLOAD_CONTENT_TYPES)}"})
+            }
         file_key = f"uploads/{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4()}.{ext}"
 
         # 2) Presigned URL 생성
@@ -21,7 +36,7 @@ def lambda_handler(event, context):
             Params={
                 "Bucket": BUCKET_NAME,
                 "Key": file_key,
-                "ContentType": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                "ContentType": UPLOAD_CONTENT_TYPES[ext]
             },
             ExpiresIn=300  # URL 5분 동안만 유효
         )
@@ -35,7 +50,9 @@ def lambda_handler(event, context):
             },
             "body": json.dumps({
                 "uploadUrl": presigned_url,
-                "fileKey": file_key
+                "fileKey": file_key,
+                # 서명에 포함되므로 업로드할 때 같은 Content-Type 헤더를 보내야 함
+                "contentType": UPLOAD_CONTENT_TYPES[ext]
             })
         }
 